@@ -1,4 +1,4 @@
-"""Gerenciador de Jobs - fila, subprocess, monitoramento, stats."""
+"""Gerenciador de Jobs - fila com slots por recurso, subprocess, monitoramento, stats."""
 
 import asyncio
 import json
@@ -16,6 +16,8 @@ from typing import Optional
 from api.stats_tracker import STAGES, estimate_remaining, record_job_complete, format_eta
 
 JOBS_DIR = Path(os.environ.get("JOBS_DIR", "jobs"))
+# Caches compartilhados entre jobs (TTS, etc). Sem config.json, nao vira job.
+CACHE_DIR = Path(os.environ.get("DUBLAR_CACHE_DIR", JOBS_DIR / "_cache"))
 PIPELINE_SCRIPT = os.environ.get("PIPELINE_SCRIPT", "dublar_pro_v5.py")
 PYTHON_BIN = os.environ.get("PYTHON_BIN", sys.executable or shutil.which("python3") or "python3")
 DOCKER_GPU_IMAGE = os.environ.get("DOCKER_GPU_IMAGE", "dublar-pro:gpu")
@@ -52,6 +54,69 @@ STAGES_DOWNLOAD = [
 ]
 
 
+# Classes de recurso do escalonador e slots (jobs simultaneos) de cada uma
+RESOURCE_SLOTS = {
+    "gpu": int(os.environ.get("JOB_SLOTS_GPU", "1")),
+    "cpu": int(os.environ.get("JOB_SLOTS_CPU", str(max(1, (os.cpu_count() or 4) // 4)))),
+    "io": int(os.environ.get("JOB_SLOTS_IO", "4")),
+}
+# Classe que domina uma fase com etapas de varias classes (a mais escassa primeiro)
+RESOURCE_ORDER = ("gpu", "cpu", "io")
+
+# Jobs de dublagem rodam em duas fases (processos separados) para que a fase
+# GPU de um job (ASR/traducao/TTS) encaixe com a fase CPU (sync/mux) de outro.
+SPLIT_PHASES = os.environ.get("JOB_SPLIT_PHASES", "1") != "0"
+DUBBING_PHASES = [
+    ("synth", ("download", "extraction", "transcription", "translation", "split", "tts")),
+    ("assemble", ("sync", "concat", "postprocess", "mux")),
+]
+
+# Prioridade padrao por tipo de job (menor = antes). config["priority"] sobrescreve.
+JOB_PRIORITY = {"download": 0, "cutting": 1, "transcription": 2, "dubbing": 3}
+
+WHISPER_CPU_MODELS = ("tiny", "base", "small")
+
+
+def target_langs(config: dict) -> str:
+    """tgt_lang como string para --tgt; lista ["pt", "es"] vira "pt,es" (um job, varios idiomas)."""
+    tgt = config.get("tgt_lang", "pt")
+    if isinstance(tgt, (list, tuple)):
+        tgt = ",".join(tgt)
+    return tgt
+
+
+def encode_args(config: dict) -> list:
+    """Flags --encode-* (encode_comum) a partir da config do job."""
+    args = []
+    if config.get("encode_profile"):
+        args.extend(["--encode-profile", config["encode_profile"]])
+    if config.get("encode_preset"):
+        args.extend(["--encode-preset", config["encode_preset"]])
+    if config.get("encode_crf") is not None:
+        args.extend(["--encode-crf", str(config["encode_crf"])])
+    if config.get("encode_threads") is not None:
+        args.extend(["--encode-threads", str(config["encode_threads"])])
+    return args
+
+
+def stage_resource(stage_id: str, config: dict) -> str:
+    """Classe de recurso (gpu/cpu/io) que uma etapa usa, conforme a config do job."""
+    if stage_id in ("download", "zip", "export"):
+        return "io"
+    if stage_id == "transcription":
+        if config.get("asr_engine", "whisper") == "whisper" and config.get("whisper_model") in WHISPER_CPU_MODELS:
+            return "cpu"
+        return "gpu"
+    if stage_id == "translation":
+        return "gpu"
+    if stage_id == "analysis":
+        return "io" if config.get("llm_provider") not in (None, "ollama") else "gpu"
+    if stage_id == "tts":
+        tts = config.get("tts_engine", "edge")
+        return "gpu" if tts in ("xtts", "bark") else "cpu" if tts == "piper" else "io"
+    return "cpu"
+
+
 def _detect_docker_gpu() -> bool:
     """Verifica se a imagem Docker GPU existe e Docker esta disponivel."""
     try:
@@ -104,6 +169,9 @@ class Job:
         self.stage_times: dict[str, float] = {}
         self._last_stage_num = 0
         self._last_stage_start = 0.0
+        self.phase = 0
+        self._seq = 0
+        self._held: set = set()
 
     @property
     def duration(self) -> float:
@@ -125,6 +193,30 @@ class Job:
         else:
             return STAGES
 
+    def phases(self) -> list:
+        """Fases do job: [(nome, etapas)]. "all" = um unico processo."""
+        # Varios idiomas em --tgt rodam em um processo so (--phase nao os suporta)
+        if (SPLIT_PHASES and self.config.get("job_type", "dubbing") == "dubbing"
+                and "," not in target_langs(self.config)):
+            return [(name, [st for st in STAGES if st["id"] in ids]) for name, ids in DUBBING_PHASES]
+        return [("all", self._get_stages())]
+
+    @property
+    def resources(self) -> set:
+        """Classe de recurso que a fase atual ocupa: a dominante entre as etapas.
+
+        Etapas curtas da fase (extracao, split) nao seguram um slot de cpu
+        enquanto a fase roda na GPU; senao o synth de um job esperaria o
+        assemble (cpu) de outro com um slot de cpu so.
+        """
+        classes = {stage_resource(st["id"], self.config) for st in self.phases()[self.phase][1]}
+        return {next(r for r in RESOURCE_ORDER if r in classes)} if classes else set()
+
+    @property
+    def priority(self) -> int:
+        job_type = self.config.get("job_type", "dubbing")
+        return int(self.config.get("priority", JOB_PRIORITY.get(job_type, 3)))
+
     def _recover_if_output_exists(self):
         """Se marcado como failed mas arquivos de saida existem, recuperar para completed."""
         if self.status != "failed":
@@ -168,6 +260,9 @@ class Job:
             "checkpoint": checkpoint,
             "progress": progress,
             "stage_times": self.stage_times,
+            "phase": self.phases()[self.phase][0],
+            "resources": sorted(self.resources),
+            "priority": self.priority,
         }
 
     def _read_checkpoint(self) -> dict:
@@ -294,7 +389,7 @@ class Job:
             "split": "ffmpeg",
             "tts": cfg.get("tts_engine", "edge"),
             "sync": cfg.get("sync_mode", "smart"),
-            "concat": "ffmpeg",
+            "concat": "numpy",
             "postprocess": "rubberband",
             "mux": "ffmpeg",
         }
@@ -379,12 +474,17 @@ class Job:
 class JobManager:
     def __init__(self):
         self.jobs: dict[str, Job] = {}
-        self.queue: asyncio.Queue = asyncio.Queue()
+        self._pending: list[tuple[int, int, str]] = []  # (prioridade, ordem de chegada, job_id)
+        self._seq = 0
+        self._in_use = {res: 0 for res in RESOURCE_SLOTS}
+        self._running: set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
         self._worker_task: Optional[asyncio.Task] = None
         self._subscribers: dict[str, list] = {}
         JOBS_DIR.mkdir(exist_ok=True)
 
     def start(self):
+        self._wakeup = asyncio.Event()
         self._load_existing_jobs()
         self._worker_task = asyncio.create_task(self._worker())
 
@@ -501,13 +601,72 @@ class JobManager:
         if loaded:
             print(f"[JobManager] {loaded} jobs carregados do disco")
 
+    def _enqueue(self, job: Job):
+        # Fases seguintes mantem a ordem de chegada original do job
+        if not job._seq:
+            self._seq += 1
+            job._seq = self._seq
+        self._pending.append((job.priority, job._seq, job.id))
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _admit(self) -> list:
+        """Escolhe os jobs que cabem nos slots livres.
+
+        Ordem: prioridade, depois chegada (FIFO). Um job que nao cabe bloqueia
+        sua classe de recurso para os que vem depois, entao ele nao e
+        ultrapassado indefinidamente por jobs da mesma classe; jobs de outras
+        classes seguem livres.
+        """
+        admitted = []
+        blocked = set()
+        for entry in sorted(self._pending):
+            job = self.jobs.get(entry[2])
+            # "running" na fila = job aguardando recursos para a proxima fase
+            if not job or job.status not in ("queued", "running"):
+                self._pending.remove(entry)
+                continue
+            needs = job.resources
+            if needs & blocked:
+                continue
+            if all(self._in_use[r] < RESOURCE_SLOTS[r] for r in needs):
+                for r in needs:
+                    self._in_use[r] += 1
+                job._held = needs
+                self._pending.remove(entry)
+                admitted.append(job)
+            else:
+                blocked |= needs
+        return admitted
+
+    async def _run_and_release(self, job: Job):
+        next_phase = False
+        try:
+            next_phase = await self._run_job(job)
+        finally:
+            for r in job._held:
+                self._in_use[r] -= 1
+            job._held = set()
+            if next_phase and job.status == "running":
+                self._enqueue(job)
+            self._wakeup.set()
+
     async def _worker(self):
+        """Escalonador: admite jobs quando seus recursos estao livres."""
         while True:
-            job_id = await self.queue.get()
-            job = self.jobs.get(job_id)
-            if job and job.status == "queued":
-                await self._run_job(job)
-            self.queue.task_done()
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            for job in self._admit():
+                task = asyncio.create_task(self._run_and_release(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    def scheduler_status(self) -> dict:
+        return {
+            "slots": RESOURCE_SLOTS,
+            "in_use": dict(self._in_use),
+            "pending": [job_id for _, _, job_id in sorted(self._pending)],
+        }
 
     async def create_job(self, config: dict) -> Job:
         job_id = str(uuid.uuid4())[:8]
@@ -529,15 +688,23 @@ class JobManager:
         self.jobs[job_id] = job
         (job.workdir / "config.json").write_text(json.dumps(config, indent=2))
 
-        await self.queue.put(job_id)
+        self._enqueue(job)
         await self._notify(job_id, {"event": "created", "job": job.to_dict()})
         return job
 
-    async def _run_job(self, job: Job):
-        job.status = "running"
-        job.started_at = time.time()
-        job._last_stage_start = job.started_at
-        await self._notify(job.id, {"event": "started", "job": job.to_dict()})
+    async def _run_job(self, job: Job) -> bool:
+        """Roda a fase atual do job. Retorna True se ainda ha fase pendente."""
+        phases = job.phases()
+        phase_name = phases[job.phase][0]
+        first_phase = job.phase == 0
+        if first_phase:
+            job.status = "running"
+            job.started_at = time.time()
+            job._last_stage_start = job.started_at
+            await self._notify(job.id, {"event": "started", "job": job.to_dict()})
+        else:
+            # Tempo na fila entre fases nao conta para a etapa seguinte
+            job._last_stage_start = time.time()
 
         job_type = job.config.get("job_type", "dubbing")
 
@@ -559,6 +726,8 @@ class JobManager:
                 cmd = self._build_local_download_command(job)
             else:
                 cmd = self._build_local_command(job)
+        if phase_name != "all":
+            cmd.extend(["--phase", phase_name])
 
         log_path = job.workdir / "output.log"
 
@@ -569,7 +738,7 @@ class JobManager:
                 if python_dir not in env.get("PATH", ""):
                     env["PATH"] = python_dir + ":" + env.get("PATH", "")
 
-            with open(log_path, "w") as log_file:
+            with open(log_path, "w" if first_phase else "a") as log_file:
                 # Docker roda do project dir, local roda do workdir
                 cwd = str(PROJECT_DIR) if DOCKER_GPU_AVAILABLE else str(job.workdir)
 
@@ -589,12 +758,19 @@ class JobManager:
                     })
 
                 exit_code = job.process.returncode
-                job.finished_at = time.time()
 
                 # Processar todas as transicoes de etapa pendentes
                 checkpoint = job._read_checkpoint()
                 job._calc_progress(checkpoint)
 
+                if exit_code == 0 and job.phase + 1 < len(phases):
+                    job.phase += 1
+                    print(f"[JobManager] {job.id}: fase {phase_name} concluida, aguardando recursos")
+                    await self._notify(job.id, {"event": "progress", "job": job.to_dict()})
+                    return True
+
+                job.finished_at = time.time()
+
                 # Registrar tempo da ultima etapa
                 stages = job._get_stages()
                 if job._last_stage_num > 0 and job._last_stage_num <= len(stages):
@@ -634,6 +810,7 @@ class JobManager:
             job.finished_at = time.time()
 
         await self._notify(job.id, {"event": "finished", "job": job.to_dict()})
+        return False
 
     def _build_docker_cut_command(self, job: Job) -> list:
         """Monta comando Docker para corte de clips."""
@@ -645,6 +822,7 @@ class JobManager:
 
         Path(hf_cache).mkdir(parents=True, exist_ok=True)
         Path(whisper_cache).mkdir(parents=True, exist_ok=True)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
         cmd = [
             "docker", "run", "--rm",
@@ -656,6 +834,9 @@ class JobManager:
             "--network", "host",
             # Script montado como volume read-only
             "-v", f"{script_path}:/app/clipar_v1.py:ro",
+            "-v", f"{PROJECT_DIR / 'asr_comum.py'}:/app/asr_comum.py:ro",
+            "-v", f"{PROJECT_DIR / 'encode_comum.py'}:/app/encode_comum.py:ro",
+            "-v", f"{CACHE_DIR.resolve()}:/app/cache",
             # Dirs de trabalho
             "-v", f"{workdir_abs}/dub_work:/app/dub_work",
             "-v", f"{workdir_abs}/clips:/app/clips",
@@ -678,6 +859,15 @@ class JobManager:
         cmd.extend(["--in", input_val])
         cmd.extend(["--outdir", "/app/clips"])
         cmd.extend(["--mode", config.get("mode", "manual")])
+        if config.get("cut_mode"):
+            cmd.extend(["--cut-mode", config["cut_mode"]])
+        if config.get("cut_workers"):
+            cmd.extend(["--cut-workers", str(config["cut_workers"])])
+        if config.get("batch_cut") is False:
+            cmd.append("--no-batch-cut")
+        # ZIP montado sob demanda por /api/jobs/{id}/clips/zip (sem copia em disco)
+        cmd.append("--no-zip")
+        cmd.extend(encode_args(config))
 
         if config.get("mode") == "manual" and config.get("timestamps"):
             cmd.extend(["--timestamps", config["timestamps"]])
@@ -692,6 +882,9 @@ class JobManager:
                 cmd.extend(["--max-duration", str(config["max_duration"])])
             if config.get("whisper_model"):
                 cmd.extend(["--whisper-model", config["whisper_model"]])
+            if config.get("asr_chunked"):
+                cmd.append("--asr-chunked")
+            cmd.extend(["--cache-dir", "/app/cache"])
             # Providers externos
             if config.get("llm_provider") and config["llm_provider"] != "ollama":
                 cmd.extend(["--llm-provider", config["llm_provider"]])
@@ -713,6 +906,15 @@ class JobManager:
         cmd.extend(["--in", config["input"]])
         cmd.extend(["--outdir", str(job.workdir.resolve() / "clips")])
         cmd.extend(["--mode", config.get("mode", "manual")])
+        if config.get("cut_mode"):
+            cmd.extend(["--cut-mode", config["cut_mode"]])
+        if config.get("cut_workers"):
+            cmd.extend(["--cut-workers", str(config["cut_workers"])])
+        if config.get("batch_cut") is False:
+            cmd.append("--no-batch-cut")
+        # ZIP montado sob demanda por /api/jobs/{id}/clips/zip (sem copia em disco)
+        cmd.append("--no-zip")
+        cmd.extend(encode_args(config))
 
         if config.get("mode") == "manual" and config.get("timestamps"):
             cmd.extend(["--timestamps", config["timestamps"]])
@@ -727,6 +929,9 @@ class JobManager:
                 cmd.extend(["--max-duration", str(config["max_duration"])])
             if config.get("whisper_model"):
                 cmd.extend(["--whisper-model", config["whisper_model"]])
+            if config.get("asr_chunked"):
+                cmd.append("--asr-chunked")
+            cmd.extend(["--cache-dir", str(CACHE_DIR.resolve())])
             # Providers externos
             if config.get("llm_provider") and config["llm_provider"] != "ollama":
                 cmd.extend(["--llm-provider", config["llm_provider"]])
@@ -749,6 +954,7 @@ class JobManager:
 
         Path(hf_cache).mkdir(parents=True, exist_ok=True)
         Path(whisper_cache).mkdir(parents=True, exist_ok=True)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
         cmd = [
             "docker", "run", "--rm",
@@ -759,6 +965,8 @@ class JobManager:
             "--ulimit", "stack=67108864",
             "--network", "host",
             "-v", f"{script_path}:/app/transcrever_v1.py:ro",
+            "-v", f"{PROJECT_DIR / 'asr_comum.py'}:/app/asr_comum.py:ro",
+            "-v", f"{CACHE_DIR.resolve()}:/app/cache",
             "-v", f"{workdir_abs}/dub_work:/app/dub_work",
             "-v", f"{workdir_abs}/transcription:/app/transcription",
             "-v", f"{hf_cache}:/root/.cache/huggingface",
@@ -784,6 +992,9 @@ class JobManager:
             cmd.extend(["--whisper-model", config["whisper_model"]])
         if config.get("src_lang"):
             cmd.extend(["--src", config["src_lang"]])
+        if config.get("asr_chunked"):
+            cmd.append("--asr-chunked")
+        cmd.extend(["--cache-dir", "/app/cache"])
 
         return cmd
 
@@ -802,6 +1013,9 @@ class JobManager:
             cmd.extend(["--whisper-model", config["whisper_model"]])
         if config.get("src_lang"):
             cmd.extend(["--src", config["src_lang"]])
+        if config.get("asr_chunked"):
+            cmd.append("--asr-chunked")
+        cmd.extend(["--cache-dir", str(CACHE_DIR.resolve())])
 
         return cmd
 
@@ -860,6 +1074,7 @@ class JobManager:
         # Garantir que os dirs de cache existam no host
         Path(hf_cache).mkdir(parents=True, exist_ok=True)
         Path(whisper_cache).mkdir(parents=True, exist_ok=True)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
         cmd = [
             "docker", "run", "--rm",
@@ -877,6 +1092,8 @@ class JobManager:
             "-v", f"{hf_cache}:/root/.cache/huggingface",
             # Cache OpenAI Whisper (evitar re-download do modelo ~3GB)
             "-v", f"{whisper_cache}:/root/.cache/whisper",
+            # Cache compartilhado entre jobs (TTS)
+            "-v", f"{CACHE_DIR.resolve()}:/app/cache",
             # Imagem
             DOCKER_GPU_IMAGE,
         ]
@@ -895,7 +1112,7 @@ class JobManager:
 
         if config.get("src_lang"):
             cmd.extend(["--src", config["src_lang"]])
-        cmd.extend(["--tgt", config.get("tgt_lang", "pt")])
+        cmd.extend(["--tgt", target_langs(config)])
 
         cmd.extend(["--outdir", "/app/dublado"])
 
@@ -905,6 +1122,8 @@ class JobManager:
             cmd.extend(["--whisper-model", config["whisper_model"]])
         if asr == "parakeet" and config.get("parakeet_model"):
             cmd.extend(["--parakeet-model", config["parakeet_model"]])
+        if asr == "whisper" and config.get("asr_chunked"):
+            cmd.append("--asr-chunked")
 
         tradutor = config.get("translation_engine", "m2m100")
         cmd.extend(["--tradutor", tradutor])
@@ -912,6 +1131,12 @@ class JobManager:
             cmd.extend(["--modelo", config["ollama_model"]])
         if config.get("large_model"):
             cmd.append("--large-model")
+        if config.get("m2m_backend"):
+            cmd.extend(["--m2m-backend", config["m2m_backend"]])
+        if tradutor == "ollama" and config.get("translate_workers"):
+            cmd.extend(["--translate-workers", str(config["translate_workers"])])
+        if tradutor == "ollama" and config.get("translate_batch"):
+            cmd.extend(["--translate-batch", str(config["translate_batch"])])
 
         tts = config.get("tts_engine", "edge")
         cmd.extend(["--tts", tts])
@@ -919,9 +1144,17 @@ class JobManager:
             cmd.extend(["--voice", config["voice"]])
         if config.get("tts_rate"):
             cmd.extend(["--rate", config["tts_rate"]])
+        if config.get("tts_concurrency"):
+            cmd.extend(["--tts-concurrency", str(config["tts_concurrency"])])
+        if config.get("piper_workers"):
+            cmd.extend(["--piper-workers", str(config["piper_workers"])])
+        cmd.extend(["--cache-dir", "/app/cache"])
 
         if config.get("sync_mode"):
             cmd.extend(["--sync", config["sync_mode"]])
+        if config.get("extend_render"):
+            cmd.extend(["--extend-render", config["extend_render"]])
+        cmd.extend(encode_args(config))
         if config.get("maxstretch"):
             cmd.extend(["--maxstretch", str(config["maxstretch"])])
         if config.get("tolerance"):
@@ -930,6 +1163,10 @@ class JobManager:
             cmd.append("--no-truncate")
         if config.get("use_rubberband") is False:
             cmd.append("--no-rubberband")
+        if config.get("sync_engine"):
+            cmd.extend(["--sync-engine", config["sync_engine"]])
+        if config.get("sync_workers") is not None:
+            cmd.extend(["--sync-workers", str(config["sync_workers"])])
 
         if config.get("diarize"):
             cmd.append("--diarize")
@@ -939,6 +1176,8 @@ class JobManager:
         if config.get("clone_voice"):
             cmd.append("--clonar-voz")
 
+        if config.get("stream"):
+            cmd.append("--stream")
         if config.get("maxdur"):
             cmd.extend(["--maxdur", str(config["maxdur"])])
         if config.get("seed"):
@@ -955,7 +1194,7 @@ class JobManager:
 
         if config.get("src_lang"):
             cmd.extend(["--src", config["src_lang"]])
-        cmd.extend(["--tgt", config.get("tgt_lang", "pt")])
+        cmd.extend(["--tgt", target_langs(config)])
 
         cmd.extend(["--outdir", str(job.workdir.resolve() / "dublado")])
 
@@ -965,6 +1204,8 @@ class JobManager:
             cmd.extend(["--whisper-model", config["whisper_model"]])
         if asr == "parakeet" and config.get("parakeet_model"):
             cmd.extend(["--parakeet-model", config["parakeet_model"]])
+        if asr == "whisper" and config.get("asr_chunked"):
+            cmd.append("--asr-chunked")
 
         tradutor = config.get("translation_engine", "m2m100")
         cmd.extend(["--tradutor", tradutor])
@@ -972,6 +1213,12 @@ class JobManager:
             cmd.extend(["--modelo", config["ollama_model"]])
         if config.get("large_model"):
             cmd.append("--large-model")
+        if config.get("m2m_backend"):
+            cmd.extend(["--m2m-backend", config["m2m_backend"]])
+        if tradutor == "ollama" and config.get("translate_workers"):
+            cmd.extend(["--translate-workers", str(config["translate_workers"])])
+        if tradutor == "ollama" and config.get("translate_batch"):
+            cmd.extend(["--translate-batch", str(config["translate_batch"])])
 
         tts = config.get("tts_engine", "edge")
         cmd.extend(["--tts", tts])
@@ -979,9 +1226,17 @@ class JobManager:
             cmd.extend(["--voice", config["voice"]])
         if config.get("tts_rate"):
             cmd.extend(["--rate", config["tts_rate"]])
+        if config.get("tts_concurrency"):
+            cmd.extend(["--tts-concurrency", str(config["tts_concurrency"])])
+        if config.get("piper_workers"):
+            cmd.extend(["--piper-workers", str(config["piper_workers"])])
+        cmd.extend(["--cache-dir", str(CACHE_DIR.resolve())])
 
         if config.get("sync_mode"):
             cmd.extend(["--sync", config["sync_mode"]])
+        if config.get("extend_render"):
+            cmd.extend(["--extend-render", config["extend_render"]])
+        cmd.extend(encode_args(config))
         if config.get("maxstretch"):
             cmd.extend(["--maxstretch", str(config["maxstretch"])])
         if config.get("tolerance"):
@@ -990,6 +1245,10 @@ class JobManager:
             cmd.append("--no-truncate")
         if config.get("use_rubberband") is False:
             cmd.append("--no-rubberband")
+        if config.get("sync_engine"):
+            cmd.extend(["--sync-engine", config["sync_engine"]])
+        if config.get("sync_workers") is not None:
+            cmd.extend(["--sync-workers", str(config["sync_workers"])])
 
         if config.get("diarize"):
             cmd.append("--diarize")
@@ -999,6 +1258,8 @@ class JobManager:
         if config.get("clone_voice"):
             cmd.append("--clonar-voz")
 
+        if config.get("stream"):
+            cmd.append("--stream")
         if config.get("maxdur"):
             cmd.extend(["--maxdur", str(config["maxdur"])])
         if config.get("seed"):
@@ -1020,6 +1281,12 @@ class JobManager:
             job.finished_at = time.time()
             await self._notify(job_id, {"event": "cancelled", "job": job.to_dict()})
             return True
+        if job.status in ("queued", "running"):
+            # Na fila ou entre fases: o escalonador descarta o job
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            await self._notify(job_id, {"event": "cancelled", "job": job.to_dict()})
+            return True
         return False
 
     async def delete_job(self, job_id: str) -> bool:
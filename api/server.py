@@ -2,16 +2,17 @@
 
 import json
 import os
+import subprocess
 import uuid
 from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-from api.job_manager import JobManager
+from api.job_manager import JobManager, PYTHON_BIN, PROJECT_DIR
 from api.model_manager import get_ollama_models, get_ollama_status, unload_ollama_model, start_ollama, stop_ollama, pull_ollama_model, get_all_options
 from api.system_monitor import get_system_status
 from api.stats_tracker import get_stats_summary
@@ -22,13 +23,30 @@ UPLOAD_DIR = JOBS_DIR / "uploads"
 job_manager = JobManager()
 
 
+MODEL_SERVER_AUTOSTART = os.environ.get("MODEL_SERVER_AUTOSTART", "0") == "1"
+MODEL_SERVER_PORT = int(os.environ.get("MODEL_SERVER_PORT", "8765"))
+
+
+def start_model_server():
+    """Sobe o servidor de modelos residente; jobs locais herdam DUBLAR_MODEL_SERVER."""
+    proc = subprocess.Popen(
+        [PYTHON_BIN, str(PROJECT_DIR / "servidor_modelos.py"), "--port", str(MODEL_SERVER_PORT)],
+        cwd=str(PROJECT_DIR),
+    )
+    os.environ["DUBLAR_MODEL_SERVER"] = f"http://127.0.0.1:{MODEL_SERVER_PORT}"
+    return proc
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup/shutdown."""
     JOBS_DIR.mkdir(exist_ok=True)
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    model_server = start_model_server() if MODEL_SERVER_AUTOSTART else None
     job_manager.start()
     yield
+    if model_server:
+        model_server.terminate()
 
 
 APP_VERSION = "5.3.1"
@@ -55,6 +73,7 @@ async def system_status():
     """Status completo do sistema (GPU, CPU, RAM, disco)."""
     status = get_system_status()
     status["ollama"] = await get_ollama_status()
+    status["scheduler"] = job_manager.scheduler_status()
     status["version"] = APP_VERSION
     return status
 
@@ -389,18 +408,67 @@ async def list_clips(job_id: str):
     return clips
 
 
+class _ZipSink:
+    """Destino sem seek para o zipfile: acumula os bytes ate o gerador consumi-los."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def write(self, data) -> int:
+        self._buf += data
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+def _iter_zip(files: list, chunk_size: int = 1024 * 1024):
+    """Gera um ZIP (ZIP_STORED) dos arquivos em pedacos, sem gravar nada em disco."""
+    import zipfile
+
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zf:
+        for path in files:
+            info = zipfile.ZipInfo.from_file(path, path.name)
+            info.compress_type = zipfile.ZIP_STORED
+            with open(path, "rb") as src, zf.open(info, "w") as dest:
+                while True:
+                    chunk = src.read(chunk_size)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    yield sink.take()
+            yield sink.take()
+    yield sink.take()
+
+
 @app.get("/api/jobs/{job_id}/clips/zip")
 async def download_clips_zip(job_id: str):
-    """Download do ZIP com todos os clips."""
+    """Download do ZIP com todos os clips, montado sob demanda (streaming)."""
     job = job_manager.get_job(job_id)
     if not job:
         raise HTTPException(404, "Job nao encontrado")
 
-    zip_path = job.workdir / "clips" / "clips.zip"
-    if not zip_path.exists():
+    clips_dir = job.workdir / "clips"
+    files = sorted(clips_dir.glob("clip_*.mp4"))
+    if not files:
         raise HTTPException(404, "ZIP nao encontrado")
 
-    return FileResponse(zip_path, media_type="application/zip", filename=f"clips_{job_id}.zip")
+    return StreamingResponse(
+        _iter_zip(files),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="clips_{job_id}.zip"'},
+    )
 
 
 @app.get("/api/jobs/{job_id}/clips/{clip_name}")
@@ -606,7 +674,7 @@ async def cancel_job(job_id: str, delete: bool = False):
         ok = await job_manager.delete_job(job_id)
         return {"status": "deleted" if ok else "not_found"}
 
-    if job.status == "running":
+    if job.status in ("running", "queued"):
         await job_manager.cancel_job(job_id)
         return {"status": "cancelled"}
     return {"status": job.status}
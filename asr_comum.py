@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""ASR compartilhado (faster-whisper) entre dublar_pro_v5, transcrever_v1 e clipar_v1.
+
+Transcricao em blocos para audios longos: o audio e dividido em blocos de
+~5 minutos em pausas detectadas pelo VAD, os blocos sao transcritos em
+paralelo (processos na CPU, BatchedInferencePipeline na GPU) e os segmentos
+sao costurados com os offsets corrigidos, sem repeticoes nas emendas.
+
+Cache de ASR: o resultado do Whisper fica em <cache>/asr, indexado pelo hash
+do audio de origem + modelo + idioma + opcoes de decodificacao. Transcricao,
+corte viral e dublagens (em qualquer idioma de destino) do mesmo video
+reaproveitam a mesma transcricao.
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SAMPLE_RATE = 16000
+
+# Opcoes de decodificacao usadas pelos tres scripts (fazem parte da chave do cache).
+# VAD otimizado para evitar fragmentacao excessiva.
+WHISPER_OPTIONS = dict(
+    vad_filter=True,
+    vad_parameters=dict(
+        min_silence_duration_ms=600,
+        speech_pad_ms=500,
+        threshold=0.5,
+    ),
+    beam_size=5,
+    best_of=5,
+    temperature=0.0,
+    condition_on_previous_text=True,
+)
+
+# Opcoes do decode sequencial que o BatchedInferencePipeline (GPU) nao usa
+BATCHED_IGNORED_OPTIONS = ("condition_on_previous_text", "best_of", "vad_filter")
+
+# Modelo carregado em cada processo do pool (ver _init_worker)
+_WORKER_MODEL = None
+
+
+def plan_chunks(audio, chunk_s: float = 300.0, min_silence_ms: int = 500) -> list[tuple[int, int]]:
+    """Divide o audio (16 kHz) em blocos de ~chunk_s cortando no meio de pausas.
+
+    Retorna [(inicio, fim)] em amostras. Sem pausa ate 1.5x chunk_s (musica,
+    fala continua), corta na marca de chunk_s.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    total = len(audio)
+    target = int(chunk_s * SAMPLE_RATE)
+    if total <= target * 1.25:
+        return [(0, total)]
+
+    speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=min_silence_ms))
+    gaps = [(a["end"] + b["start"]) // 2 for a, b in zip(speech, speech[1:])]
+
+    chunks = []
+    start = 0
+    for cut in gaps:
+        while cut - start > target * 1.5:
+            chunks.append((start, start + target))
+            start += target
+        if cut - start >= target:
+            chunks.append((start, cut))
+            start = cut
+    while total - start > target * 1.5:
+        chunks.append((start, start + target))
+        start += target
+    chunks.append((start, total))
+    return chunks
+
+
+def _init_worker(model_size: str, device: str, compute_type: str, cpu_threads: int):
+    global _WORKER_MODEL
+    from faster_whisper import WhisperModel
+    _WORKER_MODEL = WhisperModel(model_size, device=device, compute_type=compute_type,
+                                 cpu_threads=cpu_threads)
+
+
+def _detect_language(audio) -> tuple[str, float]:
+    # O idioma sai do transcribe() antes de consumir os segmentos
+    _, info = _WORKER_MODEL.transcribe(audio[:30 * SAMPLE_RATE], vad_filter=True)
+    return info.language, info.language_probability
+
+
+def _transcribe_chunk(audio, offset_s: float, language: str | None, kwargs: dict) -> list[dict]:
+    segments_iter, _ = _WORKER_MODEL.transcribe(audio, language=language, **kwargs)
+    out = []
+    for seg in segments_iter:
+        text = (seg.text or "").strip()
+        if text:
+            out.append({"start": float(seg.start) + offset_s, "end": float(seg.end) + offset_s, "text": text})
+    return out
+
+
+def _norm(text: str) -> str:
+    return re.sub(r"\W+", " ", text.lower()).strip()
+
+
+def stitch_segments(chunk_results: list[list[dict]]) -> list[dict]:
+    """Junta os segmentos dos blocos (em ordem) removendo repeticoes nas emendas.
+
+    Um segmento que comeca antes do fim do anterior e repete o mesmo texto
+    (ou esta contido nele) e descartado; senao seu inicio e ajustado.
+    """
+    out = []
+    for segs in chunk_results:
+        for seg in segs:
+            if out and seg["start"] < out[-1]["end"] - 0.05:
+                prev, cur = _norm(out[-1]["text"]), _norm(seg["text"])
+                if cur and (cur == prev or cur in prev):
+                    continue
+                seg = dict(seg, start=out[-1]["end"])
+                if seg["end"] <= seg["start"]:
+                    continue
+            out.append(seg)
+    return out
+
+
+def transcribe_chunked(audio_path, model_size: str, src_lang: str | None = None, device: str = "cpu",
+                       compute_type: str = "int8", chunk_s: float = 300.0, workers: int = 0,
+                       model=None, batch_size: int = 16, **transcribe_kwargs) -> tuple[list[dict], str, float | None]:
+    """Transcreve audio longo em blocos paralelos.
+
+    CPU: blocos de ~chunk_s (cortados em pausas) divididos entre workers
+    processos, cada um com seu modelo (0 = nucleos / 4). GPU: o
+    BatchedInferencePipeline do faster-whisper decodifica os trechos de fala
+    em lotes de batch_size no mesmo modelo (model, se ja carregado).
+    transcribe_kwargs vao para WhisperModel.transcribe (vad_parameters, beam_size...).
+
+    Retorna: (segmentos [{"start","end","text"}], idioma, probabilidade do idioma)
+    """
+    from faster_whisper.audio import decode_audio
+
+    if device == "cuda":
+        return _transcribe_batched(audio_path, model_size, src_lang, compute_type, model, batch_size,
+                                   transcribe_kwargs)
+
+    audio = decode_audio(str(audio_path), sampling_rate=SAMPLE_RATE)
+    chunks = plan_chunks(audio, chunk_s)
+    cores = os.cpu_count() or 4
+    workers = workers or max(1, cores // 4)
+    workers = max(1, min(workers, len(chunks)))
+    cpu_threads = max(1, cores // workers)
+    print(f"[ASR] {len(audio) / SAMPLE_RATE / 60:.1f} min em {len(chunks)} blocos, "
+          f"{workers} processos x {cpu_threads} threads", flush=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_size, "cpu", compute_type, cpu_threads)) as pool:
+        lang_prob = None
+        language = src_lang
+        if not language:
+            language, lang_prob = pool.submit(_detect_language, audio[chunks[0][0]:chunks[0][1]]).result()
+            print(f"[ASR] Idioma detectado: {language} ({lang_prob:.1%})", flush=True)
+
+        futures = [pool.submit(_transcribe_chunk, audio[a:b], a / SAMPLE_RATE, language, transcribe_kwargs)
+                   for a, b in chunks]
+        results = []
+        for i, fut in enumerate(futures, 1):
+            results.append(fut.result())
+            print(f"[ASR] Bloco {i}/{len(chunks)}: {len(results[-1])} segmentos", flush=True)
+
+    segments = stitch_segments(results)
+    return segments, language, lang_prob
+
+
+def _transcribe_batched(audio_path, model_size, src_lang, compute_type, model, batch_size, kwargs):
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+    if model is None:
+        model = WhisperModel(model_size, device="cuda", compute_type=compute_type)
+    print(f"[ASR] BatchedInferencePipeline (lotes de {batch_size})", flush=True)
+    kwargs = {k: v for k, v in kwargs.items() if k not in BATCHED_IGNORED_OPTIONS}
+    pipeline = BatchedInferencePipeline(model=model)
+    segments_iter, info = pipeline.transcribe(str(audio_path), language=src_lang, batch_size=batch_size, **kwargs)
+
+    segments = []
+    for seg in segments_iter:
+        text = (seg.text or "").strip()
+        if text:
+            segments.append({"start": float(seg.start), "end": float(seg.end), "text": text})
+    return segments, info.language, getattr(info, "language_probability", None)
+
+
+def audio_fingerprint(source) -> str:
+    """Hash do audio de origem.
+
+    Usa os pacotes da primeira trilha de audio sem decodificar (ffmpeg -c copy
+    -f hash): o mesmo audio em containers diferentes (mp4 do video, m4a baixado
+    so com audio) da o mesmo hash. Sem ffmpeg ou sem trilha, hash do arquivo.
+    """
+    try:
+        r = subprocess.run(["ffmpeg", "-v", "error", "-i", str(source), "-map", "0:a:0",
+                            "-c", "copy", "-f", "hash", "-hash", "sha256", "-"],
+                           capture_output=True, text=True, timeout=900)
+        line = r.stdout.strip()
+        if r.returncode == 0 and "=" in line:
+            return line.split("=", 1)[1]
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    h = hashlib.sha256()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def decode_options(options: dict, chunked: bool = False, device: str = "cpu") -> dict:
+    """Opcoes efetivas de decodificacao, para a chave do ASRCache.
+
+    Decode sequencial, blocos na CPU e BatchedInferencePipeline na GPU dao
+    segmentos diferentes para o mesmo audio; o modo em lote ainda descarta
+    BATCHED_IGNORED_OPTIONS. Cada modo fica com sua propria entrada.
+    """
+    if not chunked:
+        return dict(options, mode="sequential")
+    if device == "cuda":
+        return dict({k: v for k, v in options.items() if k not in BATCHED_IGNORED_OPTIONS}, mode="batched")
+    return dict(options, mode="chunked")
+
+
+class ASRCache:
+    """Transcricoes Whisper por (hash do audio, modelo, idioma, opcoes).
+
+    options: use decode_options() - inclui o modo (sequencial/blocos/lote).
+
+    Guarda os segmentos crus do Whisper (antes de merge/diarizacao); cada
+    script aplica seu pos-processamento. Com idioma automatico o resultado
+    tambem e gravado sob o idioma detectado, entao um job posterior com
+    --src explicito reaproveita.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root) / "asr"
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, fingerprint: str, model: str, language: str | None, options: dict) -> Path:
+        payload = json.dumps({"audio": fingerprint, "model": model, "language": language or "auto",
+                              "options": options}, sort_keys=True)
+        key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, fingerprint: str, model: str, language: str | None, options: dict) -> dict | None:
+        """{"segments", "language", "language_probability"} ou None"""
+        path = self._path(fingerprint, model, language, options)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        print(f"[ASR] Cache: transcricao reaproveitada ({len(data['segments'])} segmentos, {model})", flush=True)
+        return data
+
+    def put(self, fingerprint: str, model: str, language: str | None, options: dict,
+            segments: list[dict], detected: str | None, probability: float | None = None):
+        data = {"segments": segments, "language": detected or language,
+                "language_probability": probability, "created": time.time()}
+        for lang in {language, detected or language}:
+            path = self._path(fingerprint, model, lang, options)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Nome unico: jobs e threads gravando a mesma chave nao colidem
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, prefix=path.stem + ".",
+                                             suffix=".tmp", delete=False) as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(f.name, path)
+
+
+def transcribe(audio_path, model_size: str, src_lang: str | None = None, device: str = "cpu",
+               compute_type: str = "int8", chunked: bool = False, chunk_s: float = 300.0, workers: int = 0,
+               cache_dir=None, fingerprint: str | None = None, verbose: bool = False) -> tuple[list[dict], str]:
+    """Transcricao faster-whisper com WHISPER_OPTIONS, cache de ASR e modo em blocos.
+
+    cache_dir + fingerprint (audio_fingerprint da origem) ativam o cache.
+    verbose: imprime cada segmento (decodificacao sequencial).
+    Retorna: (segmentos [{"start","end","text"}], idioma)
+    """
+    cache = ASRCache(cache_dir) if cache_dir and fingerprint else None
+    options = decode_options(WHISPER_OPTIONS, chunked, device)
+    hit = cache.get(fingerprint, model_size, src_lang, options) if cache else None
+    if hit:
+        return hit["segments"], hit["language"]
+
+    if chunked:
+        segments, language, prob = transcribe_chunked(audio_path, model_size, src_lang, device, compute_type,
+                                                      chunk_s=chunk_s, workers=workers, **WHISPER_OPTIONS)
+    else:
+        from faster_whisper import WhisperModel
+
+        wm = WhisperModel(model_size, device=device, compute_type=compute_type)
+        segments_iter, info = wm.transcribe(str(audio_path), language=src_lang, **WHISPER_OPTIONS)
+        segments = []
+        for seg in segments_iter:
+            text = (seg.text or "").strip()
+            if not text:
+                continue
+            segments.append({"start": float(seg.start), "end": float(seg.end), "text": text})
+            if verbose:
+                print(f"  [{seg.start:.1f}s -> {seg.end:.1f}s] {text}", flush=True)
+        language, prob = info.language, getattr(info, "language_probability", None)
+
+    if cache:
+        cache.put(fingerprint, model_size, src_lang, options, segments, language, prob)
+    return segments, language
@@ -3,6 +3,7 @@
 
 import argparse
 import json
+import os
 import re
 import subprocess
 import sys
@@ -10,6 +11,8 @@ import time
 import urllib.request
 from pathlib import Path
 
+from encode_comum import add_encode_args, cut_clip, cut_clips_batch, profile_from_args
+
 # Base URLs para providers OpenAI-compativeis
 PROVIDER_BASE_URLS = {
     "openai":     "https://api.openai.com",
@@ -95,29 +98,61 @@ def parse_timestamps(timestamps_str: str) -> list[tuple[float, float]]:
     return clips
 
 
-def cut_clips(source: Path, timestamps: list[tuple[float, float]], clips_dir: Path) -> list[Path]:
-    """Corta clips usando ffmpeg sem re-encodar."""
+def cut_clips(source: Path, timestamps: list[tuple[float, float]], clips_dir: Path,
+              mode: str = "accurate", encode: dict | None = None, workers: int = 0,
+              batch: bool = True) -> list[Path]:
+    """Corta clips com ffmpeg.
+
+    mode: "copy" (sem re-encodar, comeca no keyframe), "accurate" (reencoda so o
+    GOP inicial) ou "encode" (clip inteiro); encode: perfil de encode_comum.
+    batch: primeiro corta todos os clips lendo a fonte uma vez (uma entrada,
+    uma saida por clip, duracao conferida; ver encode_comum.cut_clips_batch);
+    so os que falharem sao refeitos um a um.
+    workers: ffmpegs simultaneos no corte um a um (0 = min(4, nucleos)). Sem
+    --encode-threads, os nucleos sao divididos entre eles.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
     clips_dir.mkdir(parents=True, exist_ok=True)
-    clip_files = []
-    for i, (start, end) in enumerate(timestamps, 1):
+    numbered = list(enumerate(timestamps, 1))
+    done = {}
+    if batch and len(timestamps) > 1:
+        print(f"[cutting] {len(timestamps)} clips em uma leitura da fonte ({mode})", flush=True)
+        ok, stderr = cut_clips_batch(
+            source, [(start, end, clips_dir / f"clip_{i:02d}.mp4") for i, (start, end) in numbered],
+            encode, mode=mode,
+        )
+        for (i, _), good in zip(numbered, ok):
+            if good:
+                done[i] = clips_dir / f"clip_{i:02d}.mp4"
+                print(f"[cutting] Clip {i:02d} salvo: clip_{i:02d}.mp4", flush=True)
+        if len(done) < len(numbered):
+            print(f"[warn] Corte em lote falhou para {len(numbered) - len(done)} clips, cortando um a um: "
+                  f"{stderr[-300:]}", flush=True)
+        numbered = [(i, ts) for i, ts in numbered if i not in done]
+        if not numbered:
+            return [done[i] for i in sorted(done)]
+
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or min(4, cpus), len(numbered) or 1))
+    if encode is not None and workers > 1 and not encode.get("threads"):
+        encode = {**encode, "threads": max(1, cpus // workers)}
+
+    def cortar(i: int, start: float, end: float) -> Path | None:
         duration = end - start
         out_path = clips_dir / f"clip_{i:02d}.mp4"
-        cmd = [
-            "ffmpeg", "-y",
-            "-ss", str(start),
-            "-i", str(source),
-            "-t", str(duration),
-            "-c", "copy",
-            str(out_path),
-        ]
         print(f"[cutting] Clip {i:02d}: {start:.1f}s - {end:.1f}s ({duration:.1f}s)", flush=True)
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = cut_clip(source, start, end, out_path, encode, mode=mode)
         if result.returncode != 0:
             print(f"[warn] ffmpeg erro no clip {i}: {result.stderr[-300:]}", flush=True)
-        else:
-            clip_files.append(out_path)
-            print(f"[cutting] Clip {i:02d} salvo: {out_path.name}", flush=True)
-    return clip_files
+            return None
+        print(f"[cutting] Clip {i:02d} salvo: {out_path.name}", flush=True)
+        return out_path
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = {i: ex.submit(cortar, i, start, end) for i, (start, end) in numbered}
+        done.update((i, f.result()) for i, f in futures.items())
+    return [done[i] for i in sorted(done) if done[i] is not None]
 
 
 def save_clips_metadata(clips_dir: Path, timestamps: list[tuple[float, float]], descriptions: list[str] | None = None):
@@ -146,7 +181,8 @@ def create_zip(clips_dir: Path) -> Path | None:
     if not clips:
         print("[warn] Nenhum clip para zipar", flush=True)
         return None
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+    # MP4 ja e comprimido: ZIP_STORED so empacota, sem gastar CPU recomprimindo
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zf:
         for clip in clips:
             zf.write(clip, clip.name)
     size_mb = zip_path.stat().st_size / (1024 * 1024)
@@ -182,26 +218,27 @@ def _has_cuda() -> bool:
         return False
 
 
-def transcribe_for_viral(audio_path: Path, model: str = "large-v3") -> list[dict]:
-    """Transcreve com faster-whisper para analise viral."""
+def transcribe_for_viral(audio_path: Path, model: str = "large-v3", chunked: bool = False,
+                         chunk_s: float = 300.0, workers: int = 0, cache_dir: str | None = None,
+                         fingerprint: str | None = None) -> list[dict]:
+    """Transcreve com faster-whisper para analise viral.
+
+    chunked: blocos paralelos cortados em pausas (ver asr_comum.transcribe_chunked).
+    cache_dir + fingerprint: cache de ASR compartilhado com transcricao e dublagem.
+    """
     print(f"[transcription] Transcrevendo para analise viral (modelo: {model})...", flush=True)
-    from faster_whisper import WhisperModel
+    from asr_comum import transcribe
 
     device = "cuda" if _has_cuda() else "cpu"
     compute = "float16" if device == "cuda" else "int8"
 
-    wm = WhisperModel(model, device=device, compute_type=compute)
-    segments_iter, info = wm.transcribe(str(audio_path), vad_filter=True)
-
-    results = []
-    for seg in segments_iter:
-        results.append({
-            "start": round(seg.start, 3),
-            "end": round(seg.end, 3),
-            "text": seg.text.strip(),
-        })
+    segments, language = transcribe(audio_path, model, None, device, compute,
+                                    chunked=chunked, chunk_s=chunk_s, workers=workers,
+                                    cache_dir=cache_dir, fingerprint=fingerprint)
+    results = [{"start": round(s["start"], 3), "end": round(s["end"], 3), "text": s["text"]}
+               for s in segments]
 
-    print(f"[transcription] {len(results)} segmentos, idioma: {info.language}", flush=True)
+    print(f"[transcription] {len(results)} segmentos, idioma: {language}", flush=True)
     return results
 
 
@@ -397,7 +434,24 @@ def main():
     parser.add_argument("--min-duration", type=int, default=30, dest="min_duration")
     parser.add_argument("--max-duration", type=int, default=120, dest="max_duration")
     parser.add_argument("--whisper-model", default="large-v3", dest="whisper_model")
+    parser.add_argument("--asr-chunked", action="store_true", dest="asr_chunked",
+                        help="Whisper em blocos paralelos cortados em pausas (audios longos)")
+    parser.add_argument("--asr-chunk-s", type=float, default=300, dest="asr_chunk_s")
+    parser.add_argument("--asr-workers", type=int, default=0, dest="asr_workers",
+                        help="Processos Whisper na CPU (0=nucleos/4)")
+    parser.add_argument("--cache-dir", default=os.environ.get("DUBLAR_CACHE_DIR"), dest="cache_dir",
+                        help="Cache de ASR compartilhado (padrao: $DUBLAR_CACHE_DIR)")
     parser.add_argument("--ollama-url", default="http://localhost:11434", dest="ollama_url")
+    parser.add_argument("--cut-mode", default="accurate", choices=["copy", "accurate", "encode"], dest="cut_mode",
+                        help="copy=sem re-encodar (inicio no keyframe), accurate=reencoda so o GOP inicial, "
+                             "encode=reencoda o clip inteiro")
+    parser.add_argument("--cut-workers", type=int, default=0, dest="cut_workers",
+                        help="Clips cortados em paralelo (0=min(4, nucleos))")
+    parser.add_argument("--no-batch-cut", action="store_true", dest="no_batch_cut",
+                        help="Cortar cada clip com seu proprio ffmpeg (sem leitura unica da fonte)")
+    parser.add_argument("--no-zip", action="store_true", dest="no_zip",
+                        help="Nao gravar clips.zip (a API monta o ZIP sob demanda)")
+    add_encode_args(parser)
     # Providers externos
     parser.add_argument("--llm-provider", default="ollama",
                         choices=["ollama", "openai", "anthropic", "groq", "deepseek", "together", "openrouter", "custom"],
@@ -409,6 +463,7 @@ def main():
     parser.add_argument("--llm-base-url", default="", dest="llm_base_url",
                         help="Base URL para provider custom (compativel com OpenAI)")
     args = parser.parse_args()
+    encode = profile_from_args(args)
 
     clips_dir = Path(args.outdir)
     workdir = clips_dir.parent  # dub_work fica no pai de clips/
@@ -432,12 +487,14 @@ def main():
                     f"Nenhum timestamp valido em: {repr(args.timestamps)!r}. "
                     "Use o formato: 00:30-02:15,05:00-07:30 (virgula, ponto-e-virgula ou nova linha como separador)"
                 )
-            cut_clips(source, timestamps, clips_dir)
+            cut_clips(source, timestamps, clips_dir, mode=args.cut_mode, encode=encode,
+                      workers=args.cut_workers, batch=not args.no_batch_cut)
             write_checkpoint(workdir, 2, "cutting", "Cortando clips")
             save_clips_metadata(clips_dir, timestamps)
 
             # Etapa 3: ZIP
-            create_zip(clips_dir)
+            if not args.no_zip:
+                create_zip(clips_dir)
             write_checkpoint(workdir, 3, "zip", "Criando ZIP")
 
         else:  # viral
@@ -450,7 +507,13 @@ def main():
             write_checkpoint(workdir, 2, "extraction", "Extracao de audio")
 
             # Etapa 3: Transcription
-            segments = transcribe_for_viral(audio, args.whisper_model)
+            fingerprint = None
+            if args.cache_dir:
+                from asr_comum import audio_fingerprint
+                fingerprint = audio_fingerprint(source)
+            segments = transcribe_for_viral(audio, args.whisper_model, chunked=args.asr_chunked,
+                                            chunk_s=args.asr_chunk_s, workers=args.asr_workers,
+                                            cache_dir=args.cache_dir, fingerprint=fingerprint)
             if not segments:
                 raise RuntimeError("Nenhum segmento de fala detectado no audio")
             write_checkpoint(workdir, 3, "transcription", "Transcricao")
@@ -484,12 +547,14 @@ def main():
             write_checkpoint(workdir, 4, "analysis", "Analise viral")
 
             # Etapa 5: Cutting
-            cut_clips(source, timestamps, clips_dir)
+            cut_clips(source, timestamps, clips_dir, mode=args.cut_mode, encode=encode,
+                      workers=args.cut_workers, batch=not args.no_batch_cut)
             write_checkpoint(workdir, 5, "cutting", "Cortando clips")
             save_clips_metadata(clips_dir, timestamps, descriptions)
 
             # Etapa 6: ZIP
-            create_zip(clips_dir)
+            if not args.no_zip:
+                create_zip(clips_dir)
             write_checkpoint(workdir, 6, "zip", "Criando ZIP")
 
         print("[done] Corte concluido com sucesso!", flush=True)
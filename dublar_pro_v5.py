@@ -9,10 +9,14 @@
 import os, sys, json, csv, argparse, subprocess, shutil, re, warnings
 from pathlib import Path
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from typing import List, Dict, Optional, Tuple
 import numpy as np
 
+from asr_comum import ASRCache, WHISPER_OPTIONS, audio_fingerprint, decode_options
+from encode_comum import (add_encode_args, probe_dts_delay, probe_keyframes, probe_video_stream,
+                          profile_from_args, splice_mismatch, x264_args, x264_splice_args)
+
 warnings.filterwarnings("ignore")
 
 # ============================================================================
@@ -297,6 +301,34 @@ def ffprobe_duration(path):
     except Exception:
         return 0.0
 
+def ffprobe_fps(path, default=30.0):
+    """Taxa de quadros do primeiro stream de video (avg_frame_rate, senao r_frame_rate)"""
+    try:
+        out = subprocess.check_output([
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=avg_frame_rate,r_frame_rate",
+            "-of", "default=nw=1",
+            str(path)
+        ], text=True, timeout=30)
+        rates = dict(line.split("=", 1) for line in out.split() if "=" in line)
+        for key in ("avg_frame_rate", "r_frame_rate"):
+            num, _, den = rates.get(key, "0/0").partition("/")
+            if float(den or 1) > 0 and float(num) > 0:
+                return float(num) / float(den or 1)
+    except Exception:
+        pass
+    return default
+
+def wav_duration(path):
+    """Duracao de um WAV lida do header (sem subprocess); fallback para ffprobe"""
+    import wave
+    try:
+        with wave.open(str(path), "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except Exception:
+        return ffprobe_duration(path)
+
 def ts_stamp(t):
     """Converte segundos para timestamp SRT"""
     h = int(t // 3600)
@@ -414,6 +446,434 @@ def normalize_audio_safe(audio_data, target_peak=0.84):
 
     return audio_int16
 
+def read_wav_mono(path, target_sr=None):
+    """Le WAV como float32 mono, reamostrando se necessario
+
+    Args:
+        path: caminho do arquivo WAV
+        target_sr: sample rate desejado (None = manter o do arquivo)
+
+    Returns:
+        (numpy array float32 em [-1, 1], sample rate)
+    """
+    from scipy.io import wavfile as wf
+
+    file_sr, data = wf.read(str(path))
+
+    if data.dtype == np.int16:
+        data = data.astype(np.float32) / 32767.0
+    elif data.dtype == np.int32:
+        data = data.astype(np.float32) / 2147483647.0
+    elif data.dtype == np.uint8:
+        data = (data.astype(np.float32) - 128.0) / 128.0
+    else:
+        data = data.astype(np.float32)
+
+    # Stereo -> mono
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+
+    if target_sr and file_sr != target_sr:
+        data = resample_audio(data, file_sr, target_sr)
+        file_sr = target_sr
+
+    return data, file_sr
+
+def resample_audio(data, sr_from, sr_to):
+    """Reamostra audio float32 mono (resample polifasico)"""
+    if sr_from == sr_to or len(data) == 0:
+        return data
+    from math import gcd
+    from scipy.signal import resample_poly
+    g = gcd(int(sr_from), int(sr_to))
+    return resample_poly(data, int(sr_to) // g, int(sr_from) // g).astype(np.float32)
+
+def decode_audio_bytes(data, target_sr):
+    """Decodifica audio comprimido (MP3, OGG...) direto da memoria
+
+    Usa libsndfile (soundfile >= 0.12 le MP3) em processo. Se nao estiver
+    disponivel, usa um unico ffmpeg via pipe (sem arquivos temporarios).
+
+    Returns:
+        numpy array float32 mono em target_sr
+    """
+    import io
+    try:
+        import soundfile as sf
+        audio, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=False)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        return resample_audio(audio, sr, target_sr)
+    except Exception:
+        proc = subprocess.run([
+            "ffmpeg", "-v", "error", "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-ar", str(target_sr), "pipe:1"
+        ], input=data, capture_output=True, check=True)
+        return np.frombuffer(proc.stdout, dtype=np.int16).astype(np.float32) / 32767.0
+
+# ============================================================================
+# CACHE DE TTS (COMPARTILHADO ENTRE JOBS)
+# ============================================================================
+
+def get_cache_root(cli_value=None):
+    """Diretorio raiz dos caches persistentes (--cache-dir ou DUBLAR_CACHE_DIR)"""
+    root = cli_value or os.environ.get("DUBLAR_CACHE_DIR")
+    return Path(root) if root else None
+
+class TTSCache:
+    """Cache de audio TTS enderecado por conteudo.
+
+    A chave e um hash de (engine, voz, rate, idioma, texto, seed, latent id...)
+    e o valor e o WAV PCM ja renderizado. Fica em <cache>/tts, compartilhado por
+    todos os jobs; prune() remove os menos usados (mtime) ate caber em max_mb.
+    """
+
+    def __init__(self, root, max_mb=None):
+        import threading
+        self.root = Path(root) / "tts"
+        self.root.mkdir(parents=True, exist_ok=True)
+        if max_mb is None:
+            max_mb = float(os.environ.get("TTS_CACHE_MAX_MB", "2048"))
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(**parts):
+        import hashlib
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.wav"
+
+    def fetch(self, key, out_path):
+        """Copia o audio em cache para out_path. Retorna True em caso de hit."""
+        src = self._path(key)
+        try:
+            shutil.copyfile(src, out_path)
+            os.utime(src)  # marca como usado recentemente (LRU)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key, wav_path):
+        """Guarda um WAV gerado (escrita atomica, segura entre jobs e threads)"""
+        import tempfile
+        dst = self._path(key)
+        tmp = None
+        try:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=dst.parent, prefix=f"{key}.", suffix=".tmp",
+                                             delete=False) as f:
+                tmp = f.name
+                with open(wav_path, "rb") as src:
+                    shutil.copyfileobj(src, f)
+            os.replace(tmp, dst)
+        except OSError as e:
+            print(f"  [WARN] Cache TTS: falha ao gravar: {e}")
+            if tmp:
+                Path(tmp).unlink(missing_ok=True)
+
+    def prune(self):
+        """Evicao LRU: remove os arquivos mais antigos ate caber no limite"""
+        entries = []
+        total = 0
+        for f in self.root.glob("*/*.wav"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+            total += st.st_size
+        removed = 0
+        if total > self.max_bytes:
+            for _, size, f in sorted(entries):
+                try:
+                    f.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+                if total <= self.max_bytes:
+                    break
+        return removed
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def report(self, label):
+        removed = self.prune()
+        total = self.hits + self.misses
+        if total:
+            print(f"[CACHE] TTS {label}: {self.hits}/{total} reaproveitados"
+                  + (f", {removed} removidos (LRU)" if removed else ""))
+
+# Versao dos prompts/parametros de traducao. Mudou o prompt ou a geracao?
+# Incrementar invalida a memoria de traducao antiga.
+TM_VERSION_OLLAMA = "ollama-v1"
+TM_VERSION_M2M100 = "m2m100-b5-v1"
+
+class TranslationMemory:
+    """Memoria de traducao persistente (SQLite em <cache>/translation.sqlite).
+
+    Chave: texto fonte normalizado (ja com termos protegidos) + src/tgt +
+    modelo + versao do prompt. Valor: saida bruta do modelo, antes de
+    restaurar termos e aplicar correcoes/glossario - assim mudancas nesses
+    dicionarios valem tambem para traducoes em cache.
+    """
+
+    def __init__(self, root):
+        import sqlite3
+        import threading
+        Path(root).mkdir(parents=True, exist_ok=True)
+        self.path = Path(root) / "translation.sqlite"
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tm ("
+            " key TEXT PRIMARY KEY, src TEXT, tgt TEXT, model TEXT,"
+            " source TEXT, output TEXT, created REAL)"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text):
+        return " ".join((text or "").split())
+
+    def make_key(self, text, src, tgt, model, version, **extra):
+        import hashlib
+        payload = json.dumps({"text": self.normalize(text), "src": src, "tgt": tgt,
+                              "model": model, "version": version, **extra},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT output FROM tm WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, text, src, tgt, model, output):
+        import time
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO tm (key, src, tgt, model, source, output, created)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, src, tgt, model, self.normalize(text), output, time.time()))
+                self._db.commit()
+        except Exception as e:
+            print(f"  [WARN] Memoria de traducao: falha ao gravar: {e}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def report(self):
+        total = self.hits + self.misses
+        if total:
+            print(f"[CACHE] Memoria de traducao: {self.hits}/{total} reaproveitados")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+# ============================================================================
+# POOL DE MODELOS (RESIDENTES NO SERVIDOR DE MODELOS)
+# ============================================================================
+
+def _mem_usage_mb():
+    """(RSS do processo, VRAM alocada pelo torch) em MB"""
+    ram = 0.0
+    try:
+        with open("/proc/self/statm") as f:
+            ram = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576
+    except (OSError, ValueError):
+        pass
+    vram = 0.0
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        try:
+            if torch.cuda.is_available():
+                vram = torch.cuda.memory_allocated() / 1048576
+        except Exception:
+            pass
+    return ram, vram
+
+class ModelPool:
+    """Modelos carregados, indexados por chave (tipo, nome, device...).
+
+    Num processo de job o pool so evita carregar o mesmo modelo duas vezes e
+    release() libera ao fim da etapa, como antes. No servidor de modelos
+    (servidor_modelos.py) resident=True: release() nao faz nada e os modelos
+    saem por LRU quando a RAM/VRAM estimada (delta medido no carregamento)
+    passa de MODEL_POOL_MAX_RAM_MB / MODEL_POOL_MAX_VRAM_MB.
+    """
+
+    def __init__(self):
+        import threading
+        from collections import OrderedDict
+        self.resident = False
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+        try:
+            total_ram = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1048576
+        except (OSError, ValueError):
+            total_ram = 16384
+        self.max_ram_mb = float(os.environ.get("MODEL_POOL_MAX_RAM_MB", total_ram * 0.6))
+        self.max_vram_mb = float(os.environ.get("MODEL_POOL_MAX_VRAM_MB", 0)) or None
+
+    def get(self, key, loader):
+        """Devolve o modelo da chave, carregando com loader() se preciso"""
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            ram0, vram0 = _mem_usage_mb()
+            model = loader()
+            ram1, vram1 = _mem_usage_mb()
+            self._models[key] = (model, max(0.0, ram1 - ram0), max(0.0, vram1 - vram0))
+            if self.resident:
+                self._evict(keep=key)
+            return model
+
+    def _vram_limit(self):
+        if self.max_vram_mb is None:
+            torch = sys.modules.get("torch")
+            try:
+                total = torch.cuda.get_device_properties(0).total_memory / 1048576
+                self.max_vram_mb = total * 0.9
+            except Exception:
+                self.max_vram_mb = float("inf")
+        return self.max_vram_mb
+
+    def _evict(self, keep=None):
+        ram = sum(m[1] for m in self._models.values())
+        vram = sum(m[2] for m in self._models.values())
+        for key in list(self._models):
+            if ram <= self.max_ram_mb and vram <= self._vram_limit():
+                break
+            if key == keep:
+                continue
+            _, r, v = self._models.pop(key)
+            ram -= r
+            vram -= v
+            print(f"[POOL] Removido (LRU): {key}")
+        self._free()
+
+    def release(self, kind=None, force=False):
+        """Descarrega modelos do tipo kind (todos se None). No-op se residente."""
+        if self.resident and not force:
+            return
+        with self._lock:
+            for key in [k for k in self._models if kind is None or k[0] == kind]:
+                del self._models[key]
+        self._free()
+
+    @staticmethod
+    def _free():
+        import gc
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            try:
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return [{"key": list(k), "ram_mb": round(r), "vram_mb": round(v)}
+                    for k, (_, r, v) in self._models.items()]
+
+MODEL_POOL = ModelPool()
+
+# Etapas que podem rodar no servidor de modelos (servidor_modelos.py)
+REMOTE_STAGES = {
+    "transcribe_faster_whisper", "transcribe_openai_whisper", "transcribe_parakeet",
+    "translate_segments_m2m100", "translate_segments_ollama", "tts_xtts_clone",
+}
+MODEL_SERVER_URL = os.environ.get("DUBLAR_MODEL_SERVER") or None
+
+def _rpc_encode(obj, caches):
+    """Serializa argumentos/resultados de etapa em JSON (Path -> absoluto)"""
+    if isinstance(obj, Path):
+        return {"__path__": str(obj.resolve())}
+    if isinstance(obj, TranslationMemory):
+        caches.append(obj)
+        return {"__tm__": str(obj.path.parent)}
+    if isinstance(obj, TTSCache):
+        caches.append(obj)
+        return {"__tts_cache__": str(obj.root.parent), "max_mb": obj.max_bytes / 1048576}
+    if isinstance(obj, (list, tuple)):
+        return [_rpc_encode(v, caches) for v in obj]
+    if isinstance(obj, dict):
+        return {k: _rpc_encode(v, caches) for k, v in obj.items()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+def _rpc_decode(obj, caches):
+    if isinstance(obj, list):
+        return [_rpc_decode(v, caches) for v in obj]
+    if isinstance(obj, dict):
+        if "__path__" in obj:
+            return Path(obj["__path__"])
+        if "__tm__" in obj:
+            caches.append(TranslationMemory(obj["__tm__"]))
+            return caches[-1]
+        if "__tts_cache__" in obj:
+            caches.append(TTSCache(obj["__tts_cache__"], obj.get("max_mb")))
+            return caches[-1]
+        return {k: _rpc_decode(v, caches) for k, v in obj.items()}
+    return obj
+
+def run_stage(func, *args, **kwargs):
+    """Executa uma etapa no servidor de modelos (modelos ja carregados).
+
+    Sem servidor configurado (--model-server / DUBLAR_MODEL_SERVER), ou se ele
+    nao responder, roda localmente como antes. O log da etapa volta junto com
+    o resultado; hits/misses dos caches sao somados aos objetos locais.
+    """
+    if not MODEL_SERVER_URL or func.__name__ not in REMOTE_STAGES:
+        return func(*args, **kwargs)
+
+    import httpx
+    caches = []
+    payload = {"func": func.__name__, "seed": GLOBAL_SEED,
+               "args": _rpc_encode(list(args), caches),
+               "kwargs": _rpc_encode(kwargs, caches)}
+    try:
+        r = httpx.post(MODEL_SERVER_URL.rstrip("/") + "/run", json=payload, timeout=None)
+    except httpx.TransportError as e:
+        print(f"[WARN] Servidor de modelos indisponivel ({e}); executando localmente")
+        return func(*args, **kwargs)
+
+    data = r.json()
+    print(data.get("log", ""), end="")
+    if r.status_code != 200:
+        raise RuntimeError(f"{func.__name__} falhou no servidor de modelos: {data.get('error')}")
+    for local, st in zip(caches, data.get("cache_stats", [])):
+        local.hits += st["hits"]
+        local.misses += st["misses"]
+    return _rpc_decode(data["result"], [])
+
 # ============================================================================
 # CHECKPOINT SYSTEM
 # ============================================================================
@@ -441,6 +901,33 @@ def load_checkpoint(workdir):
             return json.load(f)
     return None
 
+# Fases do pipeline: "synth" (etapas 1-6, GPU) e "assemble" (7-10, CPU/ffmpeg).
+# O job manager roda cada fase como um processo e encaixa fases de jobs diferentes.
+PIPELINE_PHASES = ("all", "synth", "assemble")
+
+
+def _json_default(o):
+    if hasattr(o, "item"):  # escalares numpy
+        return o.item()
+    return str(o)
+
+
+def save_phase_state(workdir, state):
+    """Salva o estado entre as fases synth e assemble"""
+    with open(Path(workdir, "phase_state.json"), "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False, default=_json_default)
+    print(f"[CHECKPOINT] Estado da fase synth salvo em {workdir}/phase_state.json")
+
+
+def load_phase_state(workdir):
+    """Carrega o estado da fase synth (obrigatorio para --phase assemble)"""
+    state_file = Path(workdir, "phase_state.json")
+    if not state_file.exists():
+        print(f"[ERRO] {state_file} nao encontrado - rode --phase synth antes")
+        sys.exit(1)
+    with open(state_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
 # ============================================================================
 # FASE 3: DIARIZACAO (DETECTAR FALANTES)
 # ============================================================================
@@ -471,20 +958,24 @@ def diarize_audio(wav_path, workdir, num_speakers=None):
 
         # Carregar pipeline (requer token HuggingFace para alguns modelos)
         hf_token = os.environ.get("HF_TOKEN", None)
+        device = get_device()
 
-        if hf_token:
-            pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1",
-                use_auth_token=hf_token
-            )
-        else:
-            # Tentar modelo sem autenticacao
-            print("[WARN] HF_TOKEN nao definido. Usando modelo basico.")
-            pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization")
+        def load_pipeline():
+            if hf_token:
+                pipeline = Pipeline.from_pretrained(
+                    "pyannote/speaker-diarization-3.1",
+                    use_auth_token=hf_token
+                )
+            else:
+                # Tentar modelo sem autenticacao
+                print("[WARN] HF_TOKEN nao definido. Usando modelo basico.")
+                pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization")
 
-        device = get_device()
-        if device == "cuda":
-            pipeline = pipeline.to(torch.device("cuda"))
+            if device == "cuda":
+                pipeline = pipeline.to(torch.device("cuda"))
+            return pipeline
+
+        pipeline = MODEL_POOL.get(("pyannote", bool(hf_token), device), load_pipeline)
 
         # Executar diarizacao
         if num_speakers:
@@ -510,6 +1001,8 @@ def diarize_audio(wav_path, workdir, num_speakers=None):
         speakers = set(s["speaker"] for s in segments)
         print(f"[OK] Detectados {len(speakers)} falantes: {speakers}")
 
+        del pipeline
+        MODEL_POOL.release("pyannote")
         return segments
 
     except Exception as e:
@@ -532,7 +1025,14 @@ def merge_incomplete_segments(segments, max_duration=15.0):
     """
     if not segments:
         return segments
+    return list(iter_merge_incomplete_segments(segments, max_duration))
 
+def iter_merge_incomplete_segments(segments, max_duration=15.0):
+    """Versao geradora de merge_incomplete_segments (aceita qualquer iteravel).
+
+    Look-ahead de um segmento: cada frase sai assim que fecha, sem esperar o
+    resto da transcricao (usado no modo --stream).
+    """
     def needs_merge(text):
         """Verifica se o segmento precisa ser unido ao proximo"""
         text = text.strip()
@@ -558,7 +1058,6 @@ def merge_incomplete_segments(segments, max_duration=15.0):
             return True
         return False
 
-    merged = []
     buffer = None
 
     for seg in segments:
@@ -573,28 +1072,26 @@ def merge_incomplete_segments(segments, max_duration=15.0):
 
                 # Verifica se agora esta completo
                 if not needs_merge(buffer['text']):
-                    merged.append(buffer)
+                    yield buffer
                     buffer = None
                 # Senao, continua acumulando
             else:
                 # Muito longo, salva buffer e comeca novo
-                merged.append(buffer)
+                yield buffer
                 if needs_merge(seg['text']):
                     buffer = dict(seg)
                 else:
-                    merged.append(seg)
+                    yield seg
                     buffer = None
         else:
             if needs_merge(seg['text']):
                 buffer = dict(seg)
             else:
-                merged.append(seg)
+                yield seg
 
     # Nao esquecer o ultimo buffer
     if buffer:
-        merged.append(buffer)
-
-    return merged
+        yield buffer
 
 def merge_transcription_with_diarization(transcription_segs, diarization_segs):
     """Combina transcricao com diarizacao para atribuir falante a cada segmento"""
@@ -629,17 +1126,8 @@ def merge_transcription_with_diarization(transcription_segs, diarization_segs):
 # ETAPA 3: TRANSCRICAO (WHISPER)
 # ============================================================================
 
-def transcribe_faster_whisper(wav_path, workdir, src_lang, model_size="medium", diarize=False, num_speakers=None):
-    """Transcricao com Faster-Whisper otimizado
-
-    Se src_lang=None, detecta automaticamente o idioma.
-    Retorna: (json_path, srt_path, segments, detected_language)
-    """
-    print("\n" + "="*60)
-    print("=== ETAPA 3: Transcricao (Faster-Whisper) ===")
-    print("="*60)
-
-    from faster_whisper import WhisperModel
+def _faster_whisper_device(model_size, src_lang):
+    """Escolhe device/compute_type do CTranslate2 e mostra a configuracao"""
     import torch
 
     # Detectar melhor device: CUDA se CTranslate2 suporta, senao CPU
@@ -666,24 +1154,27 @@ def transcribe_faster_whisper(wav_path, workdir, src_lang, model_size="medium",
         print(f"[INFO] Idioma origem: {src_lang}")
     else:
         print(f"[INFO] Idioma origem: AUTO-DETECTAR")
+    return device, compute_type
+
+def _load_faster_whisper(model_size, device, compute_type):
+    from faster_whisper import WhisperModel
+    return MODEL_POOL.get(("faster-whisper", model_size, device, compute_type),
+                          lambda: WhisperModel(model_size, device=device, compute_type=compute_type))
 
-    model = WhisperModel(model_size, device=device, compute_type=compute_type)
+def open_faster_whisper(wav_path, src_lang, model_size="medium"):
+    """Abre a transcricao Faster-Whisper sem consumi-la.
 
-    # VAD otimizado para evitar fragmentacao excessiva
+    Retorna: (iterador de segmentos {"start","end","text"}, info, detected_language)
+    O iterador decodifica o audio sob demanda; ao esgotar, libera o modelo.
+    """
+    device, compute_type = _faster_whisper_device(model_size, src_lang)
+    model = _load_faster_whisper(model_size, device, compute_type)
     segments_generator, info = model.transcribe(
         str(wav_path),
         language=src_lang,  # None = auto-detect
-        vad_filter=True,
-        vad_parameters=dict(
-            min_silence_duration_ms=600,
-            speech_pad_ms=500,
-            threshold=0.5,
-        ),
-        beam_size=5,
-        best_of=5,
-        temperature=0.0,
-        condition_on_previous_text=True,
+        **WHISPER_OPTIONS
     )
+    del model
 
     # Idioma detectado (ou o especificado)
     detected_lang = info.language if hasattr(info, 'language') else src_lang
@@ -692,22 +1183,74 @@ def transcribe_faster_whisper(wav_path, workdir, src_lang, model_size="medium",
     if not src_lang:
         print(f"[INFO] Idioma detectado: {detected_lang} (probabilidade: {lang_prob:.1%})" if lang_prob else f"[INFO] Idioma detectado: {detected_lang}")
 
-    # Consumir o generator e mostrar progresso
-    print("[INFO] Transcrevendo... (isso pode levar alguns minutos)")
-    segs = []
-    seg_count = 0
-    for s in segments_generator:
-        text = (s.text or "").strip()
-        if text:
-            segs.append({
-                "start": float(s.start),
-                "end": float(s.end),
-                "text": text
-            })
-            seg_count += 1
+    def iter_segments():
+        for s in segments_generator:
+            text = (s.text or "").strip()
+            if text:
+                yield {
+                    "start": float(s.start),
+                    "end": float(s.end),
+                    "text": text
+                }
+        MODEL_POOL.release("faster-whisper")
+
+    return iter_segments(), info, detected_lang
+
+
+def transcribe_faster_whisper(wav_path, workdir, src_lang, model_size="medium", diarize=False, num_speakers=None,
+                              chunked=False, chunk_s=300, asr_workers=0, cache_root=None, fingerprint=None):
+    """Transcricao com Faster-Whisper otimizado
+
+    Se src_lang=None, detecta automaticamente o idioma.
+    chunked: blocos de ~chunk_s cortados em pausas, transcritos em paralelo
+    (asr_workers processos na CPU, BatchedInferencePipeline na GPU; ver asr_comum)
+    cache_root + fingerprint (hash do audio de origem): cache de ASR
+    compartilhado com transcrever_v1/clipar_v1 (ver asr_comum.ASRCache)
+    Retorna: (json_path, srt_path, segments, detected_language)
+    """
+    from types import SimpleNamespace
+
+    print("\n" + "="*60)
+    print("=== ETAPA 3: Transcricao (Faster-Whisper) ===")
+    print("="*60)
+
+    asr_cache = ASRCache(cache_root) if cache_root and fingerprint else None
+    device = compute_type = None
+    if chunked:
+        device, compute_type = _faster_whisper_device(model_size, src_lang)
+    options = decode_options(WHISPER_OPTIONS, chunked, device)
+    hit = asr_cache.get(fingerprint, model_size, src_lang, options) if asr_cache else None
+
+    if hit:
+        segs = hit["segments"]
+        detected_lang = hit["language"]
+        info = SimpleNamespace(language_probability=hit.get("language_probability"), duration=None)
+    elif chunked:
+        from asr_comum import transcribe_chunked
+
+        model = _load_faster_whisper(model_size, device, compute_type) if device == "cuda" else None
+        segs, detected_lang, lang_prob = transcribe_chunked(
+            wav_path, model_size, src_lang, device, compute_type,
+            chunk_s=chunk_s, workers=asr_workers, model=model, **WHISPER_OPTIONS
+        )
+        del model
+        MODEL_POOL.release("faster-whisper")
+        info = SimpleNamespace(language_probability=lang_prob, duration=None)
+    else:
+        seg_iter, info, detected_lang = open_faster_whisper(wav_path, src_lang, model_size)
+
+        # Consumir o generator e mostrar progresso
+        print("[INFO] Transcrevendo... (isso pode levar alguns minutos)")
+        segs = []
+        for seg_count, seg in enumerate(seg_iter, 1):
+            segs.append(seg)
             if seg_count % 50 == 0:
                 print(f"  Processados: {seg_count} segmentos...")
 
+    if asr_cache and not hit:
+        asr_cache.put(fingerprint, model_size, src_lang, options, segs, detected_lang,
+                      getattr(info, "language_probability", None))
+
     # Merge de segmentos incompletos (frases cortadas no meio)
     segs_antes = len(segs)
     segs = merge_incomplete_segments(segs, max_duration=15.0)
@@ -721,7 +1264,14 @@ def transcribe_faster_whisper(wav_path, workdir, src_lang, model_size="medium",
         if diar_segs:
             segs = merge_transcription_with_diarization(segs, diar_segs)
 
-    # Salvar arquivos
+    json_path, srt_path = write_asr_files(workdir, segs, detected_lang, src_lang, info)
+
+    print(f"[OK] Transcrito: {len(segs)} segmentos")
+    return json_path, srt_path, segs, detected_lang
+
+
+def write_asr_files(workdir, segs, detected_lang, src_lang, info):
+    """Grava asr.srt e asr.json"""
     srt_path = Path(workdir, "asr.srt")
     json_path = Path(workdir, "asr.json")
 
@@ -736,13 +1286,12 @@ def transcribe_faster_whisper(wav_path, workdir, src_lang, model_size="medium",
             "language_specified": src_lang,
             "segments": segs,
             "info": {
-                "language_probability": lang_prob,
+                "language_probability": getattr(info, 'language_probability', None),
                 "duration": getattr(info, 'duration', None),
             }
         }, f, ensure_ascii=False, indent=2)
 
-    print(f"[OK] Transcrito: {len(segs)} segmentos")
-    return json_path, srt_path, segs, detected_lang
+    return json_path, srt_path
 
 
 # ============================================================================
@@ -1314,28 +1863,34 @@ def _clean_ollama_response(response, original_text):
     return text.strip()
 
 
+OLLAMA_LANG_NAMES = {
+    "pt": "Portuguese (Brazilian)",
+    "en": "English",
+    "es": "Spanish",
+    "fr": "French",
+    "de": "German",
+    "it": "Italian",
+    "ja": "Japanese",
+    "zh": "Chinese",
+}
+
+def _ollama_max_chars(text, target_duration=None, cps_original=None):
+    """Limite de caracteres pedido ao LLM (faz parte do prompt)"""
+    return int(target_duration * cps_original * 1.1) if target_duration and cps_original else len(text)
+
 def translate_ollama_with_context(text, src_lang, tgt_lang, model="llama3",
                                    previous_segments=None, target_duration=None,
-                                   cps_original=None, timeout=120):
+                                   cps_original=None, timeout=120, client=None):
     """Traduz texto usando Ollama COM CONTEXTO dos segmentos anteriores
 
     FASE 2: Contexto na traducao - passa segmentos anteriores para manter consistencia
+
+    client: httpx.Client opcional (conexoes reaproveitadas entre segmentos)
     """
     import httpx
 
-    lang_names = {
-        "pt": "Portuguese (Brazilian)",
-        "en": "English",
-        "es": "Spanish",
-        "fr": "French",
-        "de": "German",
-        "it": "Italian",
-        "ja": "Japanese",
-        "zh": "Chinese",
-    }
-
-    src_name = lang_names.get(src_lang, src_lang)
-    tgt_name = lang_names.get(tgt_lang, tgt_lang)
+    src_name = OLLAMA_LANG_NAMES.get(src_lang, src_lang)
+    tgt_name = OLLAMA_LANG_NAMES.get(tgt_lang, tgt_lang)
 
     # Construir contexto dos segmentos anteriores
     context_text = ""
@@ -1344,10 +1899,14 @@ def translate_ollama_with_context(text, src_lang, tgt_lang, model="llama3",
         for seg in previous_segments[-3:]:
             orig = seg.get("text_original", "")[:50]
             trad = seg.get("text_trad", "")[:50]
-            context_text += f"- \"{orig}\" -> \"{trad}\"\n"
+            if trad:
+                context_text += f"- \"{orig}\" -> \"{trad}\"\n"
+            else:
+                # Vizinho ainda em traducao (modo pipeline): so o texto fonte
+                context_text += f"- \"{orig}\"\n"
 
     # Calcular limite de caracteres
-    max_chars = int(target_duration * cps_original * 1.1) if target_duration and cps_original else len(text)
+    max_chars = _ollama_max_chars(text, target_duration, cps_original)
 
     # Prompt original que funcionava bem
     prompt = f"""Translate the following text from {src_name} to {tgt_name}.
@@ -1367,7 +1926,7 @@ Text ({len(text)} chars):
 Concise translation (max {max_chars} chars):"""
 
     try:
-        response = httpx.post(
+        response = (client or httpx).post(
             "http://localhost:11434/api/generate",
             json={
                 "model": model,
@@ -1396,43 +1955,416 @@ Concise translation (max {max_chars} chars):"""
         print(f"[WARN] Ollama erro: {e}")
         return None
 
-def _translate_single_m2m100(text, src, tgt, tok=None, model=None):
-    """Traduz um único texto com M2M100 (fallback leve)"""
+def _parse_ollama_batch(response, n):
+    """Extrai {id: texto} da resposta JSON de um lote. None se ilegivel."""
+    try:
+        data = json.loads(response)
+    except (TypeError, ValueError):
+        m = re.search(r"[\[{].*[\]}]", response or "", re.DOTALL)
+        if not m:
+            return None
+        try:
+            data = json.loads(m.group(0))
+        except ValueError:
+            return None
+
+    if isinstance(data, dict):
+        data = data.get("translations", data.get("segments"))
+    if not isinstance(data, list):
+        return None
+
+    por_id = {}
+    sem_id = []
+    for entry in data:
+        if isinstance(entry, dict):
+            texto = entry.get("text") or entry.get("translation")
+            try:
+                por_id[int(entry.get("id"))] = texto
+                continue
+            except (TypeError, ValueError):
+                pass
+        else:
+            texto = entry
+        sem_id.append(texto)
+
+    if not por_id and len(sem_id) == n:
+        # Sem ids: so aceita alinhamento por posicao se a contagem bate
+        por_id = {k + 1: t for k, t in enumerate(sem_id)}
+    return {k: t for k, t in por_id.items() if 1 <= k <= n and isinstance(t, str)}
+
+def translate_ollama_batch(texts, src_lang, tgt_lang, model="llama3", max_chars=None,
+                           previous_segments=None, timeout=180, client=None, attempts=2):
+    """Traduz K segmentos numerados em UMA requisicao Ollama (saida JSON).
+
+    Regras e contexto vao uma vez so por lote. A resposta e validada item a
+    item (id dentro do lote, texto limpo por _clean_ollama_response); se o
+    JSON nao puder ser lido, o lote e pedido de novo. Retorna lista alinhada
+    com texts - None nos itens invalidos/ausentes (o chamador traduz esses
+    individualmente).
+    """
+    import httpx
+
+    n = len(texts)
+    max_chars = max_chars or [len(t) for t in texts]
+    src_name = OLLAMA_LANG_NAMES.get(src_lang, src_lang)
+    tgt_name = OLLAMA_LANG_NAMES.get(tgt_lang, tgt_lang)
+
+    context_text = ""
+    if previous_segments:
+        context_text = "\n\nPrevious translations for context:\n"
+        for seg in previous_segments[-3:]:
+            orig = seg.get("text_original", "")[:50]
+            trad = seg.get("text_trad", "")[:50]
+            if trad:
+                context_text += f"- \"{orig}\" -> \"{trad}\"\n"
+            else:
+                context_text += f"- \"{orig}\"\n"
+
+    numbered = "\n".join(f"{k}. (max {mc} chars) {t}"
+                         for k, (t, mc) in enumerate(zip(texts, max_chars), 1))
+
+    prompt = f"""Translate each numbered segment below from {src_name} to {tgt_name}.
+
+CRITICAL RULES:
+- This is for VIDEO DUBBING - each translation MUST respect its "max chars" limit
+- Be CONCISE: remove filler words, keep only essential meaning
+- Keep technical terms in English: API, callback, hook, string, array, props, state, function, class
+- Keep product names: Claude Code, ChatGPT, GitHub, React, Python
+- Keep placeholders like __TERMO_001__ exactly as they are
+- Translate each segment separately: do NOT merge, split, reorder or skip segments
+- Do NOT add explanations, notes, or extra words
+{context_text}
+Segments ({n}):
+{numbered}
+
+Answer ONLY with JSON in this exact shape, with exactly {n} items:
+{{"translations": [{{"id": 1, "text": "..."}}, ...]}}"""
+
+    for attempt in range(attempts):
+        try:
+            response = (client or httpx).post(
+                "http://localhost:11434/api/generate",
+                json={
+                    "model": model,
+                    "prompt": prompt,
+                    "stream": False,
+                    "format": "json",
+                    "options": {
+                        "temperature": 0.3,
+                        "top_p": 0.9,
+                        "num_predict": sum(max_chars) + 40 * n,
+                    }
+                },
+                timeout=timeout
+            )
+        except Exception as e:
+            print(f"[WARN] Ollama erro (lote de {n}): {e}")
+            return [None] * n
+
+        if response.status_code != 200:
+            return [None] * n
+
+        por_id = _parse_ollama_batch(response.json().get("response", ""), n)
+        if por_id is None:
+            continue
+        if len(por_id) != n:
+            print(f"  [WARN] Lote Ollama: {len(por_id)}/{n} itens validos")
+        return [_clean_ollama_response(por_id.get(k + 1), texts[k]) for k in range(n)]
+
+    print(f"  [WARN] Lote Ollama: JSON invalido apos {attempts} tentativas")
+    return [None] * n
+
+# ============================================================================
+# BACKENDS M2M100 (torch / CTranslate2 int8 / ONNX Runtime quantizado)
+# ============================================================================
+
+M2M100_BACKENDS = ("torch", "ct2", "onnx")
+
+def _m2m100_converted_dir(model_name, backend, cache_root=None):
+    """Diretorio da conversao em cache (<cache>/models ou ~/.cache/dublar/models)"""
+    root = Path(cache_root) if cache_root else Path.home() / ".cache" / "dublar"
+    return root / "models" / f"{model_name.replace('/', '--')}-{backend}"
+
+def _convert_m2m100(model_name, backend, out_dir):
+    """Converte o modelo HF uma vez (escreve em um dir temporario e renomeia no final)"""
+    import tempfile
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=out_dir.parent, prefix=out_dir.name + ".", suffix=".tmp"))
+    # Conversores recusam output_dir existente: escreve em um filho ainda inexistente
+    destino = tmp / "model"
+    print(f"[INFO] Convertendo {model_name} para {backend} (apenas na primeira vez)...")
     try:
-        if tok is None or model is None:
-            from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-            tok = AutoTokenizer.from_pretrained("facebook/m2m100_418M")
-            model = AutoModelForSeq2SeqLM.from_pretrained("facebook/m2m100_418M", use_safetensors=True)
-            device = get_device()
-            model = model.to(device)
-
-        tok.src_lang = src
-        encoded = tok(text, return_tensors="pt", max_length=256, truncation=True).to(model.device)
-        generated = model.generate(
-            **encoded,
-            forced_bos_token_id=tok.get_lang_id(tgt),
-            max_length=256,
-            num_beams=3
+        if backend == "ct2":
+            import ctranslate2
+            ctranslate2.converters.TransformersConverter(model_name).convert(str(destino), quantization="int8")
+        else:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True).save_pretrained(str(destino))
+            for onnx_file in destino.glob("*.onnx"):
+                quantize_dynamic(str(onnx_file), str(onnx_file), weight_type=QuantType.QInt8)
+        try:
+            os.replace(destino, out_dir)
+        except OSError:
+            pass  # Outro job converteu ao mesmo tempo
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+class M2M100Translator:
+    """M2M100 atras de uma interface unica: translate_batch(textos, src, tgt).
+
+    backend "torch" usa AutoModelForSeq2SeqLM (GPU ou CPU fp32); "ct2" roda a
+    conversao CTranslate2 int8 e "onnx" o export ONNX com quantizacao dinamica
+    int8 (ambos so CPU). Conversoes ficam em disco e sao reaproveitadas.
+    """
+
+    def __init__(self, model_name, backend="torch", device=None, cache_root=None):
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.device = device or get_device()
+        self.tok = AutoTokenizer.from_pretrained(model_name)
+
+        if backend != "torch" and self.device == "cuda":
+            print(f"[INFO] Backend {backend} e para CPU; usando torch na GPU")
+            backend = "torch"
+
+        if backend != "torch":
+            try:
+                out_dir = _m2m100_converted_dir(model_name, backend, cache_root)
+                if not out_dir.exists():
+                    _convert_m2m100(model_name, backend, out_dir)
+                if backend == "ct2":
+                    import ctranslate2
+                    self.model = ctranslate2.Translator(str(out_dir), device="cpu",
+                                                        compute_type="int8",
+                                                        intra_threads=os.cpu_count() or 4)
+                else:
+                    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+                    self.model = ORTModelForSeq2SeqLM.from_pretrained(str(out_dir))
+            except Exception as e:
+                print(f"[WARN] Backend {backend} indisponivel ({e}); usando torch")
+                backend = "torch"
+
+        if backend == "torch":
+            from transformers import AutoModelForSeq2SeqLM
+            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name, use_safetensors=True).to(self.device)
+        self.backend = backend
+
+    def count_tokens(self, text, src):
+        self.tok.src_lang = src
+        return len(self.tok(text)["input_ids"])
+
+    def translate_batch(self, texts, src, tgt, num_beams=5, max_new_tokens=512, max_length=1024):
+        self.tok.src_lang = src
+        if self.backend == "ct2":
+            source = [self.tok.convert_ids_to_tokens(ids[:max_length])
+                      for ids in self.tok(texts)["input_ids"]]
+            results = self.model.translate_batch(
+                source,
+                target_prefix=[[self.tok.get_lang_token(tgt)]] * len(texts),
+                beam_size=num_beams,
+                max_decoding_length=max_new_tokens,
+                length_penalty=1.0,
+            )
+            return [self.tok.decode(self.tok.convert_tokens_to_ids(r.hypotheses[0][1:]),
+                                    skip_special_tokens=True) for r in results]
+
+        enc = self.tok(texts, return_tensors="pt", padding=True, truncation=True, max_length=max_length)
+        if self.backend == "torch":
+            enc = {k: v.to(self.device) for k, v in enc.items()}
+        gen = self.model.generate(
+            **enc,
+            forced_bos_token_id=self.tok.get_lang_id(tgt),
+            max_new_tokens=max_new_tokens,
+            num_beams=num_beams,
+            length_penalty=1.0,
+            early_stopping=True,
         )
-        return tok.decode(generated[0], skip_special_tokens=True)
+        return self.tok.batch_decode(gen, skip_special_tokens=True)
+
+def load_m2m100(model_name="facebook/m2m100_418M", backend="torch", cache_root=None):
+    """Carrega (uma vez, via MODEL_POOL) o tradutor M2M100 do backend pedido"""
+    def loader():
+        tr = M2M100Translator(model_name, backend, cache_root=cache_root)
+        print(f"[INFO] M2M100 {model_name} carregado (backend: {tr.backend})")
+        return tr
+    return MODEL_POOL.get(("m2m100", model_name, backend), loader)
+
+def release_m2m100():
+    """Libera os modelos M2M100 carregados (e a VRAM)"""
+    MODEL_POOL.release("m2m100")
+
+def _translate_single_m2m100(text, src, tgt, translator=None):
+    """Traduz um único texto com M2M100 (fallback leve)"""
+    try:
+        if translator is None:
+            translator = load_m2m100()
+        return translator.translate_batch([text], src, tgt, num_beams=3, max_new_tokens=256,
+                                          max_length=256)[0]
     except Exception as e:
+        print(f"  [WARN] M2M100 falhou: {e}")
         return None
 
 
-def translate_segments_ollama(segs, src, tgt, workdir, model="llama3", cps_original=None, no_truncate=False):
-    """Traducao com Ollama (LLM local) COM CONTEXTO"""
+def _translate_ollama_pipelined(segs, preparados, src, tgt, model, cps_original, workers, client,
+                                tm=None, lookbehind=5, batch_size=1):
+    """Mantem ate `workers` requisicoes Ollama em voo (slots paralelos do servidor).
+
+    O contexto de cada requisicao vem da janela anterior: traducoes ja
+    concluidas quando disponiveis, senao so o texto fonte vizinho. Com
+    batch_size > 1 cada requisicao leva um lote de segmentos consecutivos
+    (translate_ollama_batch); itens que voltam invalidos sao pedidos de novo
+    individualmente. Retorna dict idx -> saida bruta (None = falhou). Para de
+    enviar apos 5 falhas seguidas, como o modo sequencial.
+    """
+    pendentes = [i for i, p in enumerate(preparados) if p[3] is None]
+    unidades = [pendentes[k:k + batch_size] for k in range(0, len(pendentes), max(1, batch_size))]
+    brutos = {}
+
+    def contexto(i):
+        ctx = []
+        for j in range(max(0, i - lookbehind), i):
+            raw = brutos.get(j) or preparados[j][3]
+            ctx.append({
+                "text_original": segs[j].get("text", ""),
+                "text_trad": restaurar_termos_tecnicos(raw, preparados[j][1]) if raw else "",
+            })
+        return ctx
+
+    def traduzir_um(i, ctx):
+        return translate_ollama_with_context(
+            preparados[i][0], src, tgt, model,
+            previous_segments=ctx,
+            target_duration=segs[i]["end"] - segs[i]["start"],
+            cps_original=cps_original,
+            client=client
+        )
+
+    def traduzir(unidade):
+        ctx = contexto(unidade[0])
+        if len(unidade) == 1:
+            resultado = [traduzir_um(unidade[0], ctx)]
+        else:
+            resultado = translate_ollama_batch(
+                [preparados[i][0] for i in unidade], src, tgt, model,
+                max_chars=[_ollama_max_chars(preparados[i][0], segs[i]["end"] - segs[i]["start"],
+                                             cps_original) for i in unidade],
+                previous_segments=ctx, client=client
+            )
+            if all(r is None for r in resultado):
+                # Lote inteiro falhou (Ollama fora ou JSON ilegivel): so re-tentar o 1o
+                resultado[0] = traduzir_um(unidade[0], ctx)
+                if resultado[0] is None:
+                    return dict(zip(unidade, resultado))
+            resultado = [r if r is not None else traduzir_um(i, ctx)
+                         for i, r in zip(unidade, resultado)]
+        for i, translated in zip(unidade, resultado):
+            if translated and preparados[i][2]:
+                tm.put(preparados[i][2], preparados[i][0], src, tgt, f"ollama/{model}", translated)
+        return dict(zip(unidade, resultado))
+
+    feitos = 0
+    falhas_seguidas = 0
+    fila = iter(unidades)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        em_voo = {}
+        for u in fila:
+            em_voo[ex.submit(traduzir, u)] = u
+            if len(em_voo) >= workers:
+                break
+        while em_voo:
+            fut = next(as_completed(em_voo))
+            em_voo.pop(fut)
+            antes = feitos
+            for i, translated in fut.result().items():
+                brutos[i] = translated
+                falhas_seguidas = 0 if translated else falhas_seguidas + 1
+                feitos += 1
+            if feitos // 10 != antes // 10 or feitos == len(pendentes):
+                print(f"  Progresso Ollama: {feitos}/{len(pendentes)}")
+            if falhas_seguidas >= 5:
+                # Ollama indisponivel: nao enviar mais nada (restante vai para M2M100)
+                for f in em_voo:
+                    if not f.cancel():
+                        brutos.update(f.result())
+                break
+            nxt = next(fila, None)
+            if nxt is not None:
+                em_voo[ex.submit(traduzir, nxt)] = nxt
+
+    return brutos
+
+def write_translation_files(workdir, segs_trad, src, tgt, model):
+    """Grava asr_trad.srt e asr_trad.json. Retorna (srt, json)"""
+    srt_t = Path(workdir, "asr_trad.srt")
+    json_t = Path(workdir, "asr_trad.json")
+
+    with open(srt_t, "w", encoding="utf-8") as f:
+        for i, s in enumerate(segs_trad, 1):
+            f.write(f"{i}\n{ts_stamp(s['start'])} --> {ts_stamp(s['end'])}\n{s['text_trad']}\n\n")
+
+    with open(json_t, "w", encoding="utf-8") as f:
+        json.dump({
+            "language": tgt,
+            "source_language": src,
+            "model": model,
+            "segments": segs_trad
+        }, f, ensure_ascii=False, indent=2)
+
+    return srt_t, json_t
+
+def translate_segments_ollama(segs, src, tgt, workdir, model="llama3", cps_original=None, no_truncate=False,
+                              tm=None, workers=1, batch_size=1, m2m_backend="torch", cache_root=None,
+                              preflight=True, write_files=True):
+    """Traducao com Ollama (LLM local) COM CONTEXTO
+
+    tm: TranslationMemory opcional. Segmentos ja traduzidos (mesmo texto,
+    idiomas, modelo, versao do prompt e limite de caracteres) nao chamam o LLM.
+    workers: requisicoes simultaneas (1 = sequencial, contexto com as traducoes
+    finais anteriores; >1 = pipeline, ver _translate_ollama_pipelined). Para
+    ganhar com >1 o servidor precisa de OLLAMA_NUM_PARALLEL >= workers.
+    batch_size: segmentos por requisicao (>1 = lote JSON, translate_ollama_batch)
+    m2m_backend: backend do M2M100 usado no fallback (ver M2M100Translator)
+    preflight: verificar e pre-aquecer o Ollama (False = chamador ja fez)
+    write_files: gravar asr_trad.srt/json (False = chamador grava no fim)
+    """
     print("\n" + "="*60)
     print(f"=== ETAPA 4: Traducao (Ollama - {model}) ===")
     print("="*60)
 
-    if not check_ollama(model=model):
-        print("[WARN] Ollama nao esta rodando ou modelo indisponivel. Fallback para M2M100.")
-        return None
+    # Preparar texto fonte (e consultar memoria de traducao)
+    preparados = []
+    for s in segs:
+        texto_limpo = _remover_fillers(s.get("text", ""), src)
+        texto_protegido, mapa = proteger_termos_tecnicos(texto_limpo)
+        tm_key = None
+        cached = None
+        if tm is not None:
+            tm_key = tm.make_key(texto_protegido, src, tgt, f"ollama/{model}", TM_VERSION_OLLAMA,
+                                 max_chars=_ollama_max_chars(texto_protegido, s["end"] - s["start"],
+                                                             cps_original))
+            cached = tm.get(tm_key)
+        preparados.append((texto_protegido, mapa, tm_key, cached))
+
+    pendentes = sum(1 for p in preparados if p[3] is None)
+    if tm is not None:
+        print(f"[INFO] Memoria de traducao: {len(segs) - pendentes}/{len(segs)} em cache")
+
+    if pendentes and preflight:
+        if not check_ollama(model=model):
+            print("[WARN] Ollama nao esta rodando ou modelo indisponivel. Fallback para M2M100.")
+            return None
 
-    # Pre-aquecer modelo (carrega na GPU antes de iniciar traducao)
-    if not warmup_ollama(model):
-        print("[WARN] Falha no warmup do Ollama. Fallback para M2M100.")
-        return None
+        # Pre-aquecer modelo (carrega na GPU antes de iniciar traducao)
+        if not warmup_ollama(model):
+            print("[WARN] Falha no warmup do Ollama. Fallback para M2M100.")
+            return None
+
+    import httpx
+    workers = max(1, workers)
+    client = httpx.Client(limits=httpx.Limits(max_connections=workers,
+                                              max_keepalive_connections=workers))
 
     out = []
     previous_segments = []
@@ -1440,31 +2372,35 @@ def translate_segments_ollama(segs, src, tgt, workdir, model="llama3", cps_origi
     consecutive_failures = 0
 
     # Preparar M2M100 para fallback (carrega sob demanda)
-    m2m_tok = None
-    m2m_model = None
+    m2m = None
 
     print(f"[INFO] Traduzindo {len(segs)} segmentos com {model}...")
     print(f"[INFO] CPS original: {cps_original:.1f}" if cps_original else "[INFO] CPS: padrao")
 
+    pipelined = (workers > 1 or batch_size > 1) and pendentes > 0
+    if pipelined:
+        print(f"[INFO] Pipeline: {workers} requisicoes simultaneas, {batch_size} segmentos por requisicao")
+        brutos = _translate_ollama_pipelined(segs, preparados, src, tgt, model, cps_original,
+                                             workers, client, tm=tm, batch_size=batch_size)
+        preparados = [(tp, mapa, key, cached if cached is not None else brutos.get(i))
+                      for i, (tp, mapa, key, cached) in enumerate(preparados)]
+
     for i, s in enumerate(segs):
         texto_original = s.get("text", "")
         duracao_seg = s["end"] - s["start"]
-
-        # Limpar fillers do texto fonte antes de traduzir
-        texto_limpo = _remover_fillers(texto_original, src)
-
-        # Proteger termos tecnicos
-        texto_protegido, mapa = proteger_termos_tecnicos(texto_limpo)
+        texto_protegido, mapa, tm_key, translated = preparados[i]
 
         # Traduzir via Ollama COM CONTEXTO (skip se muitas falhas consecutivas)
-        translated = None
-        if consecutive_failures < 5:
+        if translated is None and consecutive_failures < 5 and not pipelined:
             translated = translate_ollama_with_context(
                 texto_protegido, src, tgt, model,
                 previous_segments=previous_segments,
                 target_duration=duracao_seg,
-                cps_original=cps_original
+                cps_original=cps_original,
+                client=client
             )
+            if translated and tm_key:
+                tm.put(tm_key, texto_protegido, src, tgt, f"ollama/{model}", translated)
 
         if translated:
             consecutive_failures = 0
@@ -1481,19 +2417,16 @@ def translate_segments_ollama(segs, src, tgt, workdir, model="llama3", cps_origi
             consecutive_failures += 1
             if consecutive_failures == 5:
                 print(f"  [WARN] 5 falhas consecutivas no Ollama - usando M2M100 para restante")
-            if m2m_tok is None:
+            if m2m is None:
                 print(f"  [WARN] Seg {i+1}: Ollama falhou, carregando M2M100 para fallback...")
                 try:
-                    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-                    m2m_tok = AutoTokenizer.from_pretrained("facebook/m2m100_418M")
-                    m2m_model = AutoModelForSeq2SeqLM.from_pretrained("facebook/m2m100_418M", use_safetensors=True)
-                    device = get_device()
-                    m2m_model = m2m_model.to(device)
+                    m2m = load_m2m100(backend=m2m_backend, cache_root=cache_root)
                 except Exception as e:
+                    m2m = False
                     print(f"  [ERRO] Falha ao carregar M2M100: {e}")
 
-            if m2m_tok and m2m_model:
-                txt_final = _translate_single_m2m100(texto_protegido, src, tgt, m2m_tok, m2m_model)
+            if m2m:
+                txt_final = _translate_single_m2m100(texto_protegido, src, tgt, m2m)
                 if txt_final:
                     txt_final = restaurar_termos_tecnicos(txt_final, mapa)
                     txt_final = aplicar_correcoes(txt_final)
@@ -1518,24 +2451,16 @@ def translate_segments_ollama(segs, src, tgt, workdir, model="llama3", cps_origi
         if (i + 1) % 10 == 0 or i == len(segs) - 1:
             print(f"  Progresso: {i + 1}/{len(segs)}")
 
-    # Salvar arquivos
-    srt_t = Path(workdir, "asr_trad.srt")
-    json_t = Path(workdir, "asr_trad.json")
+    srt_t, json_t = (write_translation_files(workdir, out, src, tgt, f"ollama/{model}")
+                     if write_files else (None, None))
 
-    with open(srt_t, "w", encoding="utf-8") as f:
-        for i, s in enumerate(out, 1):
-            f.write(f"{i}\n{ts_stamp(s['start'])} --> {ts_stamp(s['end'])}\n{s['text_trad']}\n\n")
-
-    with open(json_t, "w", encoding="utf-8") as f:
-        json.dump({
-            "language": tgt,
-            "source_language": src,
-            "model": f"ollama/{model}",
-            "segments": out
-        }, f, ensure_ascii=False, indent=2)
+    client.close()
+    release_m2m100()
 
     if fallback_count > 0:
         print(f"[INFO] Fallbacks M2M100 usados: {fallback_count}/{len(segs)} segmentos")
+    if tm is not None:
+        tm.report()
 
     print(f"[OK] Traduzido: {len(out)} segmentos")
     return out, json_t, srt_t
@@ -1544,13 +2469,23 @@ def translate_segments_ollama(segs, src, tgt, workdir, model="llama3", cps_origi
 # TRADUCAO VIA M2M100 (MELHORADO v4)
 # ============================================================================
 
-def translate_segments_m2m100(segs, src, tgt, workdir, use_large_model=False, cps_original=None, no_truncate=False):
-    """Traducao com M2M100 melhorado - max_length aumentado"""
+def translate_segments_m2m100(segs, src, tgt, workdir, use_large_model=False, cps_original=None, no_truncate=False,
+                              tm=None, max_batch_tokens=None, backend="torch", cache_root=None,
+                              write_files=True):
+    """Traducao com M2M100 melhorado - max_length aumentado
+
+    tm: TranslationMemory opcional; so os segmentos ausentes vao ao modelo.
+    max_batch_tokens: orcamento de tokens (com padding) por lote; os
+    segmentos sao ordenados por tamanho antes de agrupar (padrao: 4096 na
+    GPU, 1024 na CPU). max_new_tokens nunca fica abaixo do padrao antigo
+    (512) e cresce com a fonte mais longa do lote.
+    backend: "torch", "ct2" (CTranslate2 int8) ou "onnx" (ONNX Runtime int8)
+    write_files: gravar asr_trad.srt/json (False = chamador grava no fim)
+    """
     print("\n" + "="*60)
     print("=== ETAPA 4: Traducao (M2M100 Melhorado) ===")
     print("="*60)
 
-    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
     import torch
 
     device = get_device()
@@ -1571,8 +2506,10 @@ def translate_segments_m2m100(segs, src, tgt, workdir, use_large_model=False, cp
 
     print(f"[INFO] Device: {device.upper()}")
 
-    tok = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSeq2SeqLM.from_pretrained(model_name, use_safetensors=True).to(device)
+    translator = load_m2m100(model_name, backend, cache_root=cache_root)
+    tok = translator.tok
+    # int8 muda (pouco) a saida: memoria de traducao separada por backend
+    tm_model = model_name if translator.backend == "torch" else f"{model_name}/{translator.backend}"
 
     src = (src or "en").lower()
     tgt = (tgt or "pt").lower()
@@ -1583,53 +2520,38 @@ def translate_segments_m2m100(segs, src, tgt, workdir, use_large_model=False, cp
         if tgt not in tok.lang_code_to_id:
             tgt = "pt"
 
-    out = []
-    batch = []
-    idxs = []
-    mapas_termos = []
-    duracoes = []
-    max_batch = 16 if device == "cuda" else 8
-
-    def flush():
-        nonlocal out, batch, idxs, mapas_termos, duracoes
-        if not batch:
-            return
-
-        tok.src_lang = src
-        enc = tok(batch, return_tensors="pt", padding=True, truncation=True, max_length=1024)
-        enc = {k: v.to(device) for k, v in enc.items()}
+    resultados = {}
+    pendentes = []
+    if not max_batch_tokens:
+        max_batch_tokens = 4096 if device == "cuda" else 1024
 
-        gen = model.generate(
-            **enc,
-            forced_bos_token_id=tok.get_lang_id(tgt),
-            max_new_tokens=512,
-            num_beams=5,
-            length_penalty=1.0,
-            early_stopping=True,
-        )
+    def finish(i, txt, mapa, duracao):
+        item = dict(segs[i])
 
-        texts = tok.batch_decode(gen, skip_special_tokens=True)
+        txt_restaurado = restaurar_termos_tecnicos(txt, mapa)
+        txt_corrigido = aplicar_correcoes(txt_restaurado)
+        txt_final = aplicar_glossario(txt_corrigido, src, tgt)
 
-        for j, txt in enumerate(texts):
-            i = idxs[j]
-            item = dict(segs[i])
+        # CPS adaptativo
+        if cps_original:
+            txt_final = ajustar_texto_para_duracao(txt_final, duracao, cps_original, tgt, no_truncate)
 
-            txt_restaurado = restaurar_termos_tecnicos(txt, mapas_termos[j])
-            txt_corrigido = aplicar_correcoes(txt_restaurado)
-            txt_final = aplicar_glossario(txt_corrigido, src, tgt)
-
-            # CPS adaptativo
-            if cps_original:
-                txt_final = ajustar_texto_para_duracao(txt_final, duracoes[j], cps_original, tgt, no_truncate)
-
-            item["text_trad"] = txt_final
-            item["text_original"] = segs[i].get("text", "")
-            out.append(item)
-
-        batch.clear()
-        idxs.clear()
-        mapas_termos.clear()
-        duracoes.clear()
+        item["text_trad"] = txt_final
+        item["text_original"] = segs[i].get("text", "")
+        resultados[i] = item
+
+    def traduzir_lote(lote):
+        batch = [p[1] for p in lote]
+        # Limite de geracao: padrao antigo (512) ou 2x a maior fonte do lote,
+        # o que for maior - nunca corta uma traducao que o limite antigo aceitava
+        src_len = max(p[5] for p in lote)
+        texts = translator.translate_batch(batch, src, tgt, num_beams=5,
+                                           max_new_tokens=max(512, 2 * src_len + 16))
+
+        for (i, texto_protegido, mapa, duracao, tm_key, _), txt in zip(lote, texts):
+            if tm_key:
+                tm.put(tm_key, texto_protegido, src, tgt, tm_model, txt)
+            finish(i, txt, mapa, duracao)
 
     print(f"[INFO] Traduzindo {len(segs)} segmentos...")
 
@@ -1639,38 +2561,44 @@ def translate_segments_m2m100(segs, src, tgt, workdir, use_large_model=False, cp
         texto_limpo = _remover_fillers(texto_original, src)
         texto_protegido, mapa = proteger_termos_tecnicos(texto_limpo)
 
-        batch.append(texto_protegido)
-        idxs.append(i)
-        mapas_termos.append(mapa)
-        duracoes.append(s["end"] - s["start"])
+        tm_key = None
+        if tm is not None:
+            tm_key = tm.make_key(texto_protegido, src, tgt, tm_model, TM_VERSION_M2M100)
+            cached = tm.get(tm_key)
+            if cached is not None:
+                finish(i, cached, mapa, s["end"] - s["start"])
+                continue
 
-        if len(batch) >= max_batch:
-            flush()
-            print(f"  Progresso: {len(out)}/{len(segs)}")
+        n_tokens = min(1024, translator.count_tokens(texto_protegido, src))
+        pendentes.append((i, texto_protegido, mapa, s["end"] - s["start"], tm_key, n_tokens))
 
-    flush()
+    # Lotes por orcamento de tokens: ordenados por tamanho, o padding fica
+    # limitado ao proprio lote (linhas * maior linha <= max_batch_tokens)
+    pendentes.sort(key=lambda p: p[5])
+    lotes = []
+    for p in pendentes:
+        if lotes and (len(lotes[-1]) + 1) * p[5] <= max_batch_tokens:
+            lotes[-1].append(p)
+        else:
+            lotes.append([p])
+    if pendentes:
+        print(f"[INFO] {len(pendentes)} segmentos em {len(lotes)} lotes (ate {max_batch_tokens} tokens/lote)")
 
-    # Salvar arquivos
-    srt_t = Path(workdir, "asr_trad.srt")
-    json_t = Path(workdir, "asr_trad.json")
+    for lote in lotes:
+        traduzir_lote(lote)
+        print(f"  Progresso: {len(resultados)}/{len(segs)}")
 
-    with open(srt_t, "w", encoding="utf-8") as f:
-        for i, s in enumerate(out, 1):
-            f.write(f"{i}\n{ts_stamp(s['start'])} --> {ts_stamp(s['end'])}\n{s['text_trad']}\n\n")
+    # Lotes fora de ordem (e hits da memoria): restaurar a ordem dos segmentos
+    out = [resultados[i] for i in range(len(segs))]
+    if tm is not None:
+        tm.report()
 
-    with open(json_t, "w", encoding="utf-8") as f:
-        json.dump({
-            "language": tgt,
-            "source_language": src,
-            "model": model_name,
-            "segments": out
-        }, f, ensure_ascii=False, indent=2)
+    srt_t, json_t = (write_translation_files(workdir, out, src, tgt, model_name)
+                     if write_files else (None, None))
 
     print(f"[OK] Traduzido: {len(out)} segmentos")
 
-    del model
-    if device == "cuda":
-        torch.cuda.empty_cache()
+    release_m2m100()
 
     return out, json_t, srt_t
 
@@ -1794,10 +2722,37 @@ def extract_voice_sample(wav_path, workdir, duration=10):
     print(f"[OK] Amostra extraida: {sample_path}")
     return sample_path
 
-def tts_xtts_clone(segments, workdir, tgt_lang, voice_sample):
+def file_fingerprint(path, length=16):
+    """Hash (sha1) do conteudo de um arquivo - identifica amostras de voz"""
+    import hashlib
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:length]
+
+def xtts_cache_key(cache, lang, text, latent_id, use_latents, sr):
+    """Chave do TTSCache para um segmento XTTS.
+
+    Inclui a seed (amostragem estocastica) e o modo de sintese: tts.tts e
+    model.inference com latents nao geram o mesmo audio.
+    """
+    return cache.make_key(engine="xtts", lang=lang, text=text, latent_id=latent_id,
+                          seed=GLOBAL_SEED, use_latents=use_latents, sr=sr)
+
+
+def tts_xtts_clone(segments, workdir, tgt_lang, voice_sample, cache=None):
     """TTS com XTTS - Clona voz do audio original
 
     FASE 3: Clonagem de voz usando XTTS v2
+
+    Os latents de condicionamento (gpt_cond_latent + speaker_embedding) sao
+    calculados uma unica vez para a amostra de voz e reutilizados em todos os
+    segmentos. O audio volta em memoria (duracao exata pelo numero de amostras).
+
+    Args:
+        voice_sample: amostra de voz de referencia
+        cache: TTSCache opcional (chave inclui seed, modo e id dos latents da amostra)
     """
     print("\n" + "="*60)
     print("=== ETAPA 6: TTS (XTTS - Clonagem de Voz) ===")
@@ -1817,7 +2772,9 @@ def tts_xtts_clone(segments, workdir, tgt_lang, voice_sample):
 
         # Carregar modelo XTTS
         print("[INFO] Carregando modelo XTTS v2...")
-        tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(device)
+        tts = MODEL_POOL.get(("xtts", "xtts_v2", device),
+                             lambda: TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(device))
+        model = tts.synthesizer.tts_model
 
         # Mapear idioma
         lang_map = {
@@ -1828,54 +2785,100 @@ def tts_xtts_clone(segments, workdir, tgt_lang, voice_sample):
         }
         lang = lang_map.get(tgt_lang.lower(), "en")
 
-        SAMPLE_RATE = 22050
-        seg_files = []
-        metricas = []
+        try:
+            SAMPLE_RATE = int(model.config.audio.output_sample_rate)
+        except Exception:
+            SAMPLE_RATE = 24000
+
+        use_latents = hasattr(model, "get_conditioning_latents") and hasattr(model, "inference")
 
         print(f"[INFO] Voz de referencia: {voice_sample}")
         print(f"[INFO] Idioma: {lang}")
+        print(f"[INFO] Modo: {'latents em cache' if use_latents else 'tts_to_file'}")
+
+        # Latents da amostra (calculados uma vez, reutilizados)
+        latent_id = file_fingerprint(voice_sample)
+        latents = []
+
+        def get_latents():
+            if not latents:
+                with torch.inference_mode():
+                    latents.extend(model.get_conditioning_latents(audio_path=[str(voice_sample)]))
+                print(f"[INFO] Latents calculados ({Path(voice_sample).name}, id={latent_id})")
+            return latents
+
+        def synthesize(txt):
+            """Retorna audio float32 em memoria"""
+            if not use_latents:
+                wav = tts.tts(text=txt, speaker_wav=str(voice_sample), language=lang)
+                return np.asarray(wav, dtype=np.float32)
+            gpt_cond_latent, speaker_embedding = get_latents()
+            with torch.inference_mode():
+                out = model.inference(txt, lang, gpt_cond_latent, speaker_embedding,
+                                      enable_text_splitting=True)
+            wav = out["wav"]
+            if hasattr(wav, "cpu"):
+                wav = wav.cpu().numpy()
+            return np.asarray(wav, dtype=np.float32).reshape(-1)
+
+        textos = []
+        for s in segments:
+            txt = (s.get("text_trad") or "").strip()
+            if len(re.findall(r"[A-Za-z0-9]", txt)) < 3:
+                txt = "pausa"
+            textos.append(txt)
 
+        resultados = {}
+        for k, s in enumerate(segments):
+            i = k + 1
+            txt = textos[k]
+            target_dur = s["end"] - s["start"]
+            out_path = Path(workdir, f"seg_{i:04d}.wav")
+
+            try:
+                cache_key = None
+                if cache is not None:
+                    cache_key = xtts_cache_key(cache, lang, txt, latent_id, use_latents, SAMPLE_RATE)
+                if cache_key and cache.fetch(cache_key, out_path):
+                    actual_dur = wav_duration(out_path)
+                else:
+                    set_global_seed(GLOBAL_SEED + i)  # amostragem estocastica: seed por segmento
+                    audio = synthesize(txt)
+                    audio_int16 = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+                    wavfile.write(str(out_path), SAMPLE_RATE, audio_int16)
+                    actual_dur = len(audio_int16) / SAMPLE_RATE
+                    if cache_key:
+                        cache.store(cache_key, out_path)
+                ratio = actual_dur / target_dur if target_dur > 0 else 1.0
+            except Exception as e:
+                print(f"  [ERRO] Seg {i}: {e}")
+                silence = np.zeros(int(target_dur * SAMPLE_RATE), dtype=np.int16)
+                wavfile.write(str(out_path), SAMPLE_RATE, silence)
+                actual_dur = target_dur
+                ratio = 1.0
+
+            resultados[k] = (out_path, actual_dur, ratio)
+
+            if i % 10 == 0 or i == len(segments):
+                print(f"  Progresso: {i}/{len(segments)}")
+
+        seg_files = []
+        metricas = []
         tsv = Path(workdir, "segments.csv")
         with open(tsv, "w", encoding="utf-8", newline="") as fcsv:
             writer = csv.writer(fcsv)
             writer.writerow(["idx", "t_in", "t_out", "target_dur", "actual_dur", "ratio", "texto_trad", "file"])
-
-            for i, s in enumerate(segments, 1):
-                txt = (s.get("text_trad") or "").strip()
+            for k, s in enumerate(segments):
+                i = k + 1
+                out_path, actual_dur, ratio = resultados[k]
                 target_dur = s["end"] - s["start"]
-
-                if len(re.findall(r"[A-Za-z0-9]", txt)) < 3:
-                    txt = "pausa"
-
-                out_path = Path(workdir, f"seg_{i:04d}.wav")
-
-                try:
-                    # Gerar com voz clonada
-                    tts.tts_to_file(
-                        text=txt,
-                        file_path=str(out_path),
-                        speaker_wav=str(voice_sample),
-                        language=lang
-                    )
-
-                    actual_dur = ffprobe_duration(out_path)
-                    ratio = actual_dur / target_dur if target_dur > 0 else 1.0
-
-                except Exception as e:
-                    print(f"  [ERRO] Seg {i}: {e}")
-                    silence = np.zeros(int(target_dur * SAMPLE_RATE), dtype=np.int16)
-                    wavfile.write(str(out_path), SAMPLE_RATE, silence)
-                    actual_dur = target_dur
-                    ratio = 1.0
-
                 seg_files.append(out_path)
                 metricas.append({"idx": i, "target": target_dur, "actual": actual_dur, "ratio": ratio})
-
                 writer.writerow([i, s["start"], s["end"], f"{target_dur:.3f}",
-                               f"{actual_dur:.3f}", f"{ratio:.3f}", txt[:50], out_path.name])
+                               f"{actual_dur:.3f}", f"{ratio:.3f}", textos[k][:50], out_path.name])
 
-                if i % 5 == 0 or i == len(segments):
-                    print(f"  Progresso: {i}/{len(segments)}")
+        if cache is not None:
+            cache.report("XTTS")
 
         if metricas:
             ratios = [m["ratio"] for m in metricas]
@@ -1889,15 +2892,21 @@ def tts_xtts_clone(segments, workdir, tgt_lang, voice_sample):
         print(f"[ERRO] XTTS falhou: {e}")
         return None, None, None
 
+    finally:
+        MODEL_POOL.release("xtts")
+
 # ============================================================================
 # ETAPA 6: TTS (EDGE - PADRAO v4)
 # ============================================================================
 
-def tts_edge(segments, workdir, tgt_lang, voice=None, rate="+0%", speaker_voices=None):
+def tts_edge(segments, workdir, tgt_lang, voice=None, rate="+0%", speaker_voices=None, concurrency=4,
+             cache=None):
     """TTS com Edge TTS (Microsoft) - PADRAO v4 - Vozes consistentes
 
     Args:
         speaker_voices: dict mapeando speaker_id para voz (para diarizacao)
+        concurrency: requisicoes simultaneas ao servico (1 = serial)
+        cache: TTSCache opcional (segmentos ja sintetizados nao vao a rede)
     """
     print("\n" + "="*60)
     print("=== ETAPA 6: TTS (Edge TTS - Microsoft) ===")
@@ -1956,6 +2965,7 @@ def tts_edge(segments, workdir, tgt_lang, voice=None, rate="+0%", speaker_voices
     print(f"[INFO] Voz padrao: {default_voice}")
     print(f"[INFO] Idioma: {lang}")
     print(f"[INFO] Rate: {rate}")
+    print(f"[INFO] Concorrencia: {concurrency}")
 
     SAMPLE_RATE = 24000
 
@@ -1963,49 +2973,78 @@ def tts_edge(segments, workdir, tgt_lang, voice=None, rate="+0%", speaker_voices
     metricas = []
     tsv = Path(workdir, "segments.csv")
 
+    def write_pcm(mp3_bytes, output_path):
+        """Decodifica o MP3 recebido e grava o WAV final (um unico arquivo)"""
+        audio = decode_audio_bytes(mp3_bytes, SAMPLE_RATE)
+        audio_int16 = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        wavfile.write(str(output_path), SAMPLE_RATE, audio_int16)
+        return len(audio_int16) / SAMPLE_RATE
+
     async def generate_audio(text, output_path, target_dur, voice_to_use):
-        """Gera audio usando Edge TTS"""
+        """Gera audio usando Edge TTS (stream em memoria, sem MP3 em disco)"""
         communicate = edge_tts.Communicate(text, voice_to_use, rate=rate)
-        mp3_path = str(output_path).replace(".wav", ".mp3")
-        await communicate.save(mp3_path)
-
-        subprocess.run([
-            "ffmpeg", "-y", "-i", mp3_path,
-            "-ar", str(SAMPLE_RATE), "-ac", "1", "-c:a", "pcm_s16le",
-            str(output_path)
-        ], capture_output=True)
-
-        if os.path.exists(mp3_path):
-            os.remove(mp3_path)
-
-        actual_dur = ffprobe_duration(output_path)
-        return actual_dur
+        chunks = []
+        async for chunk in communicate.stream():
+            if chunk.get("type") == "audio":
+                chunks.append(chunk["data"])
+        if not chunks:
+            raise RuntimeError("Edge TTS nao retornou audio")
+
+        # Decodificacao fora do event loop para nao travar as outras requisicoes
+        return await asyncio.to_thread(write_pcm, b"".join(chunks), output_path)
+
+    def is_throttled(err):
+        """Detecta rate limit / bloqueio temporario do servico"""
+        status = getattr(err, "status", None) or getattr(err, "code", None)
+        if status in (429, 403, 503):
+            return True
+        msg = str(err).lower()
+        return any(k in msg for k in ("429", "too many", "rate limit", "throttl"))
 
     async def process_all_segments():
-        with open(tsv, "w", encoding="utf-8", newline="") as fcsv:
-            writer = csv.writer(fcsv)
-            writer.writerow(["idx", "t_in", "t_out", "target_dur", "actual_dur", "ratio", "speaker", "voice", "texto_trad", "file"])
+        sem = asyncio.Semaphore(max(1, concurrency))
+        # Backoff adaptativo compartilhado: cresce com throttling, decai com sucesso
+        pacing = {"delay": 0.0}
+        done = {"n": 0}
+        max_retries = 4
 
-            for i, s in enumerate(segments, 1):
-                txt = (s.get("text_trad") or "").strip()
-                target_dur = s["end"] - s["start"]
-                speaker = s.get("speaker", "SPEAKER_00")
-                voice_to_use = speaker_voices.get(speaker, default_voice)
+        async def synth_segment(i, s):
+            txt = (s.get("text_trad") or "").strip()
+            target_dur = s["end"] - s["start"]
+            speaker = s.get("speaker", "SPEAKER_00")
+            voice_to_use = speaker_voices.get(speaker, default_voice)
+
+            if len(re.findall(r"[A-Za-z0-9]", txt)) < 3:
+                txt = "pausa"
 
-                if len(re.findall(r"[A-Za-z0-9]", txt)) < 3:
-                    txt = "pausa"
+            out_path = Path(workdir, f"seg_{i:04d}.wav")
 
-                out_path = Path(workdir, f"seg_{i:04d}.wav")
+            cache_key = None
+            if cache is not None:
+                cache_key = cache.make_key(engine="edge", voice=voice_to_use, rate=rate,
+                                           lang=lang, text=txt, sr=SAMPLE_RATE)
+                if cache.fetch(cache_key, out_path):
+                    actual_dur = wav_duration(out_path)
+                    ratio = actual_dur / target_dur if target_dur > 0 else 1.0
+                    return finish(i, s, target_dur, actual_dur, ratio, speaker, voice_to_use, txt, out_path)
 
-                max_retries = 3
+            async with sem:
                 for attempt in range(max_retries):
+                    if pacing["delay"] > 0:
+                        await asyncio.sleep(pacing["delay"])
                     try:
                         actual_dur = await generate_audio(txt, out_path, target_dur, voice_to_use)
                         ratio = actual_dur / target_dur if target_dur > 0 else 1.0
+                        if cache_key:
+                            cache.store(cache_key, out_path)
+                        pacing["delay"] = pacing["delay"] * 0.5 if pacing["delay"] > 0.05 else 0.0
                         break
                     except Exception as e:
+                        if is_throttled(e):
+                            pacing["delay"] = min(max(pacing["delay"] * 2, 1.0), 30.0)
+                            print(f"  [WARN] Seg {i}: rate limit, backoff {pacing['delay']:.1f}s")
                         if attempt < max_retries - 1:
-                            await asyncio.sleep(2)  # Esperar 2s antes de retry
+                            await asyncio.sleep(2 * (attempt + 1))  # Esperar antes de retry
                         else:
                             print(f"  [ERRO] Seg {i}: {e}")
                             silence = np.zeros(int(target_dur * SAMPLE_RATE), dtype=np.int16)
@@ -2013,20 +3052,34 @@ def tts_edge(segments, workdir, tgt_lang, voice=None, rate="+0%", speaker_voices
                             actual_dur = target_dur
                             ratio = 1.0
 
-                # Pequeno delay entre requisições para evitar rate limit
-                await asyncio.sleep(0.1)
+            return finish(i, s, target_dur, actual_dur, ratio, speaker, voice_to_use, txt, out_path)
 
-                seg_files.append(out_path)
-                metricas.append({"idx": i, "target": target_dur, "actual": actual_dur, "ratio": ratio})
+        def finish(i, s, target_dur, actual_dur, ratio, speaker, voice_to_use, txt, out_path):
+            done["n"] += 1
+            if done["n"] % 10 == 0 or done["n"] == len(segments):
+                print(f"  Progresso: {done['n']}/{len(segments)}")
 
-                writer.writerow([i, s["start"], s["end"], f"{target_dur:.3f}",
-                               f"{actual_dur:.3f}", f"{ratio:.3f}", speaker, voice_to_use, txt[:50], out_path.name])
+            return {"idx": i, "target": target_dur, "actual": actual_dur, "ratio": ratio,
+                    "row": [i, s["start"], s["end"], f"{target_dur:.3f}",
+                            f"{actual_dur:.3f}", f"{ratio:.3f}", speaker, voice_to_use, txt[:50], out_path.name],
+                    "file": out_path}
+
+        results = await asyncio.gather(*(synth_segment(i, s) for i, s in enumerate(segments, 1)))
 
-                if i % 10 == 0 or i == len(segments):
-                    print(f"  Progresso: {i}/{len(segments)}")
+        # segments.csv sempre na ordem original, independente da ordem de conclusao
+        with open(tsv, "w", encoding="utf-8", newline="") as fcsv:
+            writer = csv.writer(fcsv)
+            writer.writerow(["idx", "t_in", "t_out", "target_dur", "actual_dur", "ratio", "speaker", "voice", "texto_trad", "file"])
+            for r in results:
+                seg_files.append(r["file"])
+                metricas.append({"idx": r["idx"], "target": r["target"], "actual": r["actual"], "ratio": r["ratio"]})
+                writer.writerow(r["row"])
 
     asyncio.run(process_all_segments())
 
+    if cache is not None:
+        cache.report("Edge")
+
     if metricas:
         ratios = [m["ratio"] for m in metricas]
         print(f"\n[STATS] TTS Edge:")
@@ -2041,8 +3094,12 @@ def tts_edge(segments, workdir, tgt_lang, voice=None, rate="+0%", speaker_voices
 # ============================================================================
 
 def tts_bark_optimized(segments, workdir, text_temp=0.7, wave_temp=0.5,
-                       history_prompt=None, max_retries=2):
-    """TTS com Bark otimizado - v4: seed fixa para consistencia"""
+                       history_prompt=None, max_retries=2, cache=None):
+    """TTS com Bark otimizado - v4: seed fixa para consistencia
+
+    cache: TTSCache opcional. Como as tentativas dependem da duracao alvo, ela
+    entra na chave (arredondada a 0.1s) junto com seed, voz e temperaturas.
+    """
     print("\n" + "="*60)
     print("=== ETAPA 6: TTS (Bark Otimizado) ===")
     print("="*60)
@@ -2100,10 +3157,30 @@ def tts_bark_optimized(segments, workdir, text_temp=0.7, wave_temp=0.5,
 
             out_path = Path(workdir, f"seg_{i:04d}.wav")
 
+            cache_key = None
+            if cache is not None:
+                cache_key = cache.make_key(engine="bark", voice=history_prompt, text=txt,
+                                           seed=GLOBAL_SEED, text_temp=text_temp,
+                                           wave_temp=wave_temp, max_retries=max_retries,
+                                           target=round(target_dur, 1), sr=SAMPLE_RATE)
+                if cache.fetch(cache_key, out_path):
+                    best_dur = wav_duration(out_path)
+                    best_ratio = best_dur / target_dur if target_dur > 0 else 1.0
+                    seg_files.append(out_path)
+                    metricas.append({
+                        "idx": i, "target": target_dur, "actual": best_dur,
+                        "ratio": best_ratio, "retries": 0
+                    })
+                    writer.writerow([i, s["start"], s["end"], f"{target_dur:.3f}",
+                                   f"{best_dur:.3f}", f"{best_ratio:.3f}", 0,
+                                   txt[:50], out_path.name])
+                    continue
+
             best_audio = None
             best_dur = float('inf')
             best_ratio = float('inf')
             retries_used = 0
+            failed = False
 
             for attempt in range(max_retries + 1):
                 current_text_temp = max(0.4, text_temp - attempt * 0.1)
@@ -2139,10 +3216,13 @@ def tts_bark_optimized(segments, workdir, text_temp=0.7, wave_temp=0.5,
                         best_audio = np.zeros(int(target_dur * SAMPLE_RATE), dtype=np.float32)
                         best_dur = target_dur
                         best_ratio = 1.0
+                        failed = True
 
             if best_audio is not None:
                 audio_int16 = normalize_audio_safe(best_audio)
                 write(out_path, SAMPLE_RATE, audio_int16)
+                if cache_key and not failed:
+                    cache.store(cache_key, out_path)
             else:
                 audio_int16 = np.zeros(int(target_dur * SAMPLE_RATE), dtype=np.int16)
                 write(out_path, SAMPLE_RATE, audio_int16)
@@ -2162,6 +3242,9 @@ def tts_bark_optimized(segments, workdir, text_temp=0.7, wave_temp=0.5,
 
     torch.load = _original_torch_load
 
+    if cache is not None:
+        cache.report("Bark")
+
     if metricas:
         ratios = [m["ratio"] for m in metricas]
         print(f"\n[STATS] TTS Bark:")
@@ -2174,13 +3257,72 @@ def tts_bark_optimized(segments, workdir, text_temp=0.7, wave_temp=0.5,
 # ETAPA 6: TTS (PIPER)
 # ============================================================================
 
-def tts_piper(segments, workdir, tgt_lang, model_path=None):
-    """TTS com Piper - Offline, leve e rapido"""
+def _piper_voice_sr(voice, default=22050):
+    """Sample rate de um PiperVoice (API antiga e nova)"""
+    cfg = getattr(voice, "config", None)
+    return int(getattr(cfg, "sample_rate", default) or default)
+
+def _piper_synth_array(voice, txt):
+    """Sintetiza texto com PiperVoice em memoria -> int16 mono"""
+    if hasattr(voice, "synthesize_stream_raw"):
+        # piper-tts <= 1.2: bytes PCM int16
+        raw = b"".join(voice.synthesize_stream_raw(txt))
+        return np.frombuffer(raw, dtype=np.int16)
+    # piper >= 1.3: AudioChunk com audio_int16_array
+    chunks = [c.audio_int16_array for c in voice.synthesize(txt)]
+    if not chunks:
+        return np.zeros(0, dtype=np.int16)
+    return np.concatenate(chunks).astype(np.int16, copy=False)
+
+class PiperProcess:
+    """Processo piper residente: uma linha de texto na entrada -> um WAV.
+
+    Usado quando o pacote Python `piper` nao esta instalado. O modelo ONNX e
+    carregado uma vez e cada linha gera um arquivo em output_dir, cujo caminho
+    o piper imprime no stdout.
+    """
+
+    def __init__(self, model_path, output_dir):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.proc = subprocess.Popen(
+            ["piper", "-m", str(model_path), "--output_dir", str(self.output_dir)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding="utf-8", bufsize=1
+        )
+
+    def synthesize(self, txt, out_path):
+        if self.proc.poll() is not None:
+            raise RuntimeError(f"piper encerrou (codigo {self.proc.returncode})")
+        line = " ".join(txt.split())
+        self.proc.stdin.write(line + "\n")
+        self.proc.stdin.flush()
+        produced = self.proc.stdout.readline().strip()
+        if not produced or not Path(produced).exists():
+            raise RuntimeError("piper nao gerou audio")
+        shutil.move(produced, str(out_path))
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=10)
+        except Exception:
+            self.proc.kill()
+
+def tts_piper(segments, workdir, tgt_lang, model_path=None, workers=0, cache=None):
+    """TTS com Piper - Offline, leve e rapido.
+
+    O modelo fica carregado durante toda a etapa: via API Python (PiperVoice)
+    quando disponivel, senao via processos `piper` residentes alimentados por
+    linha. workers sessoes rodam em paralelo (0 = metade dos nucleos).
+    cache: TTSCache opcional (chave inclui o hash do modelo .onnx).
+    """
     print("\n" + "="*60)
     print("=== ETAPA 6: TTS (Piper - Offline) ===")
     print("="*60)
 
     from scipy.io import wavfile
+    import queue
 
     if not model_path:
         default_paths = [
@@ -2200,44 +3342,109 @@ def tts_piper(segments, workdir, tgt_lang, model_path=None):
 
     print(f"[INFO] Modelo: {model_path}")
 
+    if workers <= 0:
+        workers = max(1, (os.cpu_count() or 2) // 2)
+    workers = max(1, min(workers, len(segments) or 1))
+
+    try:
+        from piper import PiperVoice
+        backend = "python"
+    except ImportError:
+        PiperVoice = None
+        backend = "cli"
+
+    # Pool de sessoes: cada thread pega uma sessao livre e devolve ao terminar
+    sessions = queue.Queue()
+    all_sessions = []
+    # Taxa do modelo vem do .onnx.json que acompanha a voz
     SAMPLE_RATE = 22050
-    seg_files = []
-    tsv = Path(workdir, "segments.csv")
+    cfg_path = Path(str(model_path) + ".json")
+    if cfg_path.exists():
+        try:
+            with open(cfg_path, encoding="utf-8") as f:
+                SAMPLE_RATE = int(json.load(f)["audio"]["sample_rate"])
+        except Exception:
+            pass
+    for w in range(workers):
+        if backend == "python":
+            sess = PiperVoice.load(str(model_path))
+            SAMPLE_RATE = _piper_voice_sr(sess, SAMPLE_RATE)
+        else:
+            sess = PiperProcess(model_path, Path(workdir, f"_piper_{w}"))
+        sessions.put(sess)
+        all_sessions.append(sess)
 
-    with open(tsv, "w", encoding="utf-8", newline="") as fcsv:
-        writer = csv.writer(fcsv)
-        writer.writerow(["idx", "t_in", "t_out", "texto_trad", "file"])
+    print(f"[INFO] Backend: {backend} | Sessoes: {workers}")
 
-        for i, s in enumerate(segments, 1):
-            txt = (s.get("text_trad") or "").strip()
+    model_id = file_fingerprint(model_path) if cache is not None else None
 
-            if len(re.findall(r"[A-Za-z0-9]", txt)) < 3:
-                txt = "pausa"
+    def synth_one(i, s):
+        txt = (s.get("text_trad") or "").strip()
 
-            out_path = Path(workdir, f"seg_{i:04d}.wav")
+        if len(re.findall(r"[A-Za-z0-9]", txt)) < 3:
+            txt = "pausa"
 
-            try:
-                proc = subprocess.run(
-                    ["piper", "-m", model_path, "-f", str(out_path)],
-                    input=txt.encode("utf-8"),
-                    capture_output=True
-                )
+        out_path = Path(workdir, f"seg_{i:04d}.wav")
 
-                if proc.returncode != 0:
-                    raise Exception(proc.stderr.decode())
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(engine="piper", voice=model_id, lang=tgt_lang,
+                                       text=txt, sr=SAMPLE_RATE)
+            if cache.fetch(cache_key, out_path):
+                return out_path, txt
 
-            except Exception as e:
-                print(f"  [ERRO] Seg {i}: {e}")
-                dur = s.get("end", 1) - s.get("start", 0)
-                silence = np.zeros(int(dur * SAMPLE_RATE), dtype=np.int16)
-                wavfile.write(str(out_path), SAMPLE_RATE, silence)
+        sess = sessions.get()
+        try:
+            if backend == "python":
+                audio = _piper_synth_array(sess, txt)
+                if audio.size == 0:
+                    raise RuntimeError("audio vazio")
+                wavfile.write(str(out_path), SAMPLE_RATE, audio)
+            else:
+                sess.synthesize(txt, out_path)
+            if cache_key:
+                cache.store(cache_key, out_path)
+        except Exception as e:
+            print(f"  [ERRO] Seg {i}: {e}")
+            dur = s.get("end", 1) - s.get("start", 0)
+            silence = np.zeros(int(dur * SAMPLE_RATE), dtype=np.int16)
+            wavfile.write(str(out_path), SAMPLE_RATE, silence)
+        finally:
+            sessions.put(sess)
+        return out_path, txt
+
+    results = [None] * len(segments)
+    done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = {ex.submit(synth_one, i, s): i
+                       for i, s in enumerate(segments, 1)}
+            for fut in as_completed(futures):
+                results[futures[fut] - 1] = fut.result()
+                done += 1
+                if done % 10 == 0 or done == len(segments):
+                    print(f"  Progresso: {done}/{len(segments)}")
+    finally:
+        if backend == "cli":
+            for sess in all_sessions:
+                sess.close()
+            for w in range(workers):
+                shutil.rmtree(Path(workdir, f"_piper_{w}"), ignore_errors=True)
+
+    if cache is not None:
+        cache.report("Piper")
 
+    seg_files = []
+    tsv = Path(workdir, "segments.csv")
+
+    with open(tsv, "w", encoding="utf-8", newline="") as fcsv:
+        writer = csv.writer(fcsv)
+        writer.writerow(["idx", "t_in", "t_out", "texto_trad", "file"])
+
+        for i, (s, (out_path, txt)) in enumerate(zip(segments, results), 1):
             seg_files.append(out_path)
             writer.writerow([i, s["start"], s["end"], txt[:50], out_path.name])
 
-            if i % 10 == 0 or i == len(segments):
-                print(f"  Progresso: {i}/{len(segments)}")
-
     print(f"[OK] TTS Piper: {len(seg_files)} segmentos")
     return seg_files, SAMPLE_RATE, []
 
@@ -2431,6 +3638,185 @@ def sync_smart_advanced(p, target, workdir, sr, tol, maxstretch, use_rubberband=
     else:
         return p
 
+def sync_one_segment(p, target, workdir, sr, mode, tol, maxstretch, use_rubberband=True, engine="numpy"):
+    """Sincroniza um segmento com o modo/engine escolhidos (unidade do pool)"""
+    if mode in ("none", "extend"):
+        return p
+    if engine == "numpy":
+        return sync_segment_inprocess(p, target, workdir, sr, mode, tol, maxstretch)
+    if mode == "fit":
+        return sync_fit_advanced(p, target, workdir, sr, tol, maxstretch, use_rubberband)
+    if mode == "pad":
+        return sync_pad(p, target, workdir, sr)
+    return sync_smart_advanced(p, target, workdir, sr, tol, maxstretch, use_rubberband)
+
+def _sync_one_safe(args):
+    """Executa sync_one_segment; em caso de erro mantem o segmento original"""
+    try:
+        return sync_one_segment(*args)
+    except Exception as e:
+        print(f"    [WARN] sync falhou para {Path(args[0]).name}: {e}")
+        return args[0]
+
+def _sync_one_captured(args):
+    """Executa _sync_one_safe num worker, capturando o log para o processo pai"""
+    import io
+    from contextlib import redirect_stdout
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        result = _sync_one_safe(args)
+    return result, buf.getvalue()
+
+def sync_all_segments(seg_files, targets, workdir, sr, mode, tol, maxstretch,
+                      use_rubberband=True, engine="numpy", workers=1):
+    """Sincroniza todos os segmentos, opcionalmente em paralelo (ProcessPoolExecutor)
+
+    A ordem de saida e sempre a ordem de seg_files. No modo paralelo o log de
+    cada segmento e capturado no worker e impresso pelo processo pai na ordem
+    original, igual ao modo serial.
+    """
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, max(1, len(seg_files)))
+
+    tasks = [(p, target, workdir, sr, mode, tol, maxstretch, use_rubberband, engine)
+             for p, target in zip(seg_files, targets)]
+
+    if workers <= 1:
+        return [_sync_one_safe(t) for t in tasks]
+
+    print(f"[INFO] Sync paralelo: {workers} processos")
+    fixed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result, log in pool.map(_sync_one_captured, tasks, chunksize=4):
+            if log:
+                print(log, end="")
+            fixed.append(result)
+    return fixed
+
+# ----------------------------------------------------------------------------
+# Sincronizacao em processo (NumPy) - sem ffprobe/ffmpeg/rubberband por segmento
+# ----------------------------------------------------------------------------
+
+def time_stretch_wsola(data, sr, ratio, frame_ms=30, tol_ms=10):
+    """Time-stretch WSOLA em NumPy (preserva pitch, bom para voz)
+
+    Args:
+        data: audio float32 mono
+        sr: sample rate
+        ratio: duracao_saida / duracao_entrada (mesma semantica do rubberband -t)
+        frame_ms: tamanho da janela de analise
+        tol_ms: deslocamento maximo na busca por similaridade
+
+    Returns:
+        audio float32 com len(data) * ratio amostras
+    """
+    from scipy.signal import correlate
+
+    n_in = len(data)
+    n_out = int(round(n_in * ratio))
+    if n_in == 0 or n_out == 0 or abs(ratio - 1.0) < 1e-3:
+        return data.astype(np.float32, copy=True)
+
+    win = max(64, int(sr * frame_ms / 1000)) // 2 * 2
+    hop_s = win // 2
+    hop_a = hop_s / ratio
+    tol = max(1, int(sr * tol_ms / 1000))
+    window = np.hanning(win).astype(np.float32)
+
+    n_frames = int(np.ceil(n_out / hop_s)) + 1
+    # Padding para que toda janela/busca caiba no array
+    pad_end = win + 2 * tol + hop_s + int(np.ceil(hop_a)) + 1
+    x = np.concatenate([np.zeros(tol, dtype=np.float32),
+                        data.astype(np.float32),
+                        np.zeros(pad_end, dtype=np.float32)])
+
+    y = np.zeros(n_frames * hop_s + win, dtype=np.float32)
+    wsum = np.zeros_like(y)
+
+    pos = tol
+    for k in range(n_frames):
+        nominal = min(int(round(k * hop_a)) + tol, len(x) - win - tol)
+        if k > 0:
+            # Continuacao natural do frame anterior vs. regiao nominal
+            natural = min(pos + hop_s, len(x) - win)
+            template = x[natural:natural + win]
+            region = x[nominal - tol:nominal + tol + win]
+            if np.any(template) and np.any(region):
+                corr = correlate(region, template, mode="valid")
+                pos = nominal - tol + int(np.argmax(corr))
+            else:
+                pos = nominal
+
+        out_at = k * hop_s
+        y[out_at:out_at + win] += x[pos:pos + win] * window
+        wsum[out_at:out_at + win] += window
+
+    nz = wsum > 1e-3
+    y[nz] /= wsum[nz]
+    return y[:n_out]
+
+def sync_segment_inprocess(p, target, workdir, sr, mode, tol, maxstretch):
+    """Sincroniza um segmento inteiramente em processo
+
+    Decodifica o WAV uma vez, mede a duracao pelo numero de amostras e aplica
+    a mesma logica de sync_fit_advanced / sync_pad / sync_smart_advanced,
+    usando WSOLA em vez de rubberband/atempo. Escreve no maximo um arquivo.
+    """
+    from scipy.io import wavfile as wf
+
+    if mode == "none":
+        return p
+
+    try:
+        data, file_sr = read_wav_mono(p)
+    except Exception as e:
+        print(f"    [WARN] Leitura falhou para {p.name}: {e}")
+        return p
+
+    cur = len(data) / file_sr if file_sr else 0.0
+    if cur <= 0:
+        return p
+
+    def pad_or_trim():
+        out = Path(workdir, p.name.replace(".wav", "_pad.wav"))
+        target_samples = int(target * file_sr)
+        if len(data) >= target_samples:
+            audio = data[:target_samples]
+        else:
+            audio = np.concatenate([data, np.zeros(target_samples - len(data), dtype=np.float32)])
+        wf.write(str(out), file_sr, normalize_audio_safe(audio))
+        return out
+
+    def fit():
+        ratio = target / cur
+        if abs(ratio - 1.0) < tol:
+            return p
+        ratio = max(min(ratio, maxstretch), 1.0 / maxstretch)
+        out = Path(workdir, p.name.replace(".wav", "_fit.wav"))
+        try:
+            audio = time_stretch_wsola(data, file_sr, ratio)
+            wf.write(str(out), file_sr, normalize_audio_safe(audio))
+        except Exception as e:
+            print(f"    [WARN] WSOLA falhou: {e}, usando original")
+            return p
+        print(f"    [FIT-NP] {cur:.2f}s -> {target:.2f}s (ratio={ratio:.3f})")
+        return out
+
+    if mode == "pad":
+        return pad_or_trim()
+    if mode == "fit":
+        return fit()
+
+    # smart
+    if cur < target * (1 - tol):
+        return pad_or_trim()
+    if cur > target * (1 + tol):
+        if target / cur < (1.0 / maxstretch):
+            return pad_or_trim()
+        return fit()
+    return p
+
 
 def sync_extend_prepare(seg_files, segs_trad, workdir):
     """Prepara sincronizacao extend - voz natural, video se ajusta
@@ -2499,6 +3885,7 @@ def sync_extend_prepare(seg_files, segs_trad, workdir):
 
             extensions.append({
                 "timestamp": original_end + cumulative_delta,  # Timestamp ajustado
+                "source_timestamp": original_end,  # Ponto do freeze no video original
                 "duration": delta,
                 "segment": i + 1
             })
@@ -2529,103 +3916,170 @@ def sync_extend_prepare(seg_files, segs_trad, workdir):
     return padded_files, extensions, new_timestamps
 
 
-def mux_video_extended(video_in, wav_in, out_mp4, bitrate, extensions, workdir):
-    """Combina video com audio, adicionando freeze frames onde necessario"""
-    print("\n" + "="*60)
-    print("=== ETAPA 10: Mux Final (com extensao de video) ===")
-    print("="*60)
+def extend_filtergraph(extensions, fps, video_duration, audio_duration=0.0):
+    """Filtro de video do modo extend: todos os freeze frames em uma cadeia so
 
-    def run_quiet(cmd):
-        """Executa comando ffmpeg silenciosamente"""
-        return subprocess.run(cmd, capture_output=True)
+    Cada extensao vira um loop=...:size=1 que repete o ultimo quadro antes do
+    ponto de freeze (tempo do video original) pelos quadros da extensao; setpts
+    refaz os timestamps no fim. Sem cortar o video em pedacos nem buffers extras.
+    Se o audio dublado passar do video estendido, tpad clona o ultimo quadro;
+    ele vem antes do setpts (depois dele o tpad nao ve o fim do stream e nao
+    acrescenta nada, e o -shortest cortava o audio).
+    """
+    last_frame = max(0, int(video_duration * fps) - 1)
+    filtros = [f"fps={fps:.6f}"]
+    adicionados = 0     # quadros ja inseridos pelos loops anteriores
+    acumulado = 0.0     # segundos de extensao ate aqui (arredondados no total, sem drift)
+    for ext in sorted(extensions, key=lambda e: e["timestamp"]):
+        src_ts = ext.get("source_timestamp", ext["timestamp"] - acumulado)
+        acumulado += ext["duration"]
+        n = int(round(acumulado * fps)) - adicionados
+        if n <= 0:
+            continue
+        frame = min(max(0, int(round(src_ts * fps)) - 1), last_frame)
+        filtros.append(f"loop=loop={n}:size=1:start={frame + adicionados}")
+        adicionados += n
+    sobra = audio_duration - (video_duration + acumulado)
+    if sobra > 0.05:
+        filtros.append(f"tpad=stop_mode=clone:stop_duration={sobra:.3f}")
+    filtros.append(f"setpts=N/({fps:.6f}*TB)")
+    return ",".join(filtros)
+
+
+def mux_video_extended_smart(video_in, wav_in, out_mp4, bitrate, extensions, workdir, encode=None):
+    """Modo extend com smart render: so os GOPs com freeze frame sao reencodados
+
+    Cada freeze reencoda do keyframe anterior ao seguinte (com o quadro congelado
+    no meio); os trechos entre eles vao por stream copy. Tudo e juntado pelo
+    concat demuxer com o audio no mesmo passo. Os trechos saem com os parametros
+    lidos da fonte (x264_splice_args) e sao conferidos com ela (profile, level,
+    resolucao, SAR, timebase...). Retorna False quando a fonte nao permite
+    (codec diferente de H.264, sem indice de keyframes), um trecho nao bate com
+    a fonte ou o ffmpeg falha, para o chamador cair no encode unico.
+    encode: perfil de encode_comum (x264).
+    """
+    import bisect
 
-    if not extensions:
-        # Sem extensoes, usar mux normal
+    stream = probe_video_stream(video_in)
+    codec, pix_fmt = stream.get("codec_name"), stream.get("pix_fmt")
+    if codec != "h264" or pix_fmt not in ("yuv420p", "yuvj420p"):
+        print(f"[INFO] Smart render requer H.264 yuv420p (fonte: {codec}/{pix_fmt}), reencodando tudo")
+        return False
+    keyframes = probe_keyframes(video_in)
+    if not keyframes:
+        print("[WARN] Indice de keyframes indisponivel, reencodando tudo")
+        return False
+
+    # -ss e duracoes relativos ao inicio; inpoint/outpoint do concat sao absolutos
+    origem = keyframes[0]
+    keyframes = [k - origem for k in keyframes]
+    fps = ffprobe_fps(video_in)
+    video_duration = ffprobe_duration(video_in)
+
+    # Freezes no tempo do video original, com os quadros ja arredondados no
+    # acumulado (como em extend_filtergraph) para nao somar erro entre trechos
+    freezes = []
+    acumulado, adicionados = 0.0, 0
+    for ext in sorted(extensions, key=lambda e: e["timestamp"]):
+        src_ts = ext.get("source_timestamp", ext["timestamp"] - acumulado)
+        acumulado += ext["duration"]
+        n = int(round(acumulado * fps)) - adicionados
+        if n > 0:
+            freezes.append((min(src_ts, video_duration), n))
+            adicionados += n
+    sobra = ffprobe_duration(wav_in) - (video_duration + adicionados / fps)
+    if sobra > 0.05:
+        freezes.append((video_duration, int(round(sobra * fps))))
+
+    # Trechos a reencodar: [ultimo keyframe antes do freeze, primeiro keyframe a partir dele)
+    spans = []
+    for ts, n in freezes:
+        i = bisect.bisect_left(keyframes, ts)
+        ini = keyframes[i - 1] if i > 0 else 0.0
+        fim = keyframes[i] if i < len(keyframes) and keyframes[i] > ini else video_duration
+        if spans and ini < spans[-1]["fim"]:
+            spans[-1]["fim"] = max(spans[-1]["fim"], fim)
+            spans[-1]["freezes"].append((ts, n))
+        else:
+            spans.append({"ini": ini, "fim": fim, "freezes": [(ts, n)]})
+
+    reencode = sum(sp["fim"] - sp["ini"] for sp in spans)
+    print(f"[INFO] Smart render: {len(spans)} trechos reencodados ({reencode:.1f}s de {video_duration:.1f}s), "
+          f"resto em stream copy")
+
+    def entrada(path):
+        return "file '" + str(Path(path).resolve()).replace("'", "'\\''") + "'"
+
+    # O concat corta no dts: outpoint antes do atraso de B-frames para nao levar
+    # o keyframe seguinte (e repetir quadros do trecho reencodado); duration
+    # mantem o tempo do trecho copiado igual a distancia entre os keyframes
+    atraso = probe_dts_delay(video_in)
+
+    linhas = []
+    pos = 0.0
+    try:
+        for i, sp in enumerate(spans):
+            if sp["ini"] > pos:
+                linhas += [entrada(video_in), f"inpoint {pos + origem:.6f}",
+                           f"outpoint {sp['ini'] + origem - atraso:.6f}", f"duration {sp['ini'] - pos:.6f}"]
+            local = [{"timestamp": ts - sp["ini"], "source_timestamp": ts - sp["ini"], "duration": n / fps}
+                     for ts, n in sp["freezes"]]
+            piece = Path(workdir) / f"smart_{i:04d}.mp4"
+            # Trecho dominado pelo quadro congelado: -tune stillimage
+            parados = sum(n for _, n in sp["freezes"])
+            still = parados >= (sp["fim"] - sp["ini"]) * fps
+            sh(["ffmpeg", "-y",
+                "-ss", f"{sp['ini']:.6f}",
+                "-t", f"{sp['fim'] - sp['ini']:.6f}",
+                "-i", str(video_in),
+                "-an",
+                "-vf", extend_filtergraph(local, fps, sp["fim"] - sp["ini"]),
+                *x264_splice_args(stream, encode, still=still),
+                str(piece)])
+            diff = splice_mismatch(stream, probe_video_stream(piece))
+            if diff:
+                print(f"[WARN] Smart render: {piece.name} difere da fonte ({', '.join(diff)}), reencodando tudo")
+                return False
+            linhas.append(entrada(piece))
+            pos = sp["fim"]
+        if pos < video_duration:
+            linhas += [entrada(video_in), f"inpoint {pos + origem:.6f}"]
+
+        concat_list = Path(workdir) / "smart_concat.txt"
+        concat_list.write_text("\n".join(linhas) + "\n", encoding="utf-8")
         sh(["ffmpeg", "-y",
-            "-i", str(video_in),
+            "-f", "concat", "-safe", "0",
+            "-i", str(concat_list),
             "-i", str(wav_in),
             "-map", "0:v:0",
             "-map", "1:a:0",
             "-c:v", "copy",
             "-c:a", "aac",
             "-b:a", bitrate,
-            str(out_mp4)])
-        print(f"[OK] Video final: {out_mp4}")
-        return
-
-    # Ordenar extensoes por timestamp
-    extensions = sorted(extensions, key=lambda x: x["timestamp"])
-
-    # Criar segmentos de video com freeze frames
-    segments = []
-    prev_time = 0.0
-    total_ext = len(extensions)
-
-    print(f"[INFO] Criando {total_ext} freeze frames...")
+            "-shortest",
+            str(out_mp4)], timeout=None)
+    except subprocess.CalledProcessError:
+        print("[WARN] Smart render falhou, reencodando tudo")
+        return False
 
-    for i, ext in enumerate(extensions):
-        ts = ext["timestamp"]
-        dur = ext["duration"]
+    print(f"[OK] Video final (estendido, smart render): {out_mp4}")
+    return True
 
-        # Segmento de video normal ate o ponto de freeze
-        if ts > prev_time:
-            seg_video = Path(workdir) / f"vseg_{i:04d}.mp4"
-            run_quiet(["ffmpeg", "-y",
-                "-ss", str(prev_time),
-                "-i", str(video_in),
-                "-t", str(ts - prev_time),
-                "-c:v", "libx264", "-preset", "fast", "-crf", "18",
-                "-an",
-                str(seg_video)])
-            if seg_video.exists():
-                segments.append(seg_video)
 
-        # Freeze frame - extrair frame e criar video estatico
-        freeze_img = Path(workdir) / f"freeze_{i:04d}.png"
-        freeze_video = Path(workdir) / f"freeze_{i:04d}.mp4"
+def mux_video_extended(video_in, wav_in, out_mp4, bitrate, extensions, workdir, render="encode", encode=None):
+    """Combina video com audio, adicionando freeze frames onde necessario
 
-        # Extrair frame no ponto do freeze
-        run_quiet(["ffmpeg", "-y",
-            "-ss", str(ts - 0.01),  # Um pouco antes para garantir
-            "-i", str(video_in),
-            "-vframes", "1",
-            str(freeze_img)])
-
-        if freeze_img.exists():
-            # Criar video a partir da imagem estatica
-            run_quiet(["ffmpeg", "-y",
-                "-loop", "1",
-                "-i", str(freeze_img),
-                "-t", str(dur),
-                "-c:v", "libx264", "-preset", "fast", "-crf", "18",
-                "-pix_fmt", "yuv420p",
-                "-r", "30",
-                str(freeze_video)])
-
-            if freeze_video.exists():
-                segments.append(freeze_video)
-
-        prev_time = ts
-
-        # Progresso
-        if (i + 1) % 5 == 0 or i == total_ext - 1:
-            print(f"    Progresso: {i+1}/{total_ext}")
-
-    # Ultimo segmento ate o fim do video
-    video_duration = ffprobe_duration(video_in)
-    if prev_time < video_duration:
-        seg_video = Path(workdir) / f"vseg_final.mp4"
-        run_quiet(["ffmpeg", "-y",
-            "-ss", str(prev_time),
-            "-i", str(video_in),
-            "-c:v", "libx264", "-preset", "fast", "-crf", "18",
-            "-an",
-            str(seg_video)])
-        if seg_video.exists():
-            segments.append(seg_video)
+    Um unico ffmpeg: filtergraph de extend_filtergraph(), um encode e o audio
+    no mesmo passo (antes eram cortes, PNGs e dois reencodes por extensao).
+    render="smart": tenta mux_video_extended_smart() antes (so GOPs com freeze).
+    encode: perfil de encode_comum (preset/CRF/threads do x264).
+    """
+    print("\n" + "="*60)
+    print("=== ETAPA 10: Mux Final (com extensao de video) ===")
+    print("="*60)
 
-    if not segments:
-        print("[WARN] Nenhum segmento criado, usando mux normal")
+    if not extensions:
+        # Sem extensoes, usar mux normal
         sh(["ffmpeg", "-y",
             "-i", str(video_in),
             "-i", str(wav_in),
@@ -2638,37 +4092,34 @@ def mux_video_extended(video_in, wav_in, out_mp4, bitrate, extensions, workdir):
         print(f"[OK] Video final: {out_mp4}")
         return
 
-    print(f"[INFO] Concatenando {len(segments)} segmentos de video...")
-
-    # Criar lista de concatenacao
-    concat_list = Path(workdir) / "video_concat.txt"
-    with open(concat_list, "w") as f:
-        for seg in segments:
-            f.write(f"file '{seg.name}'\n")
-
-    # Concatenar segmentos de video
-    video_extended = Path(workdir) / "video_extended.mp4"
-    run_quiet(["ffmpeg", "-y",
-        "-f", "concat", "-safe", "0",
-        "-i", str(concat_list),
-        "-c:v", "libx264", "-preset", "fast", "-crf", "18",
-        str(video_extended)])
-
-    # Mux final com audio
-    if video_extended.exists():
-        print("[INFO] Mixando audio com video estendido...")
+    if render == "smart" and mux_video_extended_smart(video_in, wav_in, out_mp4, bitrate, extensions,
+                                                      workdir, encode=encode):
+        return
+
+    fps = ffprobe_fps(video_in)
+    video_duration = ffprobe_duration(video_in)
+    graph = extend_filtergraph(extensions, fps, video_duration, ffprobe_duration(wav_in))
+    total_ext = sum(e["duration"] for e in extensions)
+    print(f"[INFO] {len(extensions)} freeze frames (+{total_ext:.2f}s) em um encode ({fps:.3f} fps)")
+
+    # Filtro grande (centenas de extensoes) vai em arquivo, fora da linha de comando
+    graph_file = Path(workdir) / "extend_filter.txt"
+    graph_file.write_text(graph, encoding="utf-8")
+
+    try:
         sh(["ffmpeg", "-y",
-            "-i", str(video_extended),
+            "-i", str(video_in),
             "-i", str(wav_in),
             "-map", "0:v:0",
             "-map", "1:a:0",
-            "-c:v", "copy",
+            "-filter_script:v", str(graph_file),
+            *x264_args(encode),
             "-c:a", "aac",
             "-b:a", bitrate,
             "-shortest",
-            str(out_mp4)])
+            str(out_mp4)], timeout=None)
         print(f"[OK] Video final (estendido): {out_mp4}")
-    else:
+    except subprocess.CalledProcessError:
         print("[WARN] Falha ao criar video estendido, usando mux normal")
         sh(["ffmpeg", "-y",
             "-i", str(video_in),
@@ -2686,23 +4137,63 @@ def mux_video_extended(video_in, wav_in, out_mp4, bitrate, extensions, workdir):
 # ETAPA 8: CONCATENACAO
 # ============================================================================
 
-def concat_segments(seg_files, workdir, samplerate):
-    """Concatena segmentos de audio"""
+def concat_segments(seg_files, workdir, samplerate, segments=None, total_duration=None):
+    """Monta a trilha dublada numa timeline em memoria (NumPy)
+
+    Cada segmento e posicionado no seu timestamp absoluto ("start"), preservando
+    os silencios entre falas. Se um segmento invadir o proximo (overlap), o
+    proximo e empurrado para depois do anterior - o atraso e absorvido pelo
+    proximo silencio, sem sobrepor duas vozes.
+
+    Args:
+        seg_files: arquivos WAV sincronizados (na ordem dos segmentos)
+        workdir: diretorio de trabalho
+        samplerate: sample rate da saida
+        segments: lista de dicts com "start" (None = colar em sequencia)
+        total_duration: duracao do audio original em segundos (tamanho minimo do buffer)
+    """
     print("\n" + "="*60)
-    print("=== ETAPA 8: Concatenacao ===")
+    print("=== ETAPA 8: Concatenacao (timeline) ===")
     print("="*60)
 
-    lst = Path(workdir, "list.txt")
-    with open(lst, "w", encoding="utf-8") as f:
-        for p in seg_files:
-            f.write(f"file '{p.name}'\n")
+    from scipy.io import wavfile as wf
+
+    # Passo 1: decodificar cada segmento uma vez e calcular a posicao
+    clips = []
+    cursor = 0
+    overlaps = 0
+    for i, p in enumerate(seg_files):
+        try:
+            data, _ = read_wav_mono(p, samplerate)
+        except Exception as e:
+            print(f"  [WARN] Falha ao ler {Path(p).name}: {e}")
+            continue
+
+        if segments is not None and i < len(segments):
+            start = int(round(max(0.0, segments[i]["start"]) * samplerate))
+        else:
+            start = cursor
+
+        if start < cursor:
+            overlaps += 1
+            start = cursor
+
+        clips.append((start, data))
+        cursor = start + len(data)
+
+    # Passo 2: alocar um unico buffer e posicionar os segmentos
+    n_total = max(cursor, int(round((total_duration or 0) * samplerate)))
+    timeline = np.zeros(n_total, dtype=np.float32)
+    for start, data in clips:
+        timeline[start:start + len(data)] = data
 
     out = Path(workdir, "dub_raw.wav")
-    sh(["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(lst),
-        "-c:a", "pcm_s16le", "-ar", str(samplerate), "-ac", "1",
-        str(out)])
+    audio_int16 = (np.clip(timeline, -1.0, 1.0) * 32767).astype(np.int16)
+    wf.write(str(out), samplerate, audio_int16)
 
-    print(f"[OK] Concatenado: {out.name}")
+    if overlaps:
+        print(f"[INFO] {overlaps} segmentos deslocados por sobreposicao")
+    print(f"[OK] Timeline: {len(clips)} segmentos, {n_total / samplerate:.1f}s -> {out.name}")
     return out
 
 # ============================================================================
@@ -2752,12 +4243,48 @@ def mux_video(video_in, wav_in, out_mp4, bitrate):
 
     print(f"[OK] Video final: {out_mp4}")
 
+
+# Codigos ISO 639-2 para a tag language= das faixas de audio (MP4 exige 3 letras)
+ISO639_2 = {
+    "pt": "por", "en": "eng", "es": "spa", "fr": "fra", "de": "deu", "it": "ita",
+    "ja": "jpn", "zh": "zho", "ko": "kor", "ru": "rus", "ar": "ara", "hi": "hin",
+    "nl": "nld", "pl": "pol", "tr": "tur", "sv": "swe", "uk": "ukr",
+}
+
+
+def mux_video_multi(video_in, tracks, out_mp4, bitrate):
+    """Combina o video original com varias faixas dubladas em um unico MP4.
+
+    tracks: [(idioma, wav)] na ordem das faixas; a primeira fica como padrao.
+    O video e copiado uma vez so (sem reencode).
+    """
+    print("\n" + "="*60)
+    print(f"=== ETAPA 10: Mux Final ({len(tracks)} faixas de audio) ===")
+    print("="*60)
+
+    cmd = ["ffmpeg", "-y", "-i", str(video_in)]
+    for _, wav in tracks:
+        cmd += ["-i", str(wav)]
+    cmd += ["-map", "0:v:0"]
+    for i in range(len(tracks)):
+        cmd += ["-map", f"{i + 1}:a:0"]
+    cmd += ["-c:v", "copy", "-c:a", "aac", "-b:a", bitrate]
+    for i, (lang, _) in enumerate(tracks):
+        cmd += [f"-metadata:s:a:{i}", f"language={ISO639_2.get(lang[:2], lang)}",
+                f"-disposition:a:{i}", "default" if i == 0 else "0"]
+    sh(cmd + [str(out_mp4)])
+
+    print(f"[OK] Video final: {out_mp4} ({', '.join(lang for lang, _ in tracks)})")
+
 # ============================================================================
 # METRICAS DE QUALIDADE
 # ============================================================================
 
-def calculate_quality_metrics(segments, seg_files, workdir):
-    """Calcula metricas de qualidade da dublagem"""
+def calculate_quality_metrics(segments, seg_files, workdir, cache_stats=None):
+    """Calcula metricas de qualidade da dublagem
+
+    cache_stats: hits/misses dos caches (memoria de traducao, TTS), opcional
+    """
     print("\n" + "="*60)
     print("=== Metricas de Qualidade ===")
     print("="*60)
@@ -2821,12 +4348,409 @@ def calculate_quality_metrics(segments, seg_files, workdir):
     print(f"  Traducao:")
     print(f"    - Compressao media: {metricas['translation_stats']['avg_compression']:.2%}")
 
+    if cache_stats:
+        metricas["cache_stats"] = cache_stats
+        print(f"  Caches:")
+        for nome, st in cache_stats.items():
+            print(f"    - {nome}: {st['hits']}/{st['hits'] + st['misses']} hits ({st['hit_rate']:.0%})")
+
     metrics_file = Path(workdir, "quality_metrics.json")
     with open(metrics_file, "w", encoding="utf-8") as f:
         json.dump(metricas, f, indent=2, ensure_ascii=False)
 
     return metricas
 
+# ============================================================================
+# ETAPAS 3-7 EM FLUXO (--stream)
+# ============================================================================
+
+def run_translation(args, segs, src_lang, workdir, cps_original, no_truncate, tm, cache_root,
+                    preflight=True, write_files=True):
+    """ETAPA 4 conforme --tradutor (Ollama com fallback M2M100)"""
+    if args.tradutor == "ollama":
+        result = run_stage(
+            translate_segments_ollama,
+            segs, src_lang, args.tgt, workdir, args.modelo, cps_original, no_truncate,
+            tm=tm, workers=args.translate_workers, batch_size=args.translate_batch,
+            m2m_backend=args.m2m_backend, cache_root=cache_root,
+            preflight=preflight, write_files=write_files
+        )
+        if result is not None:
+            return result
+        print("[INFO] Fallback para M2M100...")
+    return run_stage(
+        translate_segments_m2m100,
+        segs, src_lang, args.tgt, workdir, args.large_model, cps_original, no_truncate, tm=tm,
+        backend=args.m2m_backend, cache_root=cache_root, write_files=write_files
+    )
+
+
+def run_tts(args, segs_trad, workdir, voice_sample, tts_cache):
+    """ETAPA 6 conforme --tts (XTTS com fallback Edge)"""
+    if args.tts == "xtts" and voice_sample:
+        result = run_stage(tts_xtts_clone, segs_trad, workdir, args.tgt, voice_sample,
+                           cache=tts_cache)
+        if result[0] is not None:
+            return result
+        print("[INFO] XTTS falhou, usando Edge...")
+        return tts_edge(
+            segs_trad, workdir, args.tgt, voice=args.voice, rate=args.rate,
+            concurrency=args.tts_concurrency, cache=tts_cache
+        )
+    elif args.tts == "edge" or args.tts == "xtts":
+        return tts_edge(
+            segs_trad, workdir, args.tgt, voice=args.voice, rate=args.rate,
+            concurrency=args.tts_concurrency, cache=tts_cache
+        )
+    elif args.tts == "bark":
+        voice = args.voice or "v2/pt_speaker_3"
+        return tts_bark_optimized(
+            segs_trad, workdir,
+            text_temp=args.texttemp,
+            wave_temp=args.wavetemp,
+            history_prompt=voice,
+            max_retries=args.max_retries,
+            cache=tts_cache
+        )
+    else:  # piper
+        return tts_piper(
+            segs_trad, workdir, args.tgt, model_path=args.voice,
+            workers=args.piper_workers, cache=tts_cache
+        )
+
+
+def run_sync(args, seg_files, segs_trad, workdir, sr_segs, synced=False):
+    """ETAPA 7 conforme --sync. Retorna (seg_files, video_extensions, timeline_segs)
+
+    synced: segmentos ja sincronizados (--stream); so o extend ainda e aplicado.
+    """
+    print("\n" + "="*60)
+    print("=== ETAPA 7: Sincronizacao ===")
+    print("="*60)
+
+    use_rb = not args.no_rubberband  # Usar rubberband por padrao (engine external)
+    if args.sync in ("fit", "pad", "smart"):
+        print(f"[INFO] Engine de sync: {args.sync_engine}")
+
+    # Garantir que temos a mesma quantidade de segmentos e arquivos
+    n_segs = len(segs_trad)
+    n_files = len(seg_files)
+    if n_segs != n_files:
+        print(f"[WARN] Mismatch: {n_segs} segmentos vs {n_files} arquivos")
+
+    # Usar o menor para evitar index out of range, mas processar todos os arquivos
+    targets = []
+    for i, p in enumerate(seg_files):
+        if i < len(segs_trad):
+            s = segs_trad[i]
+            targets.append(max(0.05, s["end"] - s["start"]))
+        else:
+            # Arquivo extra do split - usar duracao padrao
+            targets.append(wav_duration(p) or 2.0)
+
+    if args.sync == "extend":
+        # Modo extend: nao modifica audio, calcula extensoes do video para o mux
+        return sync_extend_prepare(seg_files, segs_trad, workdir)
+    if synced:
+        return list(seg_files), [], segs_trad
+    fixed = sync_all_segments(seg_files, targets, workdir, sr_segs, args.sync,
+                              args.tolerance, args.maxstretch, use_rb,
+                              engine=args.sync_engine, workers=args.sync_workers)
+    return fixed, [], segs_trad
+
+
+def stream_supported(args):
+    """--stream precisa do ASR incremental (Faster-Whisper) e de segmentos sem diarizacao"""
+    if args.asr != "whisper":
+        return False, "ASR Parakeet transcreve o audio inteiro de uma vez"
+    if args.diarize:
+        return False, "diarizacao precisa do audio inteiro"
+    return True, None
+
+
+def pipeline_streaming(args, audio_src, workdir, voice_sample, tm, tts_cache, cache_root, no_truncate,
+                       fingerprint=None):
+    """ETAPAS 3-7 em fluxo: ASR -> merge -> traducao -> split -> TTS -> sync.
+
+    Cada etapa roda numa thread e passa lotes de --stream-chunk segmentos
+    adiante por filas de ate --stream-queue lotes: a traducao comeca com o
+    primeiro lote transcrito e o TTS com o primeiro traduzido. A memoria fica
+    limitada pelas filas. Lotes sao traduzidos sem contexto dos anteriores e o
+    CPS de referencia e o dos segmentos transcritos ate o momento.
+
+    Retorna: (segs, segs_trad, seg_files, sr_segs, src_lang, cps_original,
+    trad_srt, synced) - synced=True se a sincronizacao ja foi aplicada.
+    Com cache_root + fingerprint, uma transcricao em cache alimenta o fluxo
+    direto e uma nova e gravada no fim (asr_comum.ASRCache).
+    """
+    import queue
+    import threading
+    import time
+
+    print("\n" + "="*60)
+    print("=== ETAPAS 3-7: Pipeline em fluxo (--stream) ===")
+    print("="*60)
+
+    chunk_size = max(1, args.stream_chunk)
+    q_trad = queue.Queue(maxsize=max(1, args.stream_queue))
+    q_tts = queue.Queue(maxsize=max(1, args.stream_queue))
+    q_sync = queue.Queue(maxsize=max(1, args.stream_queue))
+    stop = threading.Event()
+    erros = []
+    asr_segs = []
+    prontos = []
+    synced = args.sync in ("fit", "pad", "smart")
+    use_rb = not args.no_rubberband
+    t0 = time.time()
+
+    asr_cache = ASRCache(cache_root) if cache_root and fingerprint else None
+    asr_options = decode_options(WHISPER_OPTIONS)  # fluxo: decode sequencial
+    hit = asr_cache.get(fingerprint, args.whisper_model, args.src, asr_options) if asr_cache else None
+    raw_segs = []
+    if hit:
+        from types import SimpleNamespace
+        seg_iter = iter(hit["segments"])
+        detected_lang = hit["language"]
+        info = SimpleNamespace(language_probability=hit.get("language_probability"), duration=None)
+    else:
+        seg_iter, info, detected_lang = open_faster_whisper(audio_src, args.src, args.whisper_model)
+    src_lang = detected_lang or args.src
+    print(f"[INFO] Lotes de {chunk_size} segmentos, filas de {args.stream_queue} lotes")
+
+    # Ollama verificado e pre-aquecido uma vez para todos os lotes
+    args_trad = args
+    if args.tradutor == "ollama" and not (check_ollama(model=args.modelo) and warmup_ollama(args.modelo)):
+        print("[WARN] Ollama indisponivel. Fallback para M2M100 em todos os lotes.")
+        args_trad = argparse.Namespace(**{**vars(args), "tradutor": "m2m100"})
+
+    # Releases ao fim de cada lote descarregariam os modelos: segurar ate o fim
+    was_resident = MODEL_POOL.resident
+    MODEL_POOL.resident = True
+
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return None
+
+    def asr():
+        lote = []
+        def coletar():
+            for seg in seg_iter:
+                raw_segs.append(dict(seg))
+                yield seg
+
+        for seg in iter_merge_incomplete_segments(coletar(), max_duration=15.0):
+            asr_segs.append(seg)
+            lote.append(seg)
+            if len(lote) >= chunk_size:
+                if not put(q_trad, lote):
+                    return
+                lote = []
+            if len(asr_segs) % 50 == 0:
+                print(f"  [STREAM] Transcritos: {len(asr_segs)} segmentos")
+        if lote:
+            put(q_trad, lote)
+        put(q_trad, None)
+
+    def traduzir():
+        while True:
+            lote = get(q_trad)
+            if lote is None:
+                break
+            cps = calcular_cps_original(audio_src, list(asr_segs))
+            segs_trad, _, _ = run_translation(args_trad, lote, src_lang, workdir, cps, no_truncate, tm, cache_root,
+                                              preflight=False, write_files=False)
+            if not put(q_tts, split_long_segments(segs_trad, args.maxdur)):
+                return
+        put(q_tts, None)
+
+    def sintetizar():
+        n = 0
+        while True:
+            segs_trad = get(q_tts)
+            if segs_trad is None:
+                break
+            n += 1
+            chunk_dir = Path(workdir, "stream", f"chunk_{n:04d}")
+            chunk_dir.mkdir(parents=True, exist_ok=True)
+            files, sr, _ = run_tts(args, segs_trad, chunk_dir, voice_sample, tts_cache)
+            if args.fade == 1:
+                files = apply_fade(files, chunk_dir)
+            if n == 1:
+                print(f"[STREAM] Primeiro audio pronto em {time.time() - t0:.1f}s")
+            if not put(q_sync, (segs_trad, files, sr, chunk_dir)):
+                return
+        put(q_sync, None)
+
+    def sincronizar():
+        while True:
+            item = get(q_sync)
+            if item is None:
+                break
+            segs_trad, files, sr, chunk_dir = item
+            if synced:
+                targets = [max(0.05, s["end"] - s["start"]) for s in segs_trad]
+                files = sync_all_segments(files, targets, chunk_dir, sr, args.sync,
+                                          args.tolerance, args.maxstretch, use_rb,
+                                          engine=args.sync_engine, workers=args.sync_workers)
+            prontos.append((segs_trad, files, sr))
+
+    def rodar(fn):
+        def alvo():
+            try:
+                fn()
+            except BaseException as e:  # inclui sys.exit das engines
+                erros.append(e)
+                stop.set()
+        return threading.Thread(target=alvo, name=f"stream-{fn.__name__}", daemon=True)
+
+    threads = [rodar(fn) for fn in (asr, traduzir, sintetizar, sincronizar)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        MODEL_POOL.resident = was_resident
+        MODEL_POOL.release()
+
+    if erros:
+        raise erros[0]
+
+    if asr_cache and not hit:
+        asr_cache.put(fingerprint, args.whisper_model, args.src, asr_options, raw_segs, detected_lang,
+                      getattr(info, "language_probability", None))
+
+    segs = asr_segs
+    write_asr_files(workdir, segs, detected_lang, args.src, info)
+
+    segs_trad, seg_files = [], []
+    sr_segs = prontos[0][2] if prontos else 24000
+    for lote_trad, files, sr in prontos:
+        if sr != sr_segs:
+            print(f"[WARN] Lote com sample rate {sr} (esperado {sr_segs})")
+        segs_trad.extend(lote_trad)
+        seg_files.extend(files)
+
+    # Traducao gravada uma vez, com todos os lotes
+    modelo = f"ollama/{args.modelo}" if args_trad.tradutor == "ollama" else "m2m100"
+    trad_srt, _ = write_translation_files(workdir, segs_trad, src_lang, args.tgt, modelo)
+
+    cps_original = calcular_cps_original(audio_src, segs)
+    print(f"[OK] Fluxo concluido: {len(segs)} segmentos, {len(seg_files)} audios em {time.time() - t0:.1f}s")
+    return segs, segs_trad, seg_files, sr_segs, src_lang, cps_original, trad_srt, synced
+
+# ============================================================================
+# MULTIPLOS IDIOMAS (--tgt pt,es,fr)
+# ============================================================================
+
+def parse_target_langs(tgt):
+    """"pt,es,fr" -> ["pt", "es", "fr"] (sem repetidos, na ordem dada)"""
+    langs = []
+    for lang in tgt.split(","):
+        lang = lang.strip()
+        if lang and lang not in langs:
+            langs.append(lang)
+    return langs
+
+
+def dublar_idioma(args, tgt, segs, src_lang, workdir, cps_original, no_truncate, tm, cache_root,
+                  voice_sample, tts_cache, video_duration_s):
+    """ETAPAS 4-9 para um idioma de destino em <workdir>/lang_<tgt>/
+
+    Reaproveita a transcricao (etapa 3) e o CPS original de um job com varios idiomas.
+    """
+    import time
+    args = argparse.Namespace(**{**vars(args), "tgt": tgt})
+    lang_dir = Path(workdir, f"lang_{tgt}")
+    lang_dir.mkdir(exist_ok=True)
+    tempos = {}
+    print(f"\n[INFO] === Idioma {tgt}: {lang_dir} ===")
+
+    t_etapa = time.time()
+    segs_trad, trad_json, trad_srt = run_translation(
+        args, segs, src_lang, lang_dir, cps_original, no_truncate, tm, cache_root
+    )
+    save_checkpoint(lang_dir, 4, "translation")
+    tempos["4_traducao"] = time.time() - t_etapa
+
+    t_etapa = time.time()
+    segs_trad = split_long_segments(segs_trad, args.maxdur)
+    save_checkpoint(lang_dir, 5, "split")
+    tempos["5_split"] = time.time() - t_etapa
+
+    t_etapa = time.time()
+    seg_files, sr_segs, tts_metrics = run_tts(args, segs_trad, lang_dir, voice_sample, tts_cache)
+    if args.fade == 1:
+        seg_files = apply_fade(seg_files, lang_dir)
+    save_checkpoint(lang_dir, 6, "tts")
+    tempos["6_tts"] = time.time() - t_etapa
+
+    t_etapa = time.time()
+    seg_files, video_extensions, timeline_segs = run_sync(args, seg_files, segs_trad, lang_dir, sr_segs)
+    save_checkpoint(lang_dir, 7, "sync")
+    tempos["7_sync"] = time.time() - t_etapa
+
+    t_etapa = time.time()
+    dub_raw = concat_segments(seg_files, lang_dir, sr_segs,
+                              segments=timeline_segs, total_duration=video_duration_s)
+    tempos["8_concat"] = time.time() - t_etapa
+
+    t_etapa = time.time()
+    dub_final = postprocess_audio(dub_raw, lang_dir, args.rate_audio)
+    save_checkpoint(lang_dir, 9, "postprocess")
+    tempos["9_postprocess"] = time.time() - t_etapa
+
+    return {
+        "tgt": tgt,
+        "workdir": lang_dir,
+        "segs_trad": segs_trad,
+        "seg_files": seg_files,
+        "video_extensions": video_extensions,
+        "dub_final": dub_final,
+        "trad_srt": trad_srt,
+        "tempos": tempos,
+    }
+
+
+def dublar_idiomas(args, langs, segs, src_lang, workdir, cps_original, no_truncate, tm, cache_root,
+                   voice_sample, tts_cache, video_duration_s):
+    """Fan-out das ETAPAS 4-9 por idioma; retorna os resultados na ordem de langs.
+
+    Idiomas rodam em paralelo conforme --lang-workers (0=auto: todos com TTS
+    Edge/Piper, um por vez com TTS em GPU). Os modelos ficam residentes ate o
+    fim para nao descarregar o M2M100/XTTS entre um idioma e outro.
+    """
+    workers = args.lang_workers or (len(langs) if args.tts in ("edge", "piper") else 1)
+    workers = max(1, min(workers, len(langs)))
+    print(f"\n[INFO] Dublando {len(langs)} idiomas ({', '.join(langs)}), {workers} em paralelo")
+
+    was_resident = MODEL_POOL.resident
+    MODEL_POOL.resident = True
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = [
+                ex.submit(dublar_idioma, args, lang, segs, src_lang, workdir, cps_original, no_truncate,
+                          tm, cache_root, voice_sample, tts_cache, video_duration_s)
+                for lang in langs
+            ]
+            return [f.result() for f in futures]
+    finally:
+        MODEL_POOL.resident = was_resident
+        MODEL_POOL.release()
+
 # ============================================================================
 # MAIN
 # ============================================================================
@@ -2869,13 +4793,19 @@ Exemplos:
 
   # Parakeet com segmentacao customizada
   python dublar_pro_v5.py --in video.mp4 --tgt pt --asr parakeet --segment-pause 0.5 --segment-max-words 20
+
+  # Varios idiomas em um job (um MP4 com uma faixa de audio por idioma)
+  python dublar_pro_v5.py --in video.mp4 --src en --tgt pt,es,fr
         """
     )
 
     # Entrada
     ap.add_argument("--in", dest="inp", required=True, help="Video de entrada ou URL YouTube")
     ap.add_argument("--src", default=None, help="Idioma de origem (auto-detectar se omitido)")
-    ap.add_argument("--tgt", required=True, help="Idioma de destino (pt, en, es, etc)")
+    ap.add_argument("--tgt", required=True,
+                   help="Idioma de destino (pt, en, es, etc); varios separados por virgula (pt,es,fr)")
+    ap.add_argument("--lang-workers", type=int, default=0,
+                   help="Varios --tgt: idiomas dublados em paralelo (0=auto: todos com Edge/Piper, 1 com TTS em GPU)")
 
     # Saida
     ap.add_argument("--out", dest="out", default=None, help="Video de saida")
@@ -2886,16 +4816,32 @@ Exemplos:
                    help="Engine de traducao")
     ap.add_argument("--modelo", default="qwen2.5:14b", help="Modelo Ollama (padrao: qwen2.5:14b)")
     ap.add_argument("--large-model", action="store_true", help="Usar M2M100 1.2B")
+    ap.add_argument("--m2m-backend", choices=list(M2M100_BACKENDS), default="torch",
+                   help="Backend M2M100: torch, ct2 (CTranslate2 int8, CPU) ou onnx (ONNX Runtime int8, CPU)")
+    ap.add_argument("--translate-workers", type=int, default=1,
+                   help="Requisicoes Ollama simultaneas (1=sequencial; use com OLLAMA_NUM_PARALLEL)")
+    ap.add_argument("--translate-batch", type=int, default=1,
+                   help="Segmentos por requisicao Ollama (lote JSON numerado; 1=um por vez)")
 
     # TTS
     ap.add_argument("--tts", choices=["edge", "bark", "piper", "xtts"], default="edge",
                    help="Engine TTS")
     ap.add_argument("--voice", default=None, help="Voz TTS")
     ap.add_argument("--rate", default="+0%", help="Velocidade Edge TTS")
+    ap.add_argument("--tts-concurrency", type=int, default=4,
+                   help="Requisicoes Edge TTS simultaneas (1=serial)")
+    ap.add_argument("--piper-workers", type=int, default=0,
+                   help="Sessoes Piper paralelas (0=metade dos nucleos)")
     ap.add_argument("--texttemp", type=float, default=0.7, help="Bark text temperature")
     ap.add_argument("--wavetemp", type=float, default=0.5, help="Bark waveform temperature")
     ap.add_argument("--max-retries", type=int, default=2, help="Max retries TTS")
     ap.add_argument("--clonar-voz", action="store_true", help="Clonar voz do video original (XTTS)")
+    ap.add_argument("--model-server", default=None,
+                   help="URL do servidor de modelos residente (padrao: $DUBLAR_MODEL_SERVER)")
+    ap.add_argument("--cache-dir", default=None,
+                   help="Cache compartilhado entre jobs: TTS e memoria de traducao (padrao: $DUBLAR_CACHE_DIR)")
+    ap.add_argument("--tts-cache-mb", type=float, default=None,
+                   help="Tamanho maximo do cache TTS em MB (padrao: $TTS_CACHE_MAX_MB ou 2048)")
 
     # ASR (Transcricao)
     ap.add_argument("--asr", choices=["whisper", "parakeet"], default="whisper",
@@ -2903,6 +4849,12 @@ Exemplos:
     ap.add_argument("--whisper-model", default="large-v3",
                    choices=["tiny", "small", "medium", "large", "large-v2", "large-v3", "large-v3-turbo"],
                    help="Modelo Whisper (padrao: large-v3)")
+    ap.add_argument("--asr-chunked", action="store_true",
+                   help="Whisper em blocos paralelos cortados em pausas (audios longos)")
+    ap.add_argument("--asr-chunk-s", type=float, default=300,
+                   help="--asr-chunked: duracao alvo de cada bloco em segundos (padrao: 300)")
+    ap.add_argument("--asr-workers", type=int, default=0,
+                   help="--asr-chunked: processos Whisper na CPU (0=nucleos/4)")
     ap.add_argument("--parakeet-model", default="nvidia/parakeet-tdt-1.1b",
                    choices=["nvidia/parakeet-tdt-1.1b", "nvidia/parakeet-ctc-1.1b", "nvidia/parakeet-rnnt-1.1b"],
                    help="Modelo Parakeet (padrao: tdt-1.1b)")
@@ -2918,9 +4870,15 @@ Exemplos:
     # Sincronizacao
     ap.add_argument("--sync", choices=["none", "fit", "pad", "smart", "extend"], default="smart",
                    help="Modo de sincronizacao (extend=voz natural, video estende com freeze frames)")
+    ap.add_argument("--extend-render", choices=["encode", "smart"], default="encode",
+                   help="--sync extend: encode=reencoda o video inteiro, smart=so os GOPs com freeze (resto em stream copy)")
     ap.add_argument("--tolerance", type=float, default=0.1, help="Tolerancia sync")
     ap.add_argument("--maxstretch", type=float, default=1.3, help="Max compressao (1.3=30%)")
+    ap.add_argument("--sync-workers", type=int, default=1,
+                   help="Processos paralelos na sincronizacao (0=todos os nucleos, 1=serial)")
     ap.add_argument("--no-rubberband", action="store_true", help="Desabilitar rubberband (usar ffmpeg atempo)")
+    ap.add_argument("--sync-engine", choices=["numpy", "external"], default="numpy",
+                   help="numpy=time-stretch WSOLA em processo (padrao), external=rubberband/ffmpeg por segmento")
     ap.add_argument("--no-truncate", action="store_true",
                    help="Nao truncar texto traduzido (frases completas, sync ajusta duracao)")
 
@@ -2930,6 +4888,15 @@ Exemplos:
     ap.add_argument("--bitrate", default="192k", help="Bitrate AAC")
     ap.add_argument("--fade", type=int, default=1, choices=[0, 1], help="Aplicar fade")
     ap.add_argument("--seed", type=int, default=42, help="Seed para reproducibilidade")
+    ap.add_argument("--stream", action="store_true",
+                   help="Transcricao, traducao, TTS e sync em fluxo (lotes passam adiante sem esperar a etapa inteira)")
+    ap.add_argument("--stream-chunk", type=int, default=8, help="--stream: segmentos por lote")
+    ap.add_argument("--stream-queue", type=int, default=4, help="--stream: lotes maximos em cada fila")
+    ap.add_argument("--phase", choices=list(PIPELINE_PHASES), default="all",
+                   help="all=pipeline inteiro, synth=etapas 1-6 (ASR/traducao/TTS), assemble=etapas 7-10 (sync/mux)")
+
+    # Encode de video (modo extend)
+    add_encode_args(ap)
 
     # Atalhos
     ap.add_argument("--qualidade", choices=["rapido", "balanceado", "maximo"], default="balanceado",
@@ -2955,10 +4922,24 @@ Exemplos:
     if args.clonar_voz and args.tts != "xtts":
         args.tts = "xtts"
 
+    # Varios idiomas de destino: etapas 1-3 uma vez, 4-9 por idioma, mux unico
+    langs = parse_target_langs(args.tgt)
+    if not langs:
+        ap.error("--tgt vazio")
+    args.tgt = ",".join(langs)
+    if len(langs) > 1:
+        if args.phase != "all":
+            ap.error("--phase synth/assemble nao suporta varios idiomas em --tgt")
+        if args.voice:
+            print("[WARN] --voice ignorado com varios idiomas: usando a voz padrao de cada idioma")
+            args.voice = None
+
     # Configurar seed global
-    global GLOBAL_SEED
+    global GLOBAL_SEED, MODEL_SERVER_URL
     GLOBAL_SEED = args.seed
     set_global_seed(GLOBAL_SEED)
+    if args.model_server:
+        MODEL_SERVER_URL = args.model_server
 
     # Verificacoes
     ensure_ffmpeg()
@@ -2968,7 +4949,13 @@ Exemplos:
     workdir = Path("dub_work")
     workdir.mkdir(exist_ok=True)
 
-    if is_youtube_url(video_in):
+    state = load_phase_state(workdir) if args.phase == "assemble" else None
+    stream_synced = False
+    resultados = None  # varios idiomas: saida de dublar_idiomas()
+
+    if state:
+        video_in = Path(state["video_in"])
+    elif is_youtube_url(video_in):
         video_in = download_youtube(video_in, workdir)
     else:
         video_in = Path(video_in).resolve()
@@ -3000,216 +4987,243 @@ Exemplos:
     tempos_etapas = {}
     tempo_inicio_total = time.time()
 
-    # ========== ETAPA 1-2: Extracao ==========
-    t_etapa = time.time()
-    print("\n" + "="*60)
-    print("=== ETAPA 1-2: Validacao e Extracao ===")
-    print("="*60)
-
-    audio_src = Path(workdir, "audio_src.wav")
-    sh(["ffmpeg", "-y", "-i", str(video_in),
-        "-vn", "-ac", "1", "-ar", "48000", "-c:a", "pcm_s16le",
-        str(audio_src)])
-
-    # Extrair amostra para clonagem de voz se necessario
-    voice_sample = None
-    if args.clonar_voz:
-        voice_sample = extract_voice_sample(audio_src, workdir)
-
-    # Obter duracao do video/audio
-    video_duration_s = 0
-    try:
-        import subprocess as _sp
-        probe = _sp.run(["ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-                         "-of", "csv=p=0", str(audio_src)], capture_output=True, text=True, timeout=10)
-        video_duration_s = round(float(probe.stdout.strip()), 1)
-        print(f"[INFO] Duracao do video: {int(video_duration_s//60)}m{int(video_duration_s%60)}s")
-    except Exception:
-        pass
-    save_checkpoint(workdir, 2, "extraction", {"video_duration_s": video_duration_s})
-    tempos_etapas["1-2_extracao"] = time.time() - t_etapa
-
-    # ========== ETAPA 3: Transcricao ==========
-    t_etapa = time.time()
-    if args.asr == "parakeet":
-        asr_json, asr_srt, segs, detected_lang = transcribe_parakeet(
-            audio_src, workdir, args.src,
-            model_name=args.parakeet_model,
-            segment_pause=args.segment_pause,
-            segment_max_words=args.segment_max_words
-        )
-    elif args.asr == "whisper":
-        # Auto-selecionar: usar OpenAI Whisper (PyTorch GPU) se CTranslate2 nao tem CUDA
-        import torch
-        use_openai_whisper = False
-        if torch.cuda.is_available():
-            try:
-                import ctranslate2
-                ctranslate2.get_supported_compute_types("cuda")
-            except (ValueError, Exception):
-                # CTranslate2 sem CUDA - tentar openai-whisper para usar GPU
-                try:
-                    import whisper
-                    use_openai_whisper = True
-                    print("[INFO] CTranslate2 sem CUDA - usando OpenAI Whisper com PyTorch GPU")
-                except ImportError:
-                    print("[WARN] openai-whisper nao instalado - Whisper rodara em CPU via CTranslate2")
-
-        if use_openai_whisper:
-            asr_json, asr_srt, segs, detected_lang = transcribe_openai_whisper(
-                audio_src, workdir, args.src, args.whisper_model,
-                diarize=args.diarize, num_speakers=args.num_speakers
-            )
-        else:
-            asr_json, asr_srt, segs, detected_lang = transcribe_faster_whisper(
-                audio_src, workdir, args.src, args.whisper_model,
-                diarize=args.diarize, num_speakers=args.num_speakers
-            )
+    if state:
+        print(f"[INFO] Fase assemble: retomando apos a etapa 6 ({len(state['seg_files'])} segmentos)")
+        video_duration_s = state["video_duration_s"]
+        cps_original = state["cps_original"]
+        segs_trad = state["segs_trad"]
+        seg_files = [Path(p) for p in state["seg_files"]]
+        sr_segs = state["sr_segs"]
+        trad_srt = state["trad_srt"]
+        cache_stats = state["cache_stats"]
+        stream_synced = state.get("stream_synced", False)
+        tempos_etapas.update(state["tempos_etapas"])
+        tempo_inicio_total -= state["tempo_total"]
     else:
-        asr_json, asr_srt, segs, detected_lang = transcribe_faster_whisper(
-            audio_src, workdir, args.src, args.whisper_model,
-            diarize=args.diarize, num_speakers=args.num_speakers
-        )
-    save_checkpoint(workdir, 3, "transcription")
-    tempos_etapas["3_transcricao"] = time.time() - t_etapa
-
-    # Usar idioma detectado se nao foi especificado
-    src_lang = detected_lang or args.src
-    if not args.src:
-        print(f"[INFO] Usando idioma detectado: {src_lang}")
-
-    # Calcular CPS original para traducao adaptativa
-    cps_original = calcular_cps_original(audio_src, segs)
-    print(f"[INFO] CPS original calculado: {cps_original:.1f}")
-
-    # ========== ETAPA 4: Traducao ==========
-    t_etapa = time.time()
-    no_truncate = getattr(args, 'no_truncate', False)
-    if no_truncate:
-        print("[INFO] Modo --no-truncate ativado: frases completas, sync ajusta duracao")
-    if args.tradutor == "ollama":
-        result = translate_segments_ollama(segs, src_lang, args.tgt, workdir, args.modelo, cps_original, no_truncate)
-        if result is None:
-            print("[INFO] Fallback para M2M100...")
-            segs_trad, trad_json, trad_srt = translate_segments_m2m100(
-                segs, src_lang, args.tgt, workdir, args.large_model, cps_original, no_truncate
+        # ========== ETAPA 1-2: Extracao ==========
+        t_etapa = time.time()
+        print("\n" + "="*60)
+        print("=== ETAPA 1-2: Validacao e Extracao ===")
+        print("="*60)
+
+        audio_src = Path(workdir, "audio_src.wav")
+        sh(["ffmpeg", "-y", "-i", str(video_in),
+            "-vn", "-ac", "1", "-ar", "48000", "-c:a", "pcm_s16le",
+            str(audio_src)])
+
+        # Extrair amostra para clonagem de voz se necessario
+        voice_sample = None
+        if args.clonar_voz:
+            voice_sample = extract_voice_sample(audio_src, workdir)
+
+        # Obter duracao do video/audio
+        video_duration_s = 0
+        try:
+            import subprocess as _sp
+            probe = _sp.run(["ffprobe", "-v", "quiet", "-show_entries", "format=duration",
+                             "-of", "csv=p=0", str(audio_src)], capture_output=True, text=True, timeout=10)
+            video_duration_s = round(float(probe.stdout.strip()), 1)
+            print(f"[INFO] Duracao do video: {int(video_duration_s//60)}m{int(video_duration_s%60)}s")
+        except Exception:
+            pass
+        save_checkpoint(workdir, 2, "extraction", {"video_duration_s": video_duration_s})
+        tempos_etapas["1-2_extracao"] = time.time() - t_etapa
+
+        no_truncate = getattr(args, 'no_truncate', False)
+        if no_truncate:
+            print("[INFO] Modo --no-truncate ativado: frases completas, sync ajusta duracao")
+        cache_root = get_cache_root(args.cache_dir)
+        tm = TranslationMemory(cache_root) if cache_root else None
+        # Hash do audio de origem: chave do cache de ASR (compartilhado entre jobs)
+        fingerprint = audio_fingerprint(video_in) if cache_root else None
+        tts_cache = TTSCache(cache_root, args.tts_cache_mb) if cache_root else None
+        if tts_cache:
+            print(f"[INFO] Cache TTS: {tts_cache.root}")
+
+        stream = args.stream
+        if stream and len(langs) > 1:
+            stream = False
+            print("[WARN] --stream ignorado: varios idiomas em --tgt")
+        if stream:
+            stream, motivo = stream_supported(args)
+            if not stream:
+                print(f"[WARN] --stream ignorado: {motivo}")
+
+        if stream:
+            # ========== ETAPAS 3-7: em fluxo ==========
+            t_etapa = time.time()
+            (segs, segs_trad, seg_files, sr_segs, src_lang,
+             cps_original, trad_srt, stream_synced) = pipeline_streaming(
+                args, audio_src, workdir, voice_sample, tm, tts_cache, cache_root, no_truncate,
+                fingerprint=fingerprint
             )
+            save_checkpoint(workdir, 6, "tts")
+            tempos_etapas["3-6_fluxo"] = time.time() - t_etapa
         else:
-            segs_trad, trad_json, trad_srt = result
-    else:
-        segs_trad, trad_json, trad_srt = translate_segments_m2m100(
-            segs, src_lang, args.tgt, workdir, args.large_model, cps_original, no_truncate
-        )
-    save_checkpoint(workdir, 4, "translation")
-    tempos_etapas["4_traducao"] = time.time() - t_etapa
-
-    # ========== ETAPA 5: Split ==========
-    t_etapa = time.time()
-    segs_trad = split_long_segments(segs_trad, args.maxdur)
-    save_checkpoint(workdir, 5, "split")
-    tempos_etapas["5_split"] = time.time() - t_etapa
+            # ========== ETAPA 3: Transcricao ==========
+            t_etapa = time.time()
+            if args.asr == "parakeet":
+                asr_json, asr_srt, segs, detected_lang = run_stage(
+                    transcribe_parakeet, audio_src, workdir, args.src,
+                    model_name=args.parakeet_model,
+                    segment_pause=args.segment_pause,
+                    segment_max_words=args.segment_max_words
+                )
+            elif args.asr == "whisper":
+                # Auto-selecionar: usar OpenAI Whisper (PyTorch GPU) se CTranslate2 nao tem CUDA
+                import torch
+                use_openai_whisper = False
+                if torch.cuda.is_available():
+                    try:
+                        import ctranslate2
+                        ctranslate2.get_supported_compute_types("cuda")
+                    except (ValueError, Exception):
+                        # CTranslate2 sem CUDA - tentar openai-whisper para usar GPU
+                        try:
+                            import whisper
+                            use_openai_whisper = True
+                            print("[INFO] CTranslate2 sem CUDA - usando OpenAI Whisper com PyTorch GPU")
+                        except ImportError:
+                            print("[WARN] openai-whisper nao instalado - Whisper rodara em CPU via CTranslate2")
+
+                if use_openai_whisper:
+                    asr_json, asr_srt, segs, detected_lang = run_stage(
+                        transcribe_openai_whisper, audio_src, workdir, args.src, args.whisper_model,
+                        diarize=args.diarize, num_speakers=args.num_speakers
+                    )
+                else:
+                    asr_json, asr_srt, segs, detected_lang = run_stage(
+                        transcribe_faster_whisper, audio_src, workdir, args.src, args.whisper_model,
+                        diarize=args.diarize, num_speakers=args.num_speakers,
+                        chunked=args.asr_chunked, chunk_s=args.asr_chunk_s, asr_workers=args.asr_workers,
+                        cache_root=cache_root, fingerprint=fingerprint
+                    )
+            else:
+                asr_json, asr_srt, segs, detected_lang = run_stage(
+                    transcribe_faster_whisper, audio_src, workdir, args.src, args.whisper_model,
+                    diarize=args.diarize, num_speakers=args.num_speakers,
+                    chunked=args.asr_chunked, chunk_s=args.asr_chunk_s, asr_workers=args.asr_workers,
+                    cache_root=cache_root, fingerprint=fingerprint
+                )
+            save_checkpoint(workdir, 3, "transcription")
+            tempos_etapas["3_transcricao"] = time.time() - t_etapa
+
+            # Usar idioma detectado se nao foi especificado
+            src_lang = detected_lang or args.src
+            if not args.src:
+                print(f"[INFO] Usando idioma detectado: {src_lang}")
+
+            # Calcular CPS original para traducao adaptativa
+            cps_original = calcular_cps_original(audio_src, segs)
+            print(f"[INFO] CPS original calculado: {cps_original:.1f}")
+
+            if len(langs) > 1:
+                # ========== ETAPAS 4-9: por idioma ==========
+                t_etapa = time.time()
+                resultados = dublar_idiomas(
+                    args, langs, segs, src_lang, workdir, cps_original, no_truncate, tm, cache_root,
+                    voice_sample, tts_cache, video_duration_s
+                )
+                save_checkpoint(workdir, 9, "postprocess")
+                tempos_etapas["4-9_idiomas"] = time.time() - t_etapa
+            else:
+                # ========== ETAPA 4: Traducao ==========
+                t_etapa = time.time()
+                segs_trad, trad_json, trad_srt = run_translation(
+                    args, segs, src_lang, workdir, cps_original, no_truncate, tm, cache_root
+                )
+                save_checkpoint(workdir, 4, "translation")
+                tempos_etapas["4_traducao"] = time.time() - t_etapa
+
+                # ========== ETAPA 5: Split ==========
+                t_etapa = time.time()
+                segs_trad = split_long_segments(segs_trad, args.maxdur)
+                save_checkpoint(workdir, 5, "split")
+                tempos_etapas["5_split"] = time.time() - t_etapa
+
+                # ========== ETAPA 6: TTS ==========
+                t_etapa = time.time()
+                seg_files, sr_segs, tts_metrics = run_tts(args, segs_trad, workdir, voice_sample, tts_cache)
+
+                save_checkpoint(workdir, 6, "tts")
+                tempos_etapas["6_tts"] = time.time() - t_etapa
+
+                # ========== ETAPA 6.1: Fade ==========
+                if args.fade == 1:
+                    seg_files = apply_fade(seg_files, workdir)
+
+        cache_stats = {}
+        if tm is not None:
+            cache_stats["translation_memory"] = tm.stats()
+            tm.close()
+        if tts_cache is not None:
+            cache_stats["tts"] = tts_cache.stats()
+
+        if args.phase == "synth":
+            save_phase_state(workdir, {
+                "video_in": str(video_in),
+                "video_duration_s": video_duration_s,
+                "cps_original": cps_original,
+                "segs_trad": segs_trad,
+                "seg_files": [str(p) for p in seg_files],
+                "sr_segs": sr_segs,
+                "trad_srt": str(trad_srt),
+                "cache_stats": cache_stats,
+                "stream_synced": stream_synced,
+                "tempos_etapas": tempos_etapas,
+                "tempo_total": time.time() - tempo_inicio_total,
+            })
+            print("[INFO] Fase synth concluida (etapas 1-6)")
+            return
 
-    # ========== ETAPA 6: TTS ==========
-    t_etapa = time.time()
-    if args.tts == "xtts" and voice_sample:
-        result = tts_xtts_clone(segs_trad, workdir, args.tgt, voice_sample)
-        if result[0] is None:
-            print("[INFO] XTTS falhou, usando Edge...")
-            seg_files, sr_segs, tts_metrics = tts_edge(
-                segs_trad, workdir, args.tgt, voice=args.voice, rate=args.rate
-            )
-        else:
-            seg_files, sr_segs, tts_metrics = result
-    elif args.tts == "edge":
-        seg_files, sr_segs, tts_metrics = tts_edge(
-            segs_trad, workdir, args.tgt, voice=args.voice, rate=args.rate
+    if resultados is None:
+        # ========== ETAPA 7: Sincronizacao ==========
+        t_etapa = time.time()
+        # no --stream os segmentos ja chegam sincronizados
+        seg_files, video_extensions, timeline_segs = run_sync(
+            args, seg_files, segs_trad, workdir, sr_segs, synced=stream_synced
         )
-    elif args.tts == "bark":
-        voice = args.voice or "v2/pt_speaker_3"
-        seg_files, sr_segs, tts_metrics = tts_bark_optimized(
-            segs_trad, workdir,
-            text_temp=args.texttemp,
-            wave_temp=args.wavetemp,
-            history_prompt=voice,
-            max_retries=args.max_retries
-        )
-    else:  # piper
-        seg_files, sr_segs, tts_metrics = tts_piper(
-            segs_trad, workdir, args.tgt, model_path=args.voice
-        )
-
-    save_checkpoint(workdir, 6, "tts")
-    tempos_etapas["6_tts"] = time.time() - t_etapa
-
-    # ========== ETAPA 6.1: Fade ==========
-    if args.fade == 1:
-        seg_files = apply_fade(seg_files, workdir)
-
-    # ========== ETAPA 7: Sincronizacao ==========
-    t_etapa = time.time()
-    print("\n" + "="*60)
-    print("=== ETAPA 7: Sincronizacao ===")
-    print("="*60)
-
-    fixed = []
-    use_rb = not args.no_rubberband  # Usar rubberband por padrao
-
-    # Garantir que temos a mesma quantidade de segmentos e arquivos
-    n_segs = len(segs_trad)
-    n_files = len(seg_files)
-    if n_segs != n_files:
-        print(f"[WARN] Mismatch: {n_segs} segmentos vs {n_files} arquivos")
-
-    # Usar o menor para evitar index out of range, mas processar todos os arquivos
-    for i, p in enumerate(seg_files):
-        if i < len(segs_trad):
-            s = segs_trad[i]
-            target = max(0.05, s["end"] - s["start"])
-        else:
-            # Arquivo extra do split - usar duracao padrao
-            target = ffprobe_duration(p) or 2.0
-
-        if args.sync == "none":
-            fixed.append(p)
-        elif args.sync == "fit":
-            fixed.append(sync_fit_advanced(p, target, workdir, sr_segs,
-                                          args.tolerance, args.maxstretch, use_rb))
-        elif args.sync == "pad":
-            fixed.append(sync_pad(p, target, workdir, sr_segs))
-        elif args.sync == "smart":
-            fixed.append(sync_smart_advanced(p, target, workdir, sr_segs,
-                                            args.tolerance, args.maxstretch, use_rb))
-        elif args.sync == "extend":
-            # Modo extend: nao modifica audio, guarda para estender video depois
-            fixed.append(p)
-
-    # Para modo extend, calcular extensoes necessarias
-    video_extensions = []
-    if args.sync == "extend":
-        seg_files, video_extensions, _ = sync_extend_prepare(seg_files, segs_trad, workdir)
-    else:
-        seg_files = fixed
-    save_checkpoint(workdir, 7, "sync")
-    tempos_etapas["7_sync"] = time.time() - t_etapa
-
-    # ========== ETAPA 8: Concatenacao ==========
-    t_etapa = time.time()
-    dub_raw = concat_segments(seg_files, workdir, sr_segs)
-    save_checkpoint(workdir, 8, "concat")
-    tempos_etapas["8_concat"] = time.time() - t_etapa
-
-    # ========== ETAPA 9: Pos-processamento ==========
-    t_etapa = time.time()
-    dub_final = postprocess_audio(dub_raw, workdir, args.rate_audio)
-    save_checkpoint(workdir, 9, "postprocess")
-    tempos_etapas["9_postprocess"] = time.time() - t_etapa
+        save_checkpoint(workdir, 7, "sync")
+        tempos_etapas["7_sync"] = time.time() - t_etapa
+
+        # ========== ETAPA 8: Concatenacao ==========
+        t_etapa = time.time()
+        dub_raw = concat_segments(seg_files, workdir, sr_segs,
+                                  segments=timeline_segs, total_duration=video_duration_s)
+        save_checkpoint(workdir, 8, "concat")
+        tempos_etapas["8_concat"] = time.time() - t_etapa
+
+        # ========== ETAPA 9: Pos-processamento ==========
+        t_etapa = time.time()
+        dub_final = postprocess_audio(dub_raw, workdir, args.rate_audio)
+        save_checkpoint(workdir, 9, "postprocess")
+        tempos_etapas["9_postprocess"] = time.time() - t_etapa
 
     # ========== ETAPA 10: Mux ==========
     t_etapa = time.time()
-    if args.sync == "extend" and video_extensions:
-        mux_video_extended(video_in, dub_final, out_mp4, args.bitrate, video_extensions, workdir)
+    saidas = [out_mp4]
+    # Perfil de encode (so usado quando o video e reencodado: --sync extend)
+    encode = profile_from_args(args, default={"rapido": "rapido", "maximo": "maximo"}.get(args.qualidade))
+    if resultados is None:
+        if args.sync == "extend" and video_extensions:
+            mux_video_extended(video_in, dub_final, out_mp4, args.bitrate, video_extensions, workdir,
+                               render=args.extend_render, encode=encode)
+        else:
+            mux_video(video_in, dub_final, out_mp4, args.bitrate)
+    elif args.sync == "extend":
+        # Cada idioma estende o video em pontos diferentes: um arquivo por idioma
+        saidas = []
+        for r in resultados:
+            out_lang = out_mp4.with_name(f"{out_mp4.stem}_{r['tgt']}{out_mp4.suffix}")
+            if r["video_extensions"]:
+                mux_video_extended(video_in, r["dub_final"], out_lang, args.bitrate,
+                                   r["video_extensions"], r["workdir"], render=args.extend_render,
+                                   encode=encode)
+            else:
+                mux_video(video_in, r["dub_final"], out_lang, args.bitrate)
+            saidas.append(out_lang)
     else:
-        mux_video(video_in, dub_final, out_mp4, args.bitrate)
+        mux_video_multi(video_in, [(r["tgt"], r["dub_final"]) for r in resultados], out_mp4, args.bitrate)
     save_checkpoint(workdir, 10, "mux")
     tempos_etapas["10_mux"] = time.time() - t_etapa
 
@@ -3217,19 +5231,30 @@ Exemplos:
     tempo_total = time.time() - tempo_inicio_total
 
     # ========== Metricas ==========
-    metrics = calculate_quality_metrics(segs_trad, seg_files, workdir)
+    if resultados is None:
+        metrics = calculate_quality_metrics(segs_trad, seg_files, workdir, cache_stats=cache_stats)
+    else:
+        metrics = {
+            r["tgt"]: calculate_quality_metrics(r["segs_trad"], r["seg_files"], r["workdir"],
+                                                cache_stats=cache_stats)
+            for r in resultados
+        }
+        for r in resultados:
+            for etapa, t in r["tempos"].items():
+                tempos_etapas[f"{etapa}_{r['tgt']}"] = t
 
     # ========== Logs finais ==========
     logs = {
         "version": VERSION,
         "timestamp": datetime.now().isoformat(),
         "input_video": str(video_in),
-        "output_video": str(out_mp4),
+        "output_video": str(out_mp4) if len(saidas) == 1 else [str(p) for p in saidas],
         "config": {
             "src": args.src,
             "tgt": args.tgt,
             "tradutor": args.tradutor,
             "modelo_llm": args.modelo if args.tradutor == "ollama" else None,
+            "m2m_backend": args.m2m_backend,
             "tts": args.tts,
             "voice": args.voice,
             "clonar_voz": args.clonar_voz,
@@ -3237,6 +5262,8 @@ Exemplos:
             "sync": args.sync,
             "tolerance": args.tolerance,
             "maxstretch": args.maxstretch,
+            "sync_engine": args.sync_engine,
+            "sync_workers": args.sync_workers,
             "cps_original": cps_original,
             "qualidade": args.qualidade,
             "seed": GLOBAL_SEED,
@@ -3256,10 +5283,18 @@ Exemplos:
     print("  DUBLAGEM CONCLUIDA!")
     print("="*60)
     print(f"\n  Saidas:")
-    print(f"    Video: {out_mp4}")
-    print(f"    Legendas: {trad_srt}")
-    print(f"    Logs: {workdir}/logs.json")
-    print(f"    Metricas: {workdir}/quality_metrics.json")
+    if resultados is None:
+        print(f"    Video: {out_mp4}")
+        print(f"    Legendas: {trad_srt}")
+        print(f"    Logs: {workdir}/logs.json")
+        print(f"    Metricas: {workdir}/quality_metrics.json")
+    else:
+        for p in saidas:
+            print(f"    Video: {p}")
+        for r in resultados:
+            print(f"    Legendas ({r['tgt']}): {r['trad_srt']}")
+        print(f"    Logs: {workdir}/logs.json")
+        print(f"    Metricas: {workdir}/lang_*/quality_metrics.json")
     print(f"\n  Intermediarios em: {workdir}/")
 
     # Exibir tempos de cada etapa
@@ -3269,6 +5304,8 @@ Exemplos:
     nomes_etapas = {
         "1-2_extracao": "1-2. Extracao de audio",
         "3_transcricao": "3. Transcricao (Whisper)",
+        "3-6_fluxo": "3-7. ASR/traducao/TTS em fluxo",
+        "4-9_idiomas": "4-9. Traducao/TTS/sync por idioma",
         "4_traducao": "4. Traducao",
         "5_split": "5. Split de segmentos",
         "6_tts": "6. Sintese de voz (TTS)",
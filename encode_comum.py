@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""Perfis de encode de video (libx264) compartilhados por dublar_pro_v5 e clipar_v1.
+
+Um perfil junta preset, CRF e threads do x264; o operador troca latencia por
+qualidade por job (--encode-profile, ou --encode-preset/--encode-crf avulsos).
+Trechos de imagem parada (freeze frames do modo extend) usam -tune stillimage.
+
+Corte de clips frame-accurate: -c copy so comeca em keyframe, entao o corte
+reencoda apenas o GOP inicial (do inicio pedido ate o proximo keyframe), copia
+o resto do video e junta os dois pelo concat demuxer.
+"""
+
+import bisect
+import subprocess
+from pathlib import Path
+
+# Perfis de encode: preset/CRF do libx264. threads=0 deixa o x264 decidir (todos os nucleos).
+ENCODE_PROFILES = {
+    "rapido":     {"preset": "veryfast", "crf": 23, "threads": 0},
+    "balanceado": {"preset": "fast",     "crf": 18, "threads": 0},
+    "maximo":     {"preset": "slow",     "crf": 16, "threads": 0},
+}
+DEFAULT_PROFILE = "balanceado"
+
+X264_PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast",
+                "medium", "slow", "slower", "veryslow")
+
+
+def encode_profile(name: str | None = None, preset: str | None = None, crf: float | None = None,
+                   threads: int | None = None, x264_params: str | None = None) -> dict:
+    """Perfil nomeado com os ajustes avulsos por cima (None = valor do perfil)."""
+    profile = dict(ENCODE_PROFILES.get(name or DEFAULT_PROFILE, ENCODE_PROFILES[DEFAULT_PROFILE]))
+    profile["name"] = name or DEFAULT_PROFILE
+    if preset:
+        profile["preset"] = preset
+    if crf is not None:
+        profile["crf"] = crf
+    if threads is not None:
+        profile["threads"] = threads
+    if x264_params:
+        profile["x264_params"] = x264_params
+    return profile
+
+
+def add_encode_args(parser) -> None:
+    """Flags --encode-* comuns aos scripts (argparse)."""
+    parser.add_argument("--encode-profile", choices=list(ENCODE_PROFILES), default=None, dest="encode_profile",
+                        help=f"Perfil de encode de video (padrao: {DEFAULT_PROFILE})")
+    parser.add_argument("--encode-preset", choices=list(X264_PRESETS), default=None, dest="encode_preset",
+                        help="Preset libx264 (sobrepoe o perfil)")
+    parser.add_argument("--encode-crf", type=float, default=None, dest="encode_crf",
+                        help="CRF libx264 (sobrepoe o perfil; menor = melhor)")
+    parser.add_argument("--encode-threads", type=int, default=None, dest="encode_threads",
+                        help="Threads do encoder (0=todos os nucleos)")
+    parser.add_argument("--x264-params", default=None, dest="x264_params",
+                        help="Parametros extras do x264 (ex: aq-mode=3:deblock=-1,-1)")
+
+
+def profile_from_args(args, default: str | None = None) -> dict:
+    """encode_profile() a partir das flags de add_encode_args."""
+    return encode_profile(args.encode_profile or default, args.encode_preset, args.encode_crf,
+                          args.encode_threads, args.x264_params)
+
+
+def x264_args(profile: dict | None = None, still: bool = False, pix_fmt: str = "yuv420p",
+              x264_params: str | None = None) -> list[str]:
+    """Argumentos ffmpeg de video para o perfil (still=True: -tune stillimage).
+
+    x264_params: parametros extras, somados aos do perfil.
+    """
+    profile = profile or encode_profile()
+    args = ["-c:v", "libx264",
+            "-preset", profile["preset"],
+            "-crf", f"{profile['crf']:g}",
+            "-pix_fmt", pix_fmt]
+    if still:
+        args += ["-tune", "stillimage"]
+    if profile.get("threads"):
+        args += ["-threads", str(profile["threads"])]
+    params = ":".join(p for p in (profile.get("x264_params"), x264_params) if p)
+    if params:
+        args += ["-x264-params", params]
+    return args
+
+
+# Parametros do stream que precisam ser iguais para emendar um trecho
+# reencodado com o original em stream copy (smart render)
+SPLICE_KEYS = ("codec_name", "profile", "level", "pix_fmt", "width", "height",
+               "sample_aspect_ratio", "time_base", "r_frame_rate")
+
+# Nome do profile H.264 no ffprobe -> -profile:v do libx264
+_X264_PROFILES = {"constrained baseline": "baseline", "baseline": "baseline",
+                  "main": "main", "high": "high"}
+
+
+def probe_video_stream(path) -> dict:
+    """SPLICE_KEYS do primeiro stream de video ({} se falhar)."""
+    try:
+        out = subprocess.check_output([
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=" + ",".join(SPLICE_KEYS),
+            "-of", "default=nw=1",
+            str(path)
+        ], text=True, timeout=30)
+        return dict(line.split("=", 1) for line in out.splitlines() if "=" in line)
+    except Exception:
+        return {}
+
+
+def x264_splice_args(stream: dict, profile: dict | None = None, still: bool = False) -> list[str]:
+    """x264_args para um trecho que sera emendado no original por stream copy.
+
+    Copia profile, level, pix_fmt e timescale do stream de origem (probe_video_stream)
+    e repete SPS/PPS em cada keyframe: o mp4 final so leva o avcC do primeiro
+    trecho, entao os trechos reencodados carregam os proprios parametros em banda.
+    """
+    args = x264_args(profile, still=still, pix_fmt=stream.get("pix_fmt") or "yuv420p",
+                     x264_params="repeat-headers=1")
+    x264_profile = _X264_PROFILES.get(stream.get("profile", "").lower())
+    if x264_profile:
+        args += ["-profile:v", x264_profile]
+    try:
+        level = int(stream.get("level", ""))
+    except ValueError:
+        level = 0
+    if level > 0:
+        args += ["-level:v", f"{level / 10:g}"]
+    _, _, den = stream.get("time_base", "").partition("/")
+    if den.isdigit():
+        args += ["-video_track_timescale", den]
+    return args
+
+
+def splice_mismatch(source: dict, piece: dict) -> list[str]:
+    """SPLICE_KEYS em que o trecho difere da origem (["profile: Main != High", ...])."""
+    diff = []
+    for key in SPLICE_KEYS:
+        a, b = source.get(key), piece.get(key)
+        if key == "profile":
+            a, b = _X264_PROFILES.get((a or "").lower(), a), _X264_PROFILES.get((b or "").lower(), b)
+        if a != b:
+            diff.append(f"{key}: {piece.get(key)} != {source.get(key)}")
+    return diff
+
+
+def probe_video_codec(path) -> tuple[str | None, str | None]:
+    """(codec_name, pix_fmt) do primeiro stream de video; (None, None) se falhar."""
+    try:
+        out = subprocess.check_output([
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=codec_name,pix_fmt",
+            "-of", "default=nw=1",
+            str(path)
+        ], text=True, timeout=30)
+        info = dict(line.split("=", 1) for line in out.split() if "=" in line)
+        return info.get("codec_name"), info.get("pix_fmt")
+    except Exception:
+        return None, None
+
+
+def probe_keyframes(path, start: float | None = None, end: float | None = None,
+                    intervals: list[tuple[float, float]] | None = None) -> list[float]:
+    """Timestamps (s) dos keyframes do primeiro stream de video.
+
+    Le so o indice de pacotes (flag K), sem decodificar. start/end (ou varios
+    intervals) limitam a leitura (-read_intervals) ao trecho dos clips.
+    """
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0"]
+    if start is not None or end is not None:
+        intervals = [(start, end)]
+    if intervals:
+        cmd += ["-read_intervals", ",".join(
+            (f"{ini:.3f}" if ini is not None else "") + "%" + (f"{fim:.3f}" if fim is not None else "")
+            for ini, fim in intervals
+        )]
+    cmd += ["-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(path)]
+    try:
+        out = subprocess.check_output(cmd, text=True, timeout=300)
+    except Exception:
+        return []
+    keyframes = set()
+    for line in out.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags:
+            try:
+                keyframes.add(float(pts))
+            except ValueError:
+                pass
+    return sorted(keyframes)
+
+
+def probe_dts_delay(path) -> float:
+    """Atraso pts - dts (s) do primeiro keyframe (B-frames: dts comeca antes do pts).
+
+    O outpoint do concat demuxer e comparado com o dts dos pacotes; para parar
+    exatamente antes de um keyframe o outpoint precisa descontar esse atraso.
+    """
+    try:
+        out = subprocess.check_output([
+            "ffprobe", "-v", "error", "-select_streams", "v:0", "-read_intervals", "%+#8",
+            "-show_entries", "packet=pts_time,dts_time,flags", "-of", "csv=p=0", str(path)
+        ], text=True, timeout=30)
+    except Exception:
+        return 0.0
+    for line in out.splitlines():
+        pts, dts, flags = (line.split(",") + ["", ""])[:3]
+        if "K" in flags:
+            try:
+                return max(0.0, float(pts) - float(dts))
+            except ValueError:
+                return 0.0
+    return 0.0
+
+
+# Janela lida apos o inicio de cada clip para achar o proximo keyframe (GOPs de ate 20s)
+KEYFRAME_WINDOW_S = 20.0
+
+
+def _run(cmd: list) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, capture_output=True, text=True)
+
+
+def cut_clip(source, start: float, end: float, out_path, profile: dict | None = None,
+             mode: str = "accurate") -> subprocess.CompletedProcess:
+    """Corta [start, end) de source em out_path.
+
+    mode: "copy" = -c copy (comeca no keyframe anterior ao start),
+          "accurate" = reencoda so o GOP inicial e copia o resto (fonte H.264),
+          "encode" = reencoda o clip inteiro.
+    Retorna o CompletedProcess do ultimo ffmpeg (returncode != 0 = falha).
+    """
+    duration = end - start
+    out_path = Path(out_path)
+    copy_cmd = ["ffmpeg", "-y", "-ss", f"{start:.3f}", "-i", str(source), "-t", f"{duration:.3f}",
+                "-c", "copy", str(out_path)]
+    encode_cmd = ["ffmpeg", "-y", "-ss", f"{start:.3f}", "-i", str(source), "-t", f"{duration:.3f}",
+                  *x264_args(profile), "-c:a", "aac", "-b:a", "192k", str(out_path)]
+    if mode == "copy":
+        return _run(copy_cmd)
+    if mode == "encode":
+        return _run(encode_cmd)
+
+    codec, pix_fmt = probe_video_codec(source)
+    if codec != "h264" or pix_fmt not in ("yuv420p", "yuvj420p"):
+        # Sem como emendar GOP reencodado com o original: clip inteiro reencodado
+        return _run(encode_cmd)
+
+    keyframes = probe_keyframes(source, start, end)
+    i = bisect.bisect_left(keyframes, start - 0.001)
+    kf = keyframes[i] if i < len(keyframes) else None
+    if kf is not None and kf - start < 0.001:
+        return _run(copy_cmd)  # start ja cai em keyframe
+    if kf is None or kf >= end:
+        return _run(encode_cmd)  # clip menor que um GOP
+
+    head = out_path.with_name(out_path.stem + "_head.mp4")
+    tail = out_path.with_name(out_path.stem + "_tail.mp4")
+    lista = out_path.with_name(out_path.stem + "_concat.txt")
+    try:
+        # GOP inicial reencodado (frame-accurate) + resto copiado a partir do keyframe
+        result = _run(["ffmpeg", "-y", "-ss", f"{start:.3f}", "-i", str(source), "-t", f"{kf - start:.6f}",
+                       "-an", *x264_args(profile), str(head)])
+        if result.returncode != 0:
+            return result
+        result = _run(["ffmpeg", "-y", "-ss", f"{kf:.6f}", "-i", str(source), "-t", f"{end - kf:.6f}",
+                       "-an", "-c:v", "copy", str(tail)])
+        if result.returncode != 0:
+            return result
+        lista.write_text(f"file '{head.name}'\nfile '{tail.name}'\n", encoding="utf-8")
+        # Audio sai do original em um pedaco so (sem emenda), video pelo concat
+        return _run(["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(lista),
+                     "-ss", f"{start:.3f}", "-t", f"{duration:.3f}", "-i", str(source),
+                     "-map", "0:v:0", "-map", "1:a:0?", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k",
+                     "-shortest", str(out_path)])
+    finally:
+        for p in (head, tail, lista):
+            p.unlink(missing_ok=True)
+
+
+def probe_duration(path) -> float | None:
+    """Duracao (s) do container; None se o ffprobe falhar."""
+    try:
+        out = subprocess.check_output([
+            "ffprobe", "-v", "error", "-show_entries", "format=duration",
+            "-of", "default=nw=1:nk=1", str(path)
+        ], text=True, timeout=30)
+        return float(out.strip())
+    except Exception:
+        return None
+
+
+# Folga aceita entre a duracao do clip cortado e end - start (arredondamento de frames/AAC)
+CLIP_DURATION_TOL_S = 0.25
+
+
+def cut_clips_batch(source, clips: list[tuple[float, float, Path]], profile: dict | None = None,
+                    mode: str = "accurate") -> tuple[list[bool], str]:
+    """Corta varios clips lendo a fonte uma vez so (uma entrada, varias saidas).
+
+    clips: [(start, end, out_path)]. Um seek ate o keyframe antes do primeiro
+    clip e leitura sequencial ate o fim do ultimo; cada clip e uma saida com
+    -ss/-t proprios. Com -c copy o ffmpeg descarta pela dts os pacotes antes do
+    -ss de saida, entao trechos copiados comecam em keyframe - atraso da dts
+    (senao o keyframe inicial cai e o clip so comeca no GOP seguinte). Custo da
+    leitura unica: se alguma saida reencoda, o video entre o primeiro e o
+    ultimo clip e decodificado inteiro. No modo accurate o clip sai em tres
+    partes (GOP inicial reencodado, resto copiado, audio) emendadas depois a
+    partir dos arquivos locais.
+    Cada clip pronto tem a duracao conferida; retorna (ok por clip, stderr do
+    ffmpeg) e os que falharem devem ser refeitos com cut_clip().
+    """
+    if not clips:
+        return [], ""
+    accurate = False
+    if mode == "accurate":
+        codec, pix_fmt = probe_video_codec(source)
+        accurate = codec == "h264" and pix_fmt in ("yuv420p", "yuvj420p")
+    keyframes = []
+    atraso = 0.0
+    if mode == "copy" or accurate:
+        keyframes = probe_keyframes(source, intervals=[(s, min(e, s + KEYFRAME_WINDOW_S)) for s, e, _ in clips])
+        atraso = probe_dts_delay(source)
+
+    def kf_antes(t):
+        i = bisect.bisect_right(keyframes, t + 0.001)
+        return keyframes[i - 1] if i else None
+
+    def kf_depois(t):
+        i = bisect.bisect_left(keyframes, t - 0.001)
+        return keyframes[i] if i < len(keyframes) else None
+
+    copia = ["-map", "0:v:0", "-map", "0:a:0?", "-c", "copy"]
+    encode = ["-map", "0:v:0", "-map", "0:a:0?", *x264_args(profile), "-c:a", "aac", "-b:a", "192k"]
+    saidas = []     # (ini, fim, copiado, args, path)
+    emendas = {}    # indice do clip -> (head, tail, audio)
+    esperado = []   # duracao esperada de cada clip (copy comeca no keyframe anterior)
+    for n, (start, end, out_path) in enumerate(clips):
+        out_path = Path(out_path)
+        if mode == "copy":
+            ini = kf_antes(start)
+            ini = start if ini is None else ini
+            saidas.append((ini, end, True, copia, out_path))
+            esperado.append(end - ini)
+            continue
+        esperado.append(end - start)
+        kf = kf_depois(start) if accurate else None
+        if accurate and kf is not None and kf - start < 0.001:
+            saidas.append((start, end, True, copia, out_path))  # start ja cai em keyframe
+        elif not accurate or kf is None or kf >= end:
+            saidas.append((start, end, False, encode, out_path))
+        else:
+            head = out_path.with_name(out_path.stem + "_head.mp4")
+            tail = out_path.with_name(out_path.stem + "_tail.mp4")
+            audio = out_path.with_name(out_path.stem + "_audio.m4a")
+            saidas.append((start, kf, False, ["-map", "0:v:0", "-an", *x264_args(profile)], head))
+            saidas.append((kf, end, True, ["-map", "0:v:0", "-an", "-c:v", "copy"], tail))
+            saidas.append((start, end, False, ["-map", "0:a:0", "-vn", "-c:a", "aac", "-b:a", "192k"], audio))
+            emendas[n] = (head, tail, audio)
+
+    # Um seek so: keyframe antes do primeiro trecho (saidas copiadas comecam em keyframe)
+    seek = min(ini for ini, _, _, _, _ in saidas)
+    seek = kf_antes(seek) if kf_antes(seek) is not None else seek
+    cmd = ["ffmpeg", "-y", "-ss", f"{seek:.6f}", "-i", str(source)]
+    for ini, fim, copiado, args, path in saidas:
+        # Copia: -ss pela dts do keyframe (folga de 1ms contra arredondamento)
+        corte = ini - seek - (atraso + 0.001 if copiado else 0.0)
+        if corte > 0:
+            cmd += ["-ss", f"{corte:.6f}"]
+        cmd += ["-t", f"{fim - seek - max(corte, 0.0):.6f}", *args, str(path)]
+    result = _run(cmd)
+
+    ok = []
+    for n, (start, end, out_path) in enumerate(clips):
+        out_path = Path(out_path)
+        good = result.returncode == 0
+        if good and n in emendas:
+            head, tail, audio = emendas[n]
+            lista = out_path.with_name(out_path.stem + "_concat.txt")
+            lista.write_text(f"file '{head.name}'\nfile '{tail.name}'\n", encoding="utf-8")
+            final = _run(["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(lista), "-i", str(audio),
+                          "-map", "0:v:0", "-map", "1:a:0", "-c", "copy", "-shortest", str(out_path)])
+            lista.unlink(missing_ok=True)
+            good = final.returncode == 0
+        for p in emendas.get(n, ()):
+            p.unlink(missing_ok=True)
+        duracao = probe_duration(out_path) if good and out_path.exists() else None
+        if duracao is None or abs(duracao - esperado[n]) > CLIP_DURATION_TOL_S:
+            if duracao is not None:
+                print(f"[warn] Clip {out_path.name}: duracao {duracao:.2f}s != {esperado[n]:.2f}s", flush=True)
+            good = False
+        ok.append(good)
+    return ok, result.stderr
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Servidor de modelos - mantem Whisper, M2M100, XTTS e pyannote carregados entre jobs.
+
+Os jobs (dublar_pro_v5.py --model-server URL) enviam as etapas pesadas para
+ca em vez de importar torch e recarregar os modelos do disco a cada execucao.
+Os modelos ficam no MODEL_POOL do pipeline, com LRU por RAM/VRAM
+(MODEL_POOL_MAX_RAM_MB / MODEL_POOL_MAX_VRAM_MB). Uma etapa por vez.
+
+Uso:
+    python servidor_modelos.py --host 127.0.0.1 --port 8765
+    python dublar_pro_v5.py --in video.mp4 --tgt pt --model-server http://127.0.0.1:8765
+"""
+
+import argparse
+import io
+import json
+import sys
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import dublar_pro_v5 as pipeline
+
+_run_lock = threading.Lock()
+
+
+class _StdoutRouter(io.TextIOBase):
+    """sys.stdout do servidor: cada print vai para o log da etapa certa.
+
+    redirect_stdout troca o sys.stdout global, entao prints de outras
+    requisicoes (/health, log_message) caiam no log da etapa e vice-versa.
+    As threads do servidor marcam o proprio destino (thread-local); threads
+    criadas pela etapa (pools, asyncio.to_thread) nao tem marca e escrevem no
+    log da etapa em execucao - so roda uma por vez (_run_lock).
+    """
+
+    def __init__(self, real):
+        self.real = real
+        self.local = threading.local()
+        self.stage_log = None
+
+    def _target(self):
+        if hasattr(self.local, "log"):
+            return self.local.log or self.real
+        return self.stage_log or self.real
+
+    def write(self, s):
+        return self._target().write(s)
+
+    def flush(self):
+        self._target().flush()
+
+    def writable(self):
+        return True
+
+
+_stdout = _StdoutRouter(sys.stdout)
+
+
+def run_request(req: dict) -> tuple:
+    """Executa uma etapa do pipeline. Retorna (status HTTP, resposta)."""
+    name = req.get("func")
+    if name not in pipeline.REMOTE_STAGES:
+        return 400, {"error": f"etapa nao permitida: {name}"}
+
+    with _run_lock:
+        caches = []
+        args = pipeline._rpc_decode(req.get("args", []), caches)
+        kwargs = pipeline._rpc_decode(req.get("kwargs", {}), caches)
+        if req.get("seed") is not None:
+            pipeline.GLOBAL_SEED = req["seed"]
+            pipeline.set_global_seed(req["seed"])
+
+        buf = io.StringIO()
+        status, resp = 200, {}
+        _stdout.local.log = _stdout.stage_log = buf
+        try:
+            result = getattr(pipeline, name)(*args, **kwargs)
+            resp["result"] = pipeline._rpc_encode(result, [])
+        except BaseException as e:  # inclui sys.exit() dentro da etapa
+            if isinstance(e, KeyboardInterrupt):
+                raise
+            traceback.print_exc(file=buf)
+            status, resp = 500, {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            _stdout.local.log = _stdout.stage_log = None
+
+        resp["log"] = buf.getvalue()
+        resp["cache_stats"] = [{"hits": c.hits, "misses": c.misses} for c in caches]
+        for c in caches:
+            if isinstance(c, pipeline.TranslationMemory):
+                c.close()
+    return status, resp
+
+
+class Handler(BaseHTTPRequestHandler):
+    def setup(self):
+        super().setup()
+        _stdout.local.log = None  # prints desta thread vao para o terminal
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok", "busy": _run_lock.locked(),
+                             "models": pipeline.MODEL_POOL.stats()})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            req = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "JSON invalido"})
+            return
+
+        if self.path == "/run":
+            self._send(*run_request(req))
+        elif self.path == "/release":
+            with _run_lock:
+                pipeline.MODEL_POOL.release(req.get("kind"), force=True)
+            self._send(200, {"models": pipeline.MODEL_POOL.stats()})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def log_message(self, fmt, *args):
+        print(f"[servidor_modelos] {self.address_string()} {fmt % args}", flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Servidor de modelos residente do Dublar Pro")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    pipeline.MODEL_POOL.resident = True
+    sys.stdout = _stdout
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"[servidor_modelos] Escutando em http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
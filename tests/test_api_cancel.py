@@ -0,0 +1,49 @@
+# Testes do cancelamento de jobs (fila e endpoint DELETE /api/jobs/{id})
+import asyncio
+
+import pytest
+
+import api.job_manager as jm
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(jm, "JOBS_DIR", tmp_path)
+    return jm.JobManager()
+
+
+def criar(manager, **config):
+    return asyncio.run(manager.create_job({"job_type": "download", "url": "x", **config}))
+
+
+def test_cancelar_job_na_fila(manager):
+    job = criar(manager)
+    assert job.status == "queued"
+
+    assert asyncio.run(manager.cancel_job(job.id))
+    assert job.status == "cancelled"
+    assert job.finished_at is not None
+    # O escalonador descarta o job cancelado sem ocupar slots
+    assert manager._admit() == []
+    assert manager.scheduler_status()["pending"] == []
+
+
+def test_cancelar_job_terminado_nao_muda_status(manager):
+    job = criar(manager)
+    job.status = "completed"
+    assert not asyncio.run(manager.cancel_job(job.id))
+    assert job.status == "completed"
+
+
+def test_endpoint_cancela_job_na_fila(manager, monkeypatch):
+    pytest.importorskip("fastapi")
+    import api.server as server
+    monkeypatch.setattr(server, "job_manager", manager)
+
+    job = criar(manager)
+    assert asyncio.run(server.cancel_job(job.id)) == {"status": "cancelled"}
+    assert job.status == "cancelled"
+    assert manager._admit() == []
+
+    # Job ja terminado: so informa o status
+    assert asyncio.run(server.cancel_job(job.id)) == {"status": "cancelled"}
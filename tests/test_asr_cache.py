@@ -0,0 +1,43 @@
+# Testes do cache de ASR compartilhado (asr_comum.ASRCache)
+from concurrent.futures import ThreadPoolExecutor
+
+from asr_comum import ASRCache, BATCHED_IGNORED_OPTIONS, WHISPER_OPTIONS, decode_options
+
+SEGS = [{"start": 0.0, "end": 1.0, "text": "ola"}]
+
+
+def test_modos_de_decode_tem_chaves_distintas(tmp_path):
+    cache = ASRCache(tmp_path)
+    seq = decode_options(WHISPER_OPTIONS)
+    cpu = decode_options(WHISPER_OPTIONS, chunked=True, device="cpu")
+    gpu = decode_options(WHISPER_OPTIONS, chunked=True, device="cuda")
+
+    cache.put("abc", "medium", "en", cpu, SEGS, "en")
+    assert cache.get("abc", "medium", "en", cpu)["segments"] == SEGS
+    assert cache.get("abc", "medium", "en", seq) is None
+    assert cache.get("abc", "medium", "en", gpu) is None
+
+
+def test_opcoes_do_modo_em_lote():
+    gpu = decode_options(WHISPER_OPTIONS, chunked=True, device="cuda")
+    assert gpu["mode"] == "batched"
+    assert not set(BATCHED_IGNORED_OPTIONS) & set(gpu)
+    # Sem blocos o device nao muda o decode
+    assert decode_options(WHISPER_OPTIONS, device="cuda") == decode_options(WHISPER_OPTIONS)
+
+
+def test_idioma_detectado_tambem_indexado(tmp_path):
+    cache = ASRCache(tmp_path)
+    opts = decode_options(WHISPER_OPTIONS)
+    cache.put("abc", "small", None, opts, SEGS, "pt", 0.9)
+    assert cache.get("abc", "small", "pt", opts)["language"] == "pt"
+    assert cache.get("abc", "small", None, opts)["language_probability"] == 0.9
+
+
+def test_put_concorrente(tmp_path):
+    cache = ASRCache(tmp_path)
+    opts = decode_options(WHISPER_OPTIONS)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: cache.put("abc", "small", "en", opts, SEGS * i, "en"), range(1, 33)))
+    assert len(cache.get("abc", "small", "en", opts)["segments"]) >= 1
+    assert not list(cache.root.glob("*/*.tmp"))
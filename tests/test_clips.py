@@ -0,0 +1,80 @@
+# Testes do corte de clips em lote (encode_comum.cut_clips_batch) com ffmpeg real
+import shutil
+import subprocess
+
+import pytest
+
+import encode_comum
+from encode_comum import CLIP_DURATION_TOL_S, cut_clip, cut_clips_batch, probe_duration
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+                                reason="ffmpeg/ffprobe nao instalados")
+
+FPS = 25
+GOP_S = 2.0
+# Clips fora de ordem, sobrepostos, com e sem start em keyframe (GOP de 2s)
+CLIPS = [(3.3, 8.1), (12.0, 15.0), (5.0, 9.0)]
+
+
+@pytest.fixture(scope="module")
+def video(tmp_path_factory):
+    """20s a 25 fps com audio, keyframe a cada 2s"""
+    path = tmp_path_factory.mktemp("clips") / "video.mp4"
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"testsrc2=d=20:s=160x120:r={FPS}",
+                    "-f", "lavfi", "-i", "sine=f=440:d=20", "-c:v", "libx264", "-g", "50",
+                    "-keyint_min", "50", "-sc_threshold", "0", "-pix_fmt", "yuv420p",
+                    "-c:a", "aac", "-shortest", str(path)], check=True)
+    return path
+
+
+def contar_quadros(path):
+    r = subprocess.run(["ffmpeg", "-v", "error", "-i", str(path), "-map", "0:v:0", "-f", "framecrc", "-"],
+                       capture_output=True, text=True, check=True)
+    return sum(1 for line in r.stdout.splitlines() if line and not line.startswith("#"))
+
+
+@pytest.mark.parametrize("mode", ["accurate", "copy", "encode"])
+def test_lote_respeita_duracao_dos_clips(video, tmp_path, mode):
+    clips = [(start, end, tmp_path / f"clip_{i:02d}.mp4") for i, (start, end) in enumerate(CLIPS, 1)]
+
+    ok, stderr = cut_clips_batch(video, clips, None, mode=mode)
+
+    assert ok == [True] * len(CLIPS), stderr[-300:]
+    for start, end, path in clips:
+        if mode == "copy":
+            start = start // GOP_S * GOP_S  # copy comeca no keyframe anterior
+        assert probe_duration(path) == pytest.approx(end - start, abs=CLIP_DURATION_TOL_S)
+        assert contar_quadros(path) == pytest.approx((end - start) * FPS, abs=5)
+
+
+@pytest.mark.parametrize("mode", ["accurate", "copy", "encode"])
+def test_lote_abre_a_fonte_uma_vez(video, tmp_path, monkeypatch, mode):
+    comandos = []
+    run = encode_comum._run
+    monkeypatch.setattr(encode_comum, "_run", lambda cmd: comandos.append(cmd) or run(cmd))
+    clips = [(start, end, tmp_path / f"clip_{i:02d}.mp4") for i, (start, end) in enumerate(CLIPS, 1)]
+
+    cut_clips_batch(video, clips, None, mode=mode)
+
+    # Primeiro comando e o corte; os seguintes so emendam arquivos locais
+    assert comandos[0].count(str(video)) == 1
+    assert all(str(video) not in cmd for cmd in comandos[1:])
+
+
+def test_lote_igual_ao_corte_um_a_um(video, tmp_path):
+    clips = [(start, end, tmp_path / f"lote_{i:02d}.mp4") for i, (start, end) in enumerate(CLIPS, 1)]
+    cut_clips_batch(video, clips, None, mode="accurate")
+
+    for i, (start, end, path) in enumerate(clips, 1):
+        sozinho = tmp_path / f"sozinho_{i:02d}.mp4"
+        assert cut_clip(video, start, end, sozinho, None, mode="accurate").returncode == 0
+        assert contar_quadros(path) == pytest.approx(contar_quadros(sozinho), abs=1)
+
+
+def test_lote_marca_clip_com_duracao_errada(video, tmp_path):
+    # Clip alem do fim da fonte sai curto: precisa voltar como falha para ser refeito
+    clips = [(2.0, 4.0, tmp_path / "a.mp4"), (18.0, 25.0, tmp_path / "b.mp4")]
+
+    ok, _ = cut_clips_batch(video, clips, None, mode="encode")
+
+    assert ok == [True, False]
@@ -0,0 +1,121 @@
+# Testes do render do modo extend (freeze frames) com ffmpeg real
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+import dublar_pro_v5 as dp
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg nao instalado")
+
+FPS = 25
+
+
+@pytest.fixture(scope="module")
+def video(tmp_path_factory):
+    """10s a 25 fps (250 quadros), keyframe a cada 2s"""
+    path = tmp_path_factory.mktemp("extend") / "video.mp4"
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"testsrc2=d=10:s=160x120:r={FPS}",
+                    "-c:v", "libx264", "-g", "50", "-keyint_min", "50", "-sc_threshold", "0",
+                    "-pix_fmt", "yuv420p", str(path)], check=True)
+    return path
+
+
+def contar_quadros(path, graph=None):
+    cmd = ["ffmpeg", "-v", "error", "-i", str(path), "-map", "0:v:0"]
+    cmd += ["-vf", graph] if graph else ["-c", "copy"]
+    r = subprocess.run(cmd + ["-f", "framecrc", "-"], capture_output=True, text=True, check=True)
+    return sum(1 for line in r.stdout.splitlines() if line and not line.startswith("#"))
+
+
+def test_filtergraph_freeze_sem_sobra(video):
+    graph = dp.extend_filtergraph([{"timestamp": 4.0, "duration": 1.0}], FPS, 10.0)
+    assert contar_quadros(video, graph) == 250 + 25
+
+
+def test_filtergraph_tpad_estende_ate_o_audio(video):
+    # 10s + 1s de freeze = 11s de video; audio dublado com 11.5s
+    graph = dp.extend_filtergraph([{"timestamp": 4.0, "duration": 1.0}], FPS, 10.0, 11.5)
+    assert graph.index("tpad") < graph.index("setpts")
+    assert contar_quadros(video, graph) == pytest.approx(250 + 25 + 12.5, abs=0.5)
+
+
+@pytest.mark.skipif(shutil.which("ffprobe") is None, reason="ffprobe nao instalado")
+def test_mux_extend_nao_corta_o_audio(video, tmp_path):
+    wav = tmp_path / "dub.wav"
+    wavfile.write(str(wav), 16000, np.zeros(int(11.5 * 16000), dtype=np.int16))
+    out = tmp_path / "out.mp4"
+
+    dp.mux_video_extended(video, wav, out, "64k", [{"timestamp": 4.0, "duration": 1.0}], tmp_path)
+
+    assert contar_quadros(out) == pytest.approx(287.5, abs=0.5)
+    assert dp.ffprobe_duration(out) == pytest.approx(11.5, abs=0.1)
+
+
+precisa_ffprobe = pytest.mark.skipif(shutil.which("ffprobe") is None, reason="ffprobe nao instalado")
+
+
+@pytest.fixture(scope="module")
+def video_main(tmp_path_factory):
+    """Fonte com parametros diferentes do padrao do x264: Main@3.1, SAR 4:3, timescale 90000"""
+    path = tmp_path_factory.mktemp("smart") / "main.mp4"
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"testsrc2=d=10:s=176x144:r={FPS}",
+                    "-vf", "setsar=4/3", "-c:v", "libx264", "-profile:v", "main", "-level:v", "3.1",
+                    "-g", "50", "-keyint_min", "50", "-sc_threshold", "0", "-pix_fmt", "yuv420p",
+                    "-video_track_timescale", "90000", str(path)], check=True)
+    return path
+
+
+def test_x264_splice_args_copia_parametros_da_fonte():
+    from encode_comum import x264_splice_args
+    args = x264_splice_args({"profile": "Main", "level": "31", "pix_fmt": "yuvj420p", "time_base": "1/90000"})
+    assert args[args.index("-profile:v") + 1] == "main"
+    assert args[args.index("-level:v") + 1] == "3.1"
+    assert args[args.index("-pix_fmt") + 1] == "yuvj420p"
+    assert args[args.index("-video_track_timescale") + 1] == "90000"
+    assert "repeat-headers=1" in args[args.index("-x264-params") + 1]
+
+
+@precisa_ffprobe
+def test_smart_render_trechos_iguais_a_fonte(video_main, tmp_path):
+    from encode_comum import probe_video_stream, splice_mismatch
+    wav = tmp_path / "dub.wav"
+    wavfile.write(str(wav), 16000, np.zeros(11 * 16000, dtype=np.int16))
+    out = tmp_path / "out.mp4"
+
+    assert dp.mux_video_extended_smart(video_main, wav, out, "64k", [{"timestamp": 4.0, "duration": 1.0}],
+                                       tmp_path)
+
+    fonte = probe_video_stream(video_main)
+    assert fonte["profile"] == "Main" and fonte["sample_aspect_ratio"] == "4:3"
+    assert splice_mismatch(fonte, probe_video_stream(tmp_path / "smart_0000.mp4")) == []
+    # Emendas sem quadros repetidos nem dts fora de ordem
+    r = subprocess.run(["ffmpeg", "-v", "error", "-i", str(out), "-f", "null", "-"], capture_output=True, text=True)
+    assert r.returncode == 0 and r.stderr == ""
+    assert contar_quadros(out) == pytest.approx(275, abs=2)
+
+
+@precisa_ffprobe
+def test_smart_render_divergente_cai_no_encode_completo(video, tmp_path, monkeypatch):
+    import encode_comum
+    real = encode_comum.probe_video_stream
+
+    def probe(path):
+        info = real(path)
+        if "smart_" in str(path):
+            info["level"] = "40"  # trecho com level diferente da fonte
+        return info
+
+    monkeypatch.setattr(dp, "probe_video_stream", probe)
+    wav = tmp_path / "dub.wav"
+    wavfile.write(str(wav), 16000, np.zeros(11 * 16000, dtype=np.int16))
+    out = tmp_path / "out.mp4"
+    ext = [{"timestamp": 4.0, "duration": 1.0}]
+
+    assert not dp.mux_video_extended_smart(video, wav, out, "64k", ext, tmp_path)
+
+    dp.mux_video_extended(video, wav, out, "64k", ext, tmp_path, render="smart")
+    assert not (tmp_path / "smart_concat.txt").exists()
+    assert contar_quadros(out) == 275
@@ -0,0 +1,129 @@
+# Testes do escalonador de jobs por classe de recurso (JobManager._admit)
+import asyncio
+
+import pytest
+
+import api.job_manager as jm
+
+DUBLAGEM_GPU = {"job_type": "dubbing", "tgt_lang": "pt", "whisper_model": "large-v3", "tts_engine": "edge"}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(jm, "JOBS_DIR", tmp_path)
+    monkeypatch.setattr(jm, "SPLIT_PHASES", True)
+    for res, slots in {"gpu": 1, "cpu": 1, "io": 4}.items():
+        monkeypatch.setitem(jm.RESOURCE_SLOTS, res, slots)
+    return jm.JobManager()
+
+
+def enfileirar(manager, job_id, **config):
+    job = jm.Job(job_id, {"job_type": "download", **config})
+    manager.jobs[job_id] = job
+    manager._enqueue(job)
+    return job
+
+
+def test_fase_usa_so_a_classe_dominante(manager):
+    job = enfileirar(manager, "a", **DUBLAGEM_GPU)
+    # synth tem download (io), extraction/split (cpu) e transcricao (gpu)
+    assert job.resources == {"gpu"}
+    job.phase = 1
+    assert job.resources == {"cpu"}
+
+
+def test_synth_de_um_job_roda_com_assemble_de_outro(manager):
+    a = enfileirar(manager, "a", **DUBLAGEM_GPU)
+    a.status, a.phase = "running", 1
+    assert manager._admit() == [a]
+    assert manager._in_use["cpu"] == 1
+
+    b = enfileirar(manager, "b", **DUBLAGEM_GPU)
+    # Com um slot de cpu so, B transcreve na GPU enquanto A faz o mux
+    assert manager._admit() == [b]
+    assert manager._in_use == {"gpu": 1, "cpu": 1, "io": 0}
+
+
+class FakeJob:
+    """So o que o escalonador le: classes, prioridade e status"""
+
+    def __init__(self, job_id, resources, priority=3, status="queued"):
+        self.id = job_id
+        self.resources = set(resources)
+        self.priority = priority
+        self.status = status
+        self._seq = 0
+        self._held = set()
+
+
+def fila(manager, *jobs):
+    for job in jobs:
+        manager.jobs[job.id] = job
+        manager._enqueue(job)
+    return jobs
+
+
+def test_prioridade_e_fifo_na_mesma_prioridade(manager, monkeypatch):
+    monkeypatch.setitem(jm.RESOURCE_SLOTS, "io", 3)
+    fila(manager, FakeJob("p3", {"io"}, 3), FakeJob("p1a", {"io"}, 1),
+         FakeJob("p1b", {"io"}, 1), FakeJob("p0", {"io"}, 0))
+
+    assert [job.id for job in manager._admit()] == ["p0", "p1a", "p1b"]
+    assert manager.scheduler_status()["pending"] == ["p3"]
+
+
+def test_job_bloqueado_reserva_suas_classes(manager):
+    manager._in_use["gpu"] = 1  # GPU ocupada por outro job
+    grande, pequeno, outro = fila(manager, FakeJob("grande", {"gpu", "cpu"}, 1),
+                                  FakeJob("pequeno", {"cpu"}, 2), FakeJob("outro", {"io"}, 2))
+
+    # pequeno caberia no slot de cpu, mas passaria a frente do grande para sempre
+    assert manager._admit() == [outro]
+    manager._in_use["gpu"] = 0
+    assert manager._admit() == [grande]
+    assert manager._in_use == {"gpu": 1, "cpu": 1, "io": 1}
+
+
+def test_run_and_release_devolve_slots(manager):
+    job, = fila(manager, FakeJob("a", {"gpu", "cpu"}))
+
+    async def run_job(j):
+        assert manager._in_use == {"gpu": 1, "cpu": 1, "io": 0}
+        j.status = "completed"
+        return False
+
+    async def rodar():
+        manager._wakeup = asyncio.Event()
+        manager._run_job = run_job
+        assert manager._admit() == [job]
+        await manager._run_and_release(job)
+        return manager._wakeup.is_set()
+
+    assert asyncio.run(rodar())
+    assert manager._in_use == {"gpu": 0, "cpu": 0, "io": 0}
+    assert job._held == set()
+    assert manager.scheduler_status()["pending"] == []
+
+
+def test_fase_seguinte_mantem_ordem_de_chegada(manager):
+    a = enfileirar(manager, "a", **DUBLAGEM_GPU)
+    b = enfileirar(manager, "b", **DUBLAGEM_GPU)
+    seq_a = a._seq
+
+    async def run_job(j):
+        j.phase += 1
+        return True  # ainda falta o assemble
+
+    async def rodar():
+        manager._wakeup = asyncio.Event()
+        manager._run_job = run_job
+        assert manager._admit() == [a]
+        a.status = "running"
+        await manager._run_and_release(a)
+
+    asyncio.run(rodar())
+    assert a._seq == seq_a
+    assert (a.priority, seq_a, "a") in manager._pending
+    # B ainda espera a GPU; o assemble de A (cpu) entra antes dele na fila
+    assert manager.scheduler_status()["pending"] == ["a", "b"]
+    assert manager._admit() == [a, b]
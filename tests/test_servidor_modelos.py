@@ -0,0 +1,54 @@
+# Testes do servidor de modelos: log por etapa e seed
+import io
+import threading
+
+import numpy as np
+
+import dublar_pro_v5 as pipeline
+import servidor_modelos as srv
+
+
+def etapa_fake(x):
+    print(f"etapa {x}")
+    # print de outra requisicao (thread do servidor) no meio da etapa
+    outra = threading.Thread(target=lambda: (setattr(srv._stdout.local, "log", None),
+                                             print("GET /health")))
+    outra.start()
+    outra.join()
+    # worker criado pela propria etapa
+    worker = threading.Thread(target=lambda: print("worker da etapa"))
+    worker.start()
+    worker.join()
+    return {"x": x, "rand": float(np.random.rand())}
+
+
+def test_log_isolado_por_requisicao(monkeypatch):
+    terminal = io.StringIO()
+    monkeypatch.setattr(srv, "_stdout", srv._StdoutRouter(terminal))
+    monkeypatch.setattr("sys.stdout", srv._stdout)
+    monkeypatch.setattr(pipeline, "REMOTE_STAGES", pipeline.REMOTE_STAGES | {"etapa_fake"})
+    monkeypatch.setattr(pipeline, "etapa_fake", etapa_fake, raising=False)
+
+    status, resp = srv.run_request({"func": "etapa_fake", "args": [7]})
+
+    assert status == 200
+    assert resp["log"] == "etapa 7\nworker da etapa\n"
+    assert terminal.getvalue() == "GET /health\n"
+    print("depois")
+    assert terminal.getvalue().endswith("depois\n")
+
+
+def test_seed_da_requisicao(monkeypatch):
+    monkeypatch.setattr(pipeline, "REMOTE_STAGES", pipeline.REMOTE_STAGES | {"etapa_fake"})
+    monkeypatch.setattr(pipeline, "etapa_fake", etapa_fake, raising=False)
+    monkeypatch.setattr(pipeline, "GLOBAL_SEED", pipeline.GLOBAL_SEED)
+
+    a = srv.run_request({"func": "etapa_fake", "args": [1], "seed": 123})[1]["result"]
+    b = srv.run_request({"func": "etapa_fake", "args": [1], "seed": 123})[1]["result"]
+    assert a["rand"] == b["rand"]
+    assert pipeline.GLOBAL_SEED == 123
+
+
+def test_etapa_nao_permitida():
+    status, resp = srv.run_request({"func": "sh", "args": [["true"]]})
+    assert status == 400
@@ -0,0 +1,84 @@
+# Testes do pipeline em fluxo (--stream) com ASR, traducao e TTS falsos
+import argparse
+import json
+
+import pytest
+
+import dublar_pro_v5 as dp
+
+
+def segmentos_asr(n):
+    return [{"start": 2.0 * i, "end": 2.0 * i + 1.5, "text": f"Frase numero {i}."} for i in range(n)]
+
+
+@pytest.fixture
+def fluxo(tmp_path, monkeypatch):
+    chamadas = {"check": 0, "warmup": 0, "traducao": []}
+
+    def check_ollama(model=None):
+        chamadas["check"] += 1
+        return True
+
+    def warmup_ollama(model):
+        chamadas["warmup"] += 1
+        return True
+
+    def translate_segments_ollama(segs, src, tgt, workdir, model, cps, no_truncate, **kw):
+        chamadas["traducao"].append(kw)
+        if kw.get("preflight", True):
+            check_ollama(model)
+            warmup_ollama(model)
+        out = [dict(s, text_trad=s["text"].upper(), text_original=s["text"]) for s in segs]
+        if kw.get("write_files", True):
+            dp.write_translation_files(workdir, out, src, tgt, model)
+        return out, None, None
+
+    def run_tts(args, segs_trad, workdir, voice_sample, tts_cache):
+        files = []
+        for i, _ in enumerate(segs_trad, 1):
+            f = workdir / f"seg_{i:04d}.wav"
+            f.write_bytes(b"")
+            files.append(f)
+        return files, 24000, []
+
+    monkeypatch.setattr(dp, "open_faster_whisper",
+                        lambda audio, src, model: (iter(segmentos_asr(7)), None, "en"))
+    monkeypatch.setattr(dp, "check_ollama", check_ollama)
+    monkeypatch.setattr(dp, "warmup_ollama", warmup_ollama)
+    monkeypatch.setattr(dp, "translate_segments_ollama", translate_segments_ollama)
+    monkeypatch.setattr(dp, "run_tts", run_tts)
+
+    args = argparse.Namespace(
+        stream_chunk=2, stream_queue=1, sync="none", no_rubberband=False, whisper_model="small",
+        src="en", tgt="pt", tradutor="ollama", modelo="llama3", translate_workers=1, translate_batch=1,
+        m2m_backend="torch", large_model=False, maxdur=10.0, fade=0, tolerance=0.1, maxstretch=1.5,
+        sync_engine="numpy", sync_workers=1,
+    )
+
+    def rodar():
+        return dp.pipeline_streaming(args, tmp_path / "audio_src.wav", tmp_path, None, None, None,
+                                     None, False)
+    return rodar, chamadas
+
+
+def test_ollama_verificado_uma_vez(fluxo):
+    rodar, chamadas = fluxo
+    rodar()
+    # 7 segmentos em lotes de 2 -> 4 lotes, mas check/warmup so uma vez
+    assert len(chamadas["traducao"]) == 4
+    assert chamadas["check"] == 1
+    assert chamadas["warmup"] == 1
+    assert all(kw["preflight"] is False and kw["write_files"] is False for kw in chamadas["traducao"])
+
+
+def test_srt_traduzido_completo_no_fim(fluxo, tmp_path):
+    rodar, _ = fluxo
+    segs, segs_trad, seg_files, sr, src_lang, _, trad_srt, synced = rodar()
+
+    assert len(segs_trad) == len(seg_files) == 7
+    assert trad_srt == tmp_path / "asr_trad.srt"
+    blocos = trad_srt.read_text(encoding="utf-8").strip().split("\n\n")
+    assert [b.splitlines()[2] for b in blocos] == [f"FRASE NUMERO {i}." for i in range(7)]
+    dados = json.loads((tmp_path / "asr_trad.json").read_text(encoding="utf-8"))
+    assert dados["model"] == "ollama/llama3"
+    assert len(dados["segments"]) == 7
@@ -0,0 +1,88 @@
+# Testes do engine de sync em processo (WSOLA / fit / pad)
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+import dublar_pro_v5 as dp
+
+SR = 22050
+
+
+def tom(segundos, freq=220.0):
+    t = np.arange(int(segundos * SR)) / SR
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+@pytest.mark.parametrize("ratio", [0.6, 0.8, 1.25, 1.5, 2.0])
+def test_wsola_tamanho_da_saida(ratio):
+    data = tom(1.3)
+    out = dp.time_stretch_wsola(data, SR, ratio)
+    assert out.dtype == np.float32
+    assert len(out) == int(round(len(data) * ratio))
+
+
+def test_wsola_preserva_pitch():
+    data = tom(2.0, freq=440.0)
+    out = dp.time_stretch_wsola(data, SR, 1.4)
+    meio = out[len(out) // 4:3 * len(out) // 4]
+    espectro = np.abs(np.fft.rfft(meio * np.hanning(len(meio))))
+    freq = np.fft.rfftfreq(len(meio), 1 / SR)[np.argmax(espectro)]
+    assert abs(freq - 440.0) < 10.0
+    # sem descontinuidades grosseiras nem silencio no meio
+    assert np.max(np.abs(meio)) > 0.3
+
+
+def test_wsola_ratio_unitario_e_vazio():
+    data = tom(0.5)
+    assert np.array_equal(dp.time_stretch_wsola(data, SR, 1.0), data)
+    assert len(dp.time_stretch_wsola(np.zeros(0, dtype=np.float32), SR, 1.5)) == 0
+
+
+def escrever(path, data):
+    wavfile.write(str(path), SR, (data * 32767).astype(np.int16))
+    return path
+
+
+def duracao(path):
+    sr, data = wavfile.read(str(path))
+    return len(data) / sr
+
+
+def test_fit_ajusta_para_o_alvo(tmp_path):
+    p = escrever(tmp_path / "seg_0001.wav", tom(2.0))
+    out = dp.sync_segment_inprocess(p, 1.6, tmp_path, SR, "fit", 0.02, 2.0)
+    assert out.name == "seg_0001_fit.wav"
+    assert duracao(out) == pytest.approx(1.6, abs=1.0 / SR)
+
+
+def test_fit_respeita_maxstretch(tmp_path):
+    p = escrever(tmp_path / "seg_0001.wav", tom(2.0))
+    out = dp.sync_segment_inprocess(p, 0.5, tmp_path, SR, "fit", 0.02, 1.25)
+    assert duracao(out) == pytest.approx(2.0 / 1.25, abs=1.0 / SR)
+
+
+def test_pad_completa_e_corta(tmp_path):
+    curto = escrever(tmp_path / "seg_0001.wav", tom(1.0))
+    longo = escrever(tmp_path / "seg_0002.wav", tom(3.0))
+    assert duracao(dp.sync_segment_inprocess(curto, 1.5, tmp_path, SR, "pad", 0.02, 2.0)) == pytest.approx(1.5)
+    assert duracao(dp.sync_segment_inprocess(longo, 2.0, tmp_path, SR, "pad", 0.02, 2.0)) == pytest.approx(2.0)
+
+
+def test_smart_dentro_da_tolerancia_mantem_original(tmp_path):
+    p = escrever(tmp_path / "seg_0001.wav", tom(1.0))
+    assert dp.sync_segment_inprocess(p, 1.01, tmp_path, SR, "smart", 0.05, 2.0) == p
+
+
+
+def _falha_no_segundo(p, *args):
+    if p.name == "seg_0002.wav":
+        raise RuntimeError("falha simulada")
+    return p
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sync_all_erro_mantem_original_serial_e_paralelo(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(dp, "sync_segment_inprocess", _falha_no_segundo)
+    segs = [escrever(tmp_path / f"seg_{i:04d}.wav", tom(0.2)) for i in (1, 2, 3)]
+    fixed = dp.sync_all_segments(segs, [0.2] * 3, tmp_path, SR, "fit", 0.02, 2.0, workers=workers)
+    assert fixed == segs
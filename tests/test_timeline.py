@@ -0,0 +1,65 @@
+# Testes da montagem da trilha dublada na timeline NumPy (ETAPA 8)
+import numpy as np
+from scipy.io import wavfile
+
+import dublar_pro_v5 as dp
+
+SR = 16000
+
+
+def escrever(path, n, valor):
+    wavfile.write(str(path), SR, np.full(n, int(valor * 32767), dtype=np.int16))
+    return path
+
+
+def ler(path):
+    sr, data = wavfile.read(str(path))
+    assert sr == SR
+    return data.astype(np.float32) / 32767.0
+
+
+def test_segmentos_no_timestamp_com_silencio(tmp_path):
+    a = escrever(tmp_path / "a.wav", SR // 2, 0.5)   # 0.5s
+    b = escrever(tmp_path / "b.wav", SR, -0.25)      # 1.0s
+    segs = [{"start": 1.0}, {"start": 3.0}]
+
+    out = ler(dp.concat_segments([a, b], tmp_path, SR, segs, total_duration=5.0))
+
+    assert len(out) == 5 * SR
+    assert np.all(out[:SR] == 0)
+    assert np.allclose(out[SR:SR + SR // 2], 0.5, atol=1e-3)
+    assert np.all(out[SR + SR // 2:3 * SR] == 0)
+    assert np.allclose(out[3 * SR:4 * SR], -0.25, atol=1e-3)
+    assert np.all(out[4 * SR:] == 0)
+
+
+def test_sobreposicao_empurra_proximo_segmento(tmp_path):
+    a = escrever(tmp_path / "a.wav", 2 * SR, 0.5)    # 0.0s-2.0s
+    b = escrever(tmp_path / "b.wav", SR, -0.5)       # pedido em 1.5s
+    segs = [{"start": 0.0}, {"start": 1.5}]
+
+    out = ler(dp.concat_segments([a, b], tmp_path, SR, segs))
+
+    # b comeca apos o fim de a, sem somar as duas vozes
+    assert len(out) == 3 * SR
+    assert np.allclose(out[:2 * SR], 0.5, atol=1e-3)
+    assert np.allclose(out[2 * SR:], -0.5, atol=1e-3)
+
+
+def test_sem_timestamps_cola_em_sequencia(tmp_path):
+    a = escrever(tmp_path / "a.wav", 1234, 0.1)
+    b = escrever(tmp_path / "b.wav", 4321, 0.2)
+
+    out = ler(dp.concat_segments([a, b], tmp_path, SR))
+
+    assert len(out) == 1234 + 4321
+    assert np.allclose(out[1234:], 0.2, atol=1e-3)
+
+
+def test_reamostra_segmento_para_sample_rate_da_saida(tmp_path):
+    p = tmp_path / "a.wav"
+    wavfile.write(str(p), 8000, np.full(8000, 1000, dtype=np.int16))  # 1s a 8 kHz
+
+    out = ler(dp.concat_segments([p], tmp_path, SR, [{"start": 0.5}]))
+
+    assert len(out) == SR // 2 + SR
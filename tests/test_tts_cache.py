@@ -0,0 +1,97 @@
+# Testes do cache de TTS enderecado por conteudo
+import sys
+import types
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+import dublar_pro_v5 as dp
+
+
+def test_store_e_fetch(tmp_path):
+    cache = dp.TTSCache(tmp_path / "cache")
+    wav = tmp_path / "a.wav"
+    wavfile.write(str(wav), 16000, np.arange(1600, dtype=np.int16))
+    key = cache.make_key(engine="edge", text="ola")
+
+    assert not cache.fetch(key, tmp_path / "out.wav")
+    cache.store(key, wav)
+    assert cache.fetch(key, tmp_path / "out.wav")
+    assert (tmp_path / "out.wav").read_bytes() == wav.read_bytes()
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_store_concorrente_na_mesma_chave(tmp_path):
+    cache = dp.TTSCache(tmp_path / "cache")
+    key = cache.make_key(engine="xtts", text="mesmo texto")
+    wavs = []
+    for i in range(16):
+        wav = tmp_path / f"w{i}.wav"
+        wavfile.write(str(wav), 16000, np.full(48000, i, dtype=np.int16))
+        wavs.append(wav)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda w: cache.store(key, w), wavs * 4))
+
+    # Um arquivo inteiro de um dos escritores, sem temporarios sobrando
+    conteudo = cache._path(key).read_bytes()
+    assert conteudo in {w.read_bytes() for w in wavs}
+    assert not list(cache.root.glob("*/*.tmp"))
+
+
+def test_chave_xtts_muda_com_seed_e_modo(tmp_path, monkeypatch):
+    cache = dp.TTSCache(tmp_path / "cache")
+    args = ("pt", "ola mundo", "latent123")
+
+    monkeypatch.setattr(dp, "GLOBAL_SEED", 42)
+    base = dp.xtts_cache_key(cache, *args, True, 24000)
+    assert dp.xtts_cache_key(cache, *args, True, 24000) == base
+    assert dp.xtts_cache_key(cache, *args, False, 24000) != base
+    monkeypatch.setattr(dp, "GLOBAL_SEED", 7)
+    assert dp.xtts_cache_key(cache, *args, True, 24000) != base
+
+
+class FakeConverter:
+    """Imita ctranslate2: recusa output_dir existente sem force"""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def convert(self, output_dir, quantization=None, force=False):
+        out = Path(output_dir)
+        if out.exists() and not force:
+            raise RuntimeError(f"output directory {out} already exists, use --force to override")
+        out.mkdir()
+        (out / "model.bin").write_text(self.model_name)
+        return output_dir
+
+
+def test_convert_m2m100_ct2(tmp_path, monkeypatch):
+    fake = types.ModuleType("ctranslate2")
+    fake.converters = types.SimpleNamespace(TransformersConverter=FakeConverter)
+    monkeypatch.setitem(sys.modules, "ctranslate2", fake)
+    out_dir = tmp_path / "m2m100_ct2"
+
+    dp._convert_m2m100("facebook/m2m100_418M", "ct2", out_dir)
+
+    assert (out_dir / "model.bin").read_text() == "facebook/m2m100_418M"
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_convert_m2m100_falha_nao_deixa_tmp(tmp_path, monkeypatch):
+    def explode(self, output_dir, quantization=None, force=False):
+        raise RuntimeError("sem memoria")
+
+    fake = types.ModuleType("ctranslate2")
+    fake.converters = types.SimpleNamespace(TransformersConverter=type("C", (FakeConverter,), {"convert": explode}))
+    monkeypatch.setitem(sys.modules, "ctranslate2", fake)
+    out_dir = tmp_path / "m2m100_ct2"
+
+    with pytest.raises(RuntimeError):
+        dp._convert_m2m100("facebook/m2m100_418M", "ct2", out_dir)
+
+    assert not out_dir.exists()
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,146 @@
+# Testes do TTS Edge concorrente com um edge_tts.Communicate falso (sem rede)
+import asyncio
+import csv
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import dublar_pro_v5 as dp
+
+SR = 24000
+_sleep = asyncio.sleep
+
+
+class Throttled(Exception):
+    status = 429
+
+
+class FakeEdge:
+    """Communicate falso: latencia variavel, conta requisicoes simultaneas e
+    responde 429 na primeira tentativa dos textos marcados"""
+
+    def __init__(self, throttle=()):
+        self.ativos = 0
+        self.pico = 0
+        self.chamadas = []
+        self.throttle = set(throttle)
+        fake = self
+
+        class Communicate:
+            def __init__(self, text, voice, rate="+0%"):
+                self.text = text
+
+            async def stream(self):
+                fake.chamadas.append(self.text)
+                fake.ativos += 1
+                fake.pico = max(fake.pico, fake.ativos)
+                try:
+                    # Textos curtos terminam antes: conclusao fora de ordem
+                    await _sleep(0.001 * (60 - len(self.text)))
+                    if self.text in fake.throttle:
+                        fake.throttle.discard(self.text)
+                        raise Throttled("429 Too Many Requests")
+                    # "MP3" falso: o tamanho do texto define a duracao
+                    yield {"type": "WordBoundary"}
+                    yield {"type": "audio", "data": len(self.text).to_bytes(4, "little")}
+                finally:
+                    fake.ativos -= 1
+
+        self.module = types.SimpleNamespace(Communicate=Communicate)
+
+
+@pytest.fixture
+def edge(monkeypatch):
+    def instalar(**kw):
+        fake = FakeEdge(**kw)
+        monkeypatch.setitem(sys.modules, "edge_tts", fake.module)
+        return fake
+    # decode falso: 0.1s de audio por caractere do texto
+    monkeypatch.setattr(dp, "decode_audio_bytes",
+                        lambda data, sr: np.full(int(int.from_bytes(data, "little") * 0.1 * sr), 0.1,
+                                                 dtype=np.float32))
+    return instalar
+
+
+@pytest.fixture
+def esperas(monkeypatch):
+    """Registra os sleeps de backoff sem esperar de verdade"""
+    pedidos = []
+
+    async def sleep(delay, *a, **kw):
+        pedidos.append(delay)
+        await _sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return pedidos
+
+
+def segmentos(n):
+    return [{"start": float(i), "end": float(i) + 1.0, "text_trad": "texto " + "x" * (n - i)}
+            for i in range(n)]
+
+
+def test_concorrencia_limitada(tmp_path, edge):
+    fake = edge()
+    segs = segmentos(12)
+    files, sr, _ = dp.tts_edge(segs, tmp_path, "pt", concurrency=3)
+    assert sr == SR
+    assert len(fake.chamadas) == 12
+    assert 1 < fake.pico <= 3
+
+
+def test_serial_com_concorrencia_1(tmp_path, edge):
+    fake = edge()
+    dp.tts_edge(segmentos(5), tmp_path, "pt", concurrency=1)
+    assert fake.pico == 1
+
+
+def test_ordem_dos_resultados(tmp_path, edge):
+    edge()
+    segs = segmentos(8)
+    files, _, metricas = dp.tts_edge(segs, tmp_path, "pt", concurrency=8)
+
+    assert [f.name for f in files] == [f"seg_{i:04d}.wav" for i in range(1, 9)]
+    assert [m["idx"] for m in metricas] == list(range(1, 9))
+    for f, s, m in zip(files, segs, metricas):
+        esperado = len(s["text_trad"]) * 0.1
+        assert dp.wav_duration(f) == pytest.approx(esperado, abs=1e-3)
+        assert m["actual"] == pytest.approx(esperado, abs=1e-3)
+
+    with open(tmp_path / "segments.csv", encoding="utf-8") as f:
+        linhas = list(csv.DictReader(f))
+    assert [int(r["idx"]) for r in linhas] == list(range(1, 9))
+    assert [r["file"] for r in linhas] == [f.name for f in files]
+
+
+def test_backoff_em_rate_limit(tmp_path, edge, esperas):
+    segs = segmentos(4)
+    fake = edge(throttle={segs[1]["text_trad"]})
+    files, _, metricas = dp.tts_edge(segs, tmp_path, "pt", concurrency=2)
+
+    # 2 tentativas para o segmento limitado, 1 para os outros
+    assert fake.chamadas.count(segs[1]["text_trad"]) == 2
+    assert len(fake.chamadas) == 5
+    # Retry espera e o pacing compartilhado sobe para 1s
+    assert 2 in esperas
+    assert 1.0 in esperas
+    # Nenhum segmento virou silencio
+    assert metricas[1]["actual"] == pytest.approx(len(segs[1]["text_trad"]) * 0.1, abs=1e-3)
+
+
+def test_falha_persistente_vira_silencio(tmp_path, edge, esperas, monkeypatch):
+    fake = edge()
+    segs = segmentos(2)
+    orig = fake.module.Communicate
+
+    class SempreFalha(orig):
+        async def stream(self):
+            raise RuntimeError("sem conexao")
+            yield  # pragma: no cover
+
+    monkeypatch.setattr(fake.module, "Communicate", SempreFalha)
+    files, _, metricas = dp.tts_edge(segs, tmp_path, "pt", concurrency=2)
+    assert [m["actual"] for m in metricas] == [1.0, 1.0]
+    assert dp.wav_duration(files[0]) == pytest.approx(1.0)
@@ -3,6 +3,7 @@
 
 import argparse
 import json
+import os
 import subprocess
 import sys
 import time
@@ -98,31 +99,27 @@ def _has_cuda() -> bool:
         return False
 
 
-def transcribe_whisper(audio_path: Path, model: str, src_lang: str | None) -> list[dict]:
-    """Transcreve com faster-whisper. Retorna lista de segmentos."""
+def transcribe_whisper(audio_path: Path, model: str, src_lang: str | None,
+                       chunked: bool = False, chunk_s: float = 300.0, workers: int = 0,
+                       cache_dir: str | None = None, fingerprint: str | None = None) -> list[dict]:
+    """Transcreve com faster-whisper. Retorna lista de segmentos.
+
+    chunked: blocos paralelos cortados em pausas (ver asr_comum.transcribe_chunked).
+    cache_dir + fingerprint: cache de ASR compartilhado com dublagem e corte viral.
+    """
     print(f"[transcription] Transcrevendo com faster-whisper {model}...", flush=True)
-    from faster_whisper import WhisperModel
+    from asr_comum import transcribe
 
     device = "cuda" if _has_cuda() else "cpu"
     compute = "float16" if device == "cuda" else "int8"
 
-    wm = WhisperModel(model, device=device, compute_type=compute)
-    segments_iter, info = wm.transcribe(
-        str(audio_path),
-        language=src_lang or None,
-        vad_filter=True,
-    )
-
-    results = []
-    for seg in segments_iter:
-        results.append({
-            "start": round(seg.start, 3),
-            "end": round(seg.end, 3),
-            "text": seg.text.strip(),
-        })
-        print(f"  [{seg.start:.1f}s -> {seg.end:.1f}s] {seg.text.strip()}", flush=True)
+    segments, language = transcribe(audio_path, model, src_lang or None, device, compute,
+                                    chunked=chunked, chunk_s=chunk_s, workers=workers,
+                                    cache_dir=cache_dir, fingerprint=fingerprint, verbose=True)
+    results = [{"start": round(s["start"], 3), "end": round(s["end"], 3), "text": s["text"]}
+               for s in segments]
 
-    print(f"[transcription] {len(results)} segmentos, idioma: {info.language}", flush=True)
+    print(f"[transcription] {len(results)} segmentos, idioma: {language}", flush=True)
     return results
 
 
@@ -202,6 +199,13 @@ def main():
     parser.add_argument("--asr", default="whisper", choices=["whisper", "parakeet"])
     parser.add_argument("--whisper-model", default="large-v3", dest="whisper_model")
     parser.add_argument("--src", default=None, help="Idioma de origem (auto-detect se vazio)")
+    parser.add_argument("--asr-chunked", action="store_true", dest="asr_chunked",
+                        help="Blocos paralelos cortados em pausas (audios longos)")
+    parser.add_argument("--asr-chunk-s", type=float, default=300, dest="asr_chunk_s")
+    parser.add_argument("--asr-workers", type=int, default=0, dest="asr_workers",
+                        help="Processos Whisper na CPU (0=nucleos/4)")
+    parser.add_argument("--cache-dir", default=os.environ.get("DUBLAR_CACHE_DIR"), dest="cache_dir",
+                        help="Cache de ASR compartilhado (padrao: $DUBLAR_CACHE_DIR)")
     args = parser.parse_args()
 
     outdir = Path(args.outdir)
@@ -224,7 +228,13 @@ def main():
 
         # Etapa 3: Transcription
         if args.asr == "whisper":
-            segments = transcribe_whisper(audio, args.whisper_model, args.src)
+            fingerprint = None
+            if args.cache_dir:
+                from asr_comum import audio_fingerprint
+                fingerprint = audio_fingerprint(source)
+            segments = transcribe_whisper(audio, args.whisper_model, args.src, chunked=args.asr_chunked,
+                                          chunk_s=args.asr_chunk_s, workers=args.asr_workers,
+                                          cache_dir=args.cache_dir, fingerprint=fingerprint)
         else:
             # parakeet - fallback para whisper por enquanto
             segments = transcribe_whisper(audio, "large-v3", "en")